@@ -0,0 +1,266 @@
+# coding=utf-8
+"""
+Fuse the grouped datasets of a load into numpy arrays, reading them in a thread pool, or into dask arrays with a
+read task per time slice and spatial chunk.
+"""
+from __future__ import absolute_import, division
+
+from collections import OrderedDict
+from math import ceil
+from multiprocessing.pool import ThreadPool
+from operator import getitem
+
+import numpy
+from dask import array as da
+from six.moves import zip
+
+from ..storage.storage import reproject_and_fuse, read_and_fuse_bands, OrderedFuser
+from ._footprints import _apply_mask, _chunk_mask, _datasets_by_chunk, _datasets_in_mask, _sort_by_coverage
+
+
+def fuse_lazy(datasets, geobox, measurement, fuse_func=None, prepend_dims=0, driver_manager=None, mask=None):
+    prepend_shape = (1,) * prepend_dims
+    data = numpy.full(geobox.shape, measurement['nodata'], dtype=measurement['dtype'])
+    datasets = _datasets_in_mask(datasets, geobox, mask)
+    _fuse_measurement(data, datasets, geobox, measurement, fuse_func=fuse_func, driver_manager=driver_manager)
+    _apply_mask(data, mask, measurement['nodata'])
+    return data.reshape(prepend_shape + geobox.shape)
+
+
+def fuse_lazy_multiband(datasets, geobox, measurements, fuse_func=None, prepend_dims=0, driver_manager=None,
+                        mask=None):
+    prepend_shape = (1,) * prepend_dims
+    dests = [numpy.full(geobox.shape, measurement['nodata'], dtype=measurement['dtype'])
+             for measurement in measurements]
+    datasets = _datasets_in_mask(datasets, geobox, mask)
+    fusers = _make_fusers(dests, len(datasets), geobox, measurements, fuse_func=fuse_func)
+    names = [measurement['name'] for measurement in measurements]
+    for position, dataset in enumerate(datasets):
+        read_and_fuse_bands(driver_manager.get_datasource(dataset, names), fusers, position)
+    for dest, measurement in zip(dests, measurements):
+        _apply_mask(dest, mask, measurement['nodata'])
+    return tuple(dest.reshape(prepend_shape + geobox.shape) for dest in dests)
+
+
+def _make_fusers(dests, num_sources, geobox, measurements, fuse_func=None, skip_broken_datasets=False):
+    return [OrderedFuser(dest, num_sources, geobox.affine, geobox.crs,
+                         dest.dtype.type(measurement['nodata']),
+                         resampling=measurement.get('resampling_method', 'nearest'),
+                         fuse_func=fuse_func,
+                         skip_broken_datasets=skip_broken_datasets)
+            for dest, measurement in zip(dests, measurements)]
+
+
+def _fuse_measurement(dest, datasets, geobox, measurement, skip_broken_datasets=False,
+                      fuse_func=None, driver_manager=None):
+    reproject_and_fuse([driver_manager.get_datasource(dataset, measurement['name']) for dataset in datasets],
+                       dest,
+                       geobox.affine,
+                       geobox.crs,
+                       dest.dtype.type(measurement['nodata']),
+                       resampling=measurement.get('resampling_method', 'nearest'),
+                       fuse_func=fuse_func,
+                       skip_broken_datasets=skip_broken_datasets)
+
+
+def _output_array(out, measurement, shape):
+    """
+    Return the array to load `measurement` into, filled with nodata: the one supplied in `out`, if any,
+    otherwise a newly allocated one.
+    """
+    name, dtype, nodata = measurement['name'], numpy.dtype(measurement['dtype']), measurement['nodata']
+    if not out or name not in out:
+        return numpy.full(shape, nodata, dtype=dtype)
+
+    array = out[name]
+    if not isinstance(array, numpy.ndarray):
+        array = numpy.frombuffer(array, dtype=dtype, count=int(numpy.prod(shape))).reshape(shape)
+    if array.shape != shape or array.dtype != dtype:
+        raise ValueError("Output array for '{}' must have shape {} and dtype {}, not {} and {}".format(
+            name, shape, dtype, array.shape, array.dtype))
+    if not array.flags.writeable:
+        raise ValueError("Output array for '{}' is not writeable".format(name))
+
+    array[...] = nodata
+    return array
+
+
+def _fill_arrays(arrays, sources, geobox, measurements, fuse_func=None, skip_broken_datasets=False,
+                 driver_manager=None, num_threads=1, mask=None):
+    """
+    Read `sources` into the preallocated `arrays`, in place.
+
+    All requested measurements of a dataset are read together, opening each file only once. With more than one
+    thread, every (time slice, source, file) read is a separate task in a thread pool. Sources belonging to the
+    same time slice are still fused in their group order.
+
+    :param dict arrays: measurement name -> numpy array of shape `sources.shape + geobox.shape`
+    :param numpy.ndarray mask: optional boolean array of `geobox.shape`, True for the pixels to load
+    """
+    tasks = _fill_tasks(arrays, sources, geobox, measurements, fuse_func, skip_broken_datasets, driver_manager, mask)
+    if num_threads > 1:
+        tasks = [(part, [fusers[i] for i in indices], position)
+                 for source, fusers, position in tasks for indices, part in source.split_by_file()]
+
+    def work(task):
+        source, task_fusers, position = task
+        read_and_fuse_bands(source, task_fusers, position, skip_broken_datasets=skip_broken_datasets)
+
+    if num_threads <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            work(task)
+    else:
+        # Tasks are dispatched one at a time in submission order, so a task waiting for its turn to fuse only ever
+        # waits on tasks for earlier sources, which are already running.
+        pool = ThreadPool(min(num_threads, len(tasks)))
+        try:
+            pool.map(work, tasks, chunksize=1)
+        finally:
+            pool.terminate()
+
+    for measurement in measurements:
+        _apply_mask(arrays[measurement['name']], mask, measurement['nodata'])
+
+
+def _fill_tasks(arrays, sources, geobox, measurements, fuse_func, skip_broken_datasets, driver_manager, mask):
+    """
+    :return: list of (source, its fusers, position of the source within its time slice) to read, in order
+    """
+    names = [measurement['name'] for measurement in measurements]
+
+    tasks = []
+    for index, datasets in numpy.ndenumerate(sources.values):
+        datasets = _datasets_in_mask(datasets, geobox, mask)
+        fusers = _make_fusers([arrays[name][index] for name in names], len(datasets), geobox, measurements,
+                              fuse_func=fuse_func, skip_broken_datasets=skip_broken_datasets)
+        if fuse_func is None:
+            datasets = _sort_by_coverage(datasets, geobox)
+        for position, dataset in enumerate(datasets):
+            tasks.append((driver_manager.get_datasource(dataset, names), fusers, position))
+    return tasks
+
+
+def _chunk_slices(shape, chunk_size):
+    num_grid_chunks = [int(ceil(s / float(c))) for s, c in zip(shape, chunk_size)]
+    chunk_slices = OrderedDict()
+    for grid_index in numpy.ndindex(*num_grid_chunks):
+        chunk_slices[grid_index] = [slice(min(d * c, stop), min((d + 1) * c, stop))
+                                    for d, c, stop in zip(grid_index, chunk_size, shape)]
+    return chunk_slices
+
+
+def _calculate_chunk_sizes(sources, geobox, dask_chunks):
+    valid_keys = sources.dims + geobox.dimensions
+    bad_keys = set(dask_chunks) - set(valid_keys)
+    if bad_keys:
+        raise KeyError('Unknown dask_chunk dimension {}. Valid dimensions are: {}'.format(bad_keys, valid_keys))
+
+    # If chunk size is not specified, the entire dimension length is used, as in xarray
+    chunks = {dim: size for dim, size in zip(sources.dims, sources.shape)}
+    chunks.update({dim: size for dim, size in zip(geobox.dimensions, geobox.shape)})
+
+    chunks.update(dask_chunks)
+
+    irr_chunks = tuple(chunks[dim] for dim in sources.dims)
+    grid_chunks = tuple(chunks[dim] for dim in geobox.dimensions)
+
+    return irr_chunks, grid_chunks
+
+
+# pylint: disable=too-many-locals
+def _make_dask_array(sources, geobox, measurement, fuse_func=None, dask_chunks=None,
+                     driver_manager=None, mask=None):
+    dsk_name = 'datacube_' + measurement['name']
+
+    irr_chunks, grid_chunks = _calculate_chunk_sizes(sources, geobox, dask_chunks)
+    sliced_irr_chunks = (1,) * sources.ndim
+
+    dsk = {}
+    chunk_slices = _chunk_slices(geobox.shape, grid_chunks)
+    geobox_subsets = {}
+
+    for irr_index, datasets in numpy.ndenumerate(sources.values):
+        # Sorted against the whole output, so every chunk fuses in the same order as an in-memory load
+        if fuse_func is None:
+            datasets = _sort_by_coverage(datasets, geobox)
+        # Each chunk only reads the datasets that overlap it, and chunks without any, or entirely outside the
+        # mask, are constant nodata
+        datasets_by_chunk = _datasets_by_chunk(datasets, geobox, grid_chunks)
+        for grid_index, slices in chunk_slices.items():
+            chunk_datasets = datasets_by_chunk.get(grid_index)
+            loaded, chunk_mask = _chunk_mask(mask, slices)
+            if chunk_datasets and loaded:
+                if grid_index not in geobox_subsets:
+                    geobox_subsets[grid_index] = geobox[slices]
+                dsk[(dsk_name,) + irr_index + grid_index] = (fuse_lazy,
+                                                             tuple(chunk_datasets), geobox_subsets[grid_index],
+                                                             measurement, fuse_func, sources.ndim, driver_manager,
+                                                             chunk_mask)
+            else:
+                chunk_shape = sliced_irr_chunks + tuple(s.stop - s.start for s in slices)
+                dsk[(dsk_name,) + irr_index + grid_index] = (numpy.full, chunk_shape,
+                                                             measurement['nodata'], measurement['dtype'])
+
+    data = da.Array(dsk, dsk_name,
+                    chunks=(sliced_irr_chunks + grid_chunks),
+                    dtype=measurement['dtype'],
+                    shape=(sources.shape + geobox.shape))
+
+    if irr_chunks != sliced_irr_chunks:
+        data = data.rechunk(chunks=(irr_chunks + grid_chunks))
+    return data
+
+
+def _make_dask_arrays(sources, geobox, measurements, fuse_func=None, dask_chunks=None,
+                      driver_manager=None, mask=None):
+    """
+    Like :func:`_make_dask_array`, for several measurements sharing one read task per time slice and chunk.
+
+    :return: measurement name -> :class:`dask.array.Array`
+    """
+    measurements = list(measurements)
+    names = [measurement['name'] for measurement in measurements]
+    # Not 'datacube_' + name, which is taken by the per-measurement keys when there is only one measurement
+    multi_name = 'datacube_multiband_' + '+'.join(names)
+    dsk_names = ['datacube_' + name for name in names]
+
+    irr_chunks, grid_chunks = _calculate_chunk_sizes(sources, geobox, dask_chunks)
+    sliced_irr_chunks = (1,) * sources.ndim
+
+    dsk = {}
+    chunk_slices = _chunk_slices(geobox.shape, grid_chunks)
+    geobox_subsets = {}
+
+    for irr_index, datasets in numpy.ndenumerate(sources.values):
+        if fuse_func is None:
+            datasets = _sort_by_coverage(datasets, geobox)
+        datasets_by_chunk = _datasets_by_chunk(datasets, geobox, grid_chunks)
+        for grid_index, slices in chunk_slices.items():
+            chunk_datasets = datasets_by_chunk.get(grid_index)
+            loaded, chunk_mask = _chunk_mask(mask, slices)
+            if chunk_datasets and loaded:
+                if grid_index not in geobox_subsets:
+                    geobox_subsets[grid_index] = geobox[slices]
+                multi_key = (multi_name,) + irr_index + grid_index
+                dsk[multi_key] = (fuse_lazy_multiband,
+                                  tuple(chunk_datasets), geobox_subsets[grid_index],
+                                  measurements, fuse_func, sources.ndim, driver_manager, chunk_mask)
+                for band_index, dsk_name in enumerate(dsk_names):
+                    dsk[(dsk_name,) + irr_index + grid_index] = (getitem, multi_key, band_index)
+            else:
+                chunk_shape = sliced_irr_chunks + tuple(s.stop - s.start for s in slices)
+                for measurement, dsk_name in zip(measurements, dsk_names):
+                    dsk[(dsk_name,) + irr_index + grid_index] = (numpy.full, chunk_shape,
+                                                                 measurement['nodata'], measurement['dtype'])
+
+    arrays = OrderedDict()
+    for measurement, dsk_name in zip(measurements, dsk_names):
+        data = da.Array(dsk, dsk_name,
+                        chunks=(sliced_irr_chunks + grid_chunks),
+                        dtype=measurement['dtype'],
+                        shape=(sources.shape + geobox.shape))
+
+        if irr_chunks != sliced_irr_chunks:
+            data = data.rechunk(chunks=(irr_chunks + grid_chunks))
+        arrays[measurement['name']] = data
+    return arrays
@@ -0,0 +1,100 @@
+# coding=utf-8
+"""
+Read the pixels containing a few points through time, for :meth:`datacube.Datacube.load_points`, without reading
+anything else of the datasets covering them.
+"""
+from __future__ import absolute_import
+
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+import numpy
+import xarray
+from six.moves import zip
+
+from ..storage.storage import read_points
+
+
+def _read_points_into(sources, points, measurements, driver_manager=None, num_threads=1):
+    """
+    Read the pixels containing `points` from the datasets covering them.
+
+    Each (time slice, dataset) is read as a separate task, `num_threads` at a time. Within a time slice, the
+    first dataset in group order with data for a point provides its value.
+
+    :return: measurement name -> numpy array of shape `sources.shape + (len(points),)`
+    """
+    names = [measurement['name'] for measurement in measurements]
+    tasks = _point_tasks(sources, points)
+
+    def work(task):
+        _, dataset, covered = task
+        return read_points(driver_manager.get_datasource(dataset, names), [points[i] for i in covered])
+
+    if num_threads <= 1 or len(tasks) <= 1:
+        results = [work(task) for task in tasks]
+    else:
+        pool = ThreadPool(min(num_threads, len(tasks)))
+        try:
+            results = pool.map(work, tasks, chunksize=1)
+        finally:
+            pool.terminate()
+
+    arrays = OrderedDict((measurement['name'], numpy.full(sources.shape + (len(points),), measurement['nodata'],
+                                                          dtype=measurement['dtype']))
+                         for measurement in measurements)
+    _merge_point_values(arrays, tasks, results)
+    return arrays
+
+
+def _point_tasks(sources, points):
+    """
+    :return: list of (index in `sources`, dataset, indices of the `points` its footprint covers), for the
+        datasets covering any of them
+    """
+    points_by_crs = {}
+    tasks = []
+    for index, datasets in numpy.ndenumerate(sources.values):
+        for dataset in datasets:
+            extent = dataset.extent
+            if extent is not None and extent.crs.crs_str not in points_by_crs:
+                points_by_crs[extent.crs.crs_str] = [point.to_crs(extent.crs) for point in points]
+            covered = [i for i, point in enumerate(points)
+                       if extent is None or extent.intersects(points_by_crs[extent.crs.crs_str][i])]
+            if covered:
+                tasks.append((index, dataset, covered))
+    return tasks
+
+
+def _merge_point_values(arrays, tasks, results):
+    """
+    Fill `arrays` with the valid values read by each task, keeping the first one for each point.
+    """
+    filled = {name: numpy.zeros(array.shape, dtype=numpy.bool_) for name, array in arrays.items()}
+    for (index, _, covered), bands in zip(tasks, results):
+        covered = numpy.array(covered)
+        for name, (values, valid) in zip(arrays, bands):
+            take = valid & ~filled[name][index][covered]
+            arrays[name][index][covered[take]] = values[take]
+            filled[name][index][covered[take]] = True
+
+
+def _points_dataset(grouped, points, crs, measurements, arrays):
+    """
+    :return: `arrays` as an :class:`xarray.Dataset` with dimensions (time, point), and `x` and `y` coordinates
+        for each point
+    """
+    result = xarray.Dataset(attrs={'crs': crs})
+    for name, coord in grouped.coords.items():
+        result[name] = coord
+    result['point'] = ('point', numpy.arange(len(points)))
+    result.coords['x'] = ('point', [point.coords[0][0] for point in points])
+    result.coords['y'] = ('point', [point.coords[0][1] for point in points])
+
+    dims = tuple(grouped.dims) + ('point',)
+    for measurement in measurements:
+        result[measurement['name']] = (dims, arrays[measurement['name']], {
+            'nodata': measurement.get('nodata'),
+            'units': measurement.get('units', '1'),
+        })
+    return result
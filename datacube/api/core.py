@@ -1,38 +1,28 @@
 from __future__ import absolute_import, division, print_function
 
 import logging
-import os
-import sys
-import uuid
 import warnings
-from collections import namedtuple, OrderedDict
-from itertools import groupby, repeat
-from math import ceil
+from collections import namedtuple, OrderedDict, deque
+from multiprocessing.pool import ThreadPool
 from pathlib import PurePath
 
 import numpy
 import pandas
 import xarray
-
-try:
-    import SharedArray as sa
-except ImportError:
-    pass
 from affine import Affine
-from dask import array as da
-
-try:
-    from pathos.threading import ThreadPool
-except ImportError:
-    pass
 from six.moves import zip
 
-from ..config import LocalConfig
+from ..config import LocalConfig, OPTIONS
 from ..compat import string_types
 from datacube.drivers.manager import DriverManager
-from ..storage.storage import reproject_and_fuse
 from ..utils import geometry, intersects, data_resolution_and_offset
+from ..utils.footprints import bounding_boxes
+from ._footprints import _geopolygon_mask
+from ._fuse import (_calculate_chunk_sizes, _chunk_slices, _fill_arrays, _make_dask_array, _make_dask_arrays,
+                    _output_array, fuse_lazy)
+from ._points import _points_dataset, _read_points_into
 from .query import Query, query_group_by, query_geopolygon
+from .reducers import REDUCERS, reduce_datasets
 
 _LOG = logging.getLogger(__name__)
 
@@ -188,7 +178,8 @@ class Datacube(object):
 
     #: pylint: disable=too-many-arguments, too-many-locals
     def load(self, product=None, measurements=None, output_crs=None, resolution=None, resampling=None, stack=False,
-             dask_chunks=None, like=None, fuse_func=None, align=None, datasets=None, use_threads=False, **query):
+             dask_chunks=None, like=None, fuse_func=None, align=None, datasets=None, use_threads=True,
+             dask_multiband=False, out=None, mask_to_geopolygon=False, **query):
         """
         Load data as an ``xarray`` object.  Each measurement will be a data variable in the :class:`xarray.Dataset`.
 
@@ -317,6 +308,13 @@ class Datacube(object):
             See the documentation on using `xarray with dask <http://xarray.pydata.org/en/stable/dask.html>`_
             for more information.
 
+        :param bool dask_multiband:
+            Optional. Only used with ``dask_chunks``. If True, each time slice and chunk is a single task reading
+            all measurements together, instead of one task per measurement, so source files are opened and read
+            once per chunk. The per-measurement arrays are split out of it.
+
+            Default is False.
+
         :param xarray.Dataset like:
             Uses the output of a previous ``load()`` to form the basis of a request for another product.
             E.g.::
@@ -335,9 +333,26 @@ class Datacube(object):
             Optional. If this is a non-empty list of :class:`datacube.model.Dataset` objects, these will be loaded
             instead of performing a database lookup.
 
-        :param bool use_threads:
-            Optional. If this is set to True, IO will be multi-thread.
-            May not work for all drivers due to locking/GIL.
+        :param use_threads:
+            Optional. If True, IO is spread over a pool of ``load_threads`` worker threads
+            (see :class:`datacube.set_options`), one task per time slice, source and file.
+            An integer sets the number of worker threads directly. False reads one file at a time.
+            Ignored when ``dask_chunks`` is supplied.
+
+            Default is True.
+
+        :type use_threads: bool or int
+
+        :param dict out:
+            Optional. Mapping of measurement name to a preallocated array to load into, instead of allocating a
+            new one. Can be a :class:`numpy.ndarray`, a :class:`numpy.memmap` or any writable buffer, of the
+            output shape and the measurement's dtype. Useful for loading more data than fits in memory, or for
+            reusing buffers between loads. Not supported with ``dask_chunks``.
+
+        :param bool mask_to_geopolygon:
+            Optional. If True and a ``geopolygon`` is part of the query, pixels outside the polygon are set to
+            nodata instead of being loaded. Datasets not touching the polygon are not read, and with
+            ``dask_chunks``, chunks entirely outside it are not read either.
 
             Default is False.
 
@@ -349,10 +364,203 @@ class Datacube(object):
             As a :class:`xarray.DataArray` if the ``stack`` variable is supplied.
 
         :rtype: :class:`xarray.Dataset` or :class:`xarray.DataArray`
+
+        .. seealso:: :meth:`load_iter`
+        """
+        inputs = self._prepare_load(product, measurements, output_crs, resolution, resampling, like, align,
+                                    datasets, query)
+        if inputs is None:
+            return None if stack else xarray.Dataset()
+        grouped, geobox, measurements = inputs
+
+        mask = None
+        if mask_to_geopolygon:
+            geopolygon = query_geopolygon(**query)
+            if geopolygon is not None:
+                mask = _geopolygon_mask(geopolygon, geobox)
+
+        result = self.load_data(grouped, geobox, measurements.values(),
+                                fuse_func=fuse_func, dask_chunks=dask_chunks, use_threads=use_threads,
+                                dask_multiband=dask_multiband, driver_manager=self.driver_manager, out=out,
+                                mask=mask)
+        return _stack_result(result, stack)
+
+    def load_iter(self, product=None, measurements=None, output_crs=None, resolution=None, resampling=None,
+                  stack=False, chunks=None, like=None, fuse_func=None, align=None, datasets=None, use_threads=True,
+                  prefetch=1, **query):
+        """
+        Load data one block at a time, as a generator of ``xarray`` objects.
+
+        Takes the same arguments as :meth:`load`, except that ``chunks`` replaces ``dask_chunks``, and
+        ``dask_multiband`` and ``out`` are not supported.
+        Blocks are loaded in the background, up to ``prefetch`` blocks ahead of the one being processed, so
+        reading overlaps with processing while peak memory stays bounded by the block size. E.g.::
+
+            for block in dc.load_iter(product='ls5_nbar_albers', x=(148.15, 148.2), y=(-35.15, -35.2),
+                                      chunks={'time': 10, 'x': 2000, 'y': 2000}):
+                process(block)
+
+        :param dict chunks:
+            The size of each block in each output dimension. Dimensions that are not given default to one
+            time slice, and the whole extent in the spatial dimensions. ie. by default one time slice is
+            loaded at a time.
+
+        :param int prefetch:
+            Number of blocks to load ahead of the block being processed. 0 loads each block only when asked for.
+
+            Default is 1.
+
+        :return: Generator of :class:`xarray.Dataset`, or :class:`xarray.DataArray` if ``stack`` is supplied.
+            Blocks are in time order, then in row-major order of spatial blocks within each time block.
+
+        .. seealso:: :meth:`load`
+        """
+        inputs = self._prepare_load(product, measurements, output_crs, resolution, resampling, like, align,
+                                    datasets, query)
+        if inputs is None:
+            return
+        grouped, geobox, measurements = inputs
+
+        chunks = dict(chunks or {})
+        for dim in grouped.dims:
+            chunks.setdefault(dim, 1)
+        irr_chunks, grid_chunks = _calculate_chunk_sizes(grouped, geobox, chunks)
+
+        blocks = ((irr_slices, geobox[grid_slices])
+                  for irr_slices in _chunk_slices(grouped.shape, irr_chunks).values()
+                  for grid_slices in _chunk_slices(geobox.shape, grid_chunks).values())
+
+        def load_block(block):
+            irr_slices, block_geobox = block
+            result = self.load_data(grouped[tuple(irr_slices)], block_geobox, measurements.values(),
+                                    fuse_func=fuse_func, use_threads=use_threads,
+                                    driver_manager=self.driver_manager)
+            return _stack_result(result, stack)
+
+        # A single worker loads blocks in order, ahead of the caller
+        pool = ThreadPool(1)
+        try:
+            pending = deque()
+            for block in blocks:
+                pending.append(pool.apply_async(load_block, (block,)))
+                if len(pending) > prefetch:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+        finally:
+            pool.terminate()
+
+    def load_reduce(self, product=None, measurements=None, reducer='mean', output_crs=None, resolution=None,
+                    resampling=None, like=None, fuse_func=None, align=None, datasets=None, use_threads=True,
+                    prefetch=1, **query):
+        """
+        Load data reduced over time, without ever holding more than a few time slices in memory.
+
+        Each time slice is folded into running per-pixel accumulators as soon as it has been read, so memory use
+        scales with the spatial size of the output rather than the number of time slices. E.g.::
+
+            median = dc.load_reduce(product='ls5_nbar_albers', x=(148.15, 148.2), y=(-35.15, -35.2),
+                                    time=('1990', '1991'), group_by='solar_day', reducer='median-approx')
+
+        Takes the same arguments as :meth:`load_iter`, except for ``stack`` and ``chunks``.
+
+        :param reducer:
+            How to reduce the valid (not `nodata`) observations of each pixel. One of:
+
+            - ``'mean'``, as `float64`
+            - ``'min'`` or ``'max'``, keeping the measurement dtype
+            - ``'count'``, the number of valid observations
+            - ``'median-approx'``, an approximation of the median, as `float64`. It is exact for pixels with
+              up to five observations.
+            - a function ``reducer(accumulated, time_slice)`` returning the :class:`xarray.Dataset` ``time_slice``
+              folded into ``accumulated``, which is None for the first time slice. `nodata` is left to the function.
+
+            Pixels without any valid observation are `NaN` for floating point results, or `nodata` otherwise.
+
+            Default is ``'mean'``.
+
+        :return: Reduced data, without the time dimension.
+        :rtype: :class:`xarray.Dataset`
+
+        .. seealso:: :meth:`load_iter` :data:`datacube.api.reducers.REDUCERS`
+        """
+        if not callable(reducer) and reducer not in REDUCERS:
+            raise ValueError('Unknown reducer {!r}. Valid reducers are: {}'.format(reducer, sorted(REDUCERS)))
+
+        blocks = self.load_iter(product=product, measurements=measurements, output_crs=output_crs,
+                                resolution=resolution, resampling=resampling, like=like, fuse_func=fuse_func,
+                                align=align, datasets=datasets, use_threads=use_threads, prefetch=prefetch, **query)
+        return reduce_datasets(blocks, reducer)
+
+    def load_points(self, product=None, points=None, measurements=None, crs='EPSG:4326', datasets=None,
+                    use_threads=True, **query):
+        """
+        Load the values of the pixels containing some points, through time. Only those pixels are read from each
+        dataset, instead of whole tiles. E.g.::
+
+            drill = dc.load_points(product='ls5_nbar_albers', points=[(148.15, -35.15), (148.2, -35.2)],
+                                   time=('1990', '2010'), group_by='solar_day')
+
+        Values are in the native resolution and projection of the data. Where several datasets of a time slice
+        cover a point, the first one with data for it is used.
+
+        :param str product: the product to be included.
+
+        :param points: (x, y) coordinates of the points
+        :type points: list[(float, float)]
+
+        :param measurements: measurements name or list of names to be included, as listed in :meth:`list_measurements`.
+            If a list is specified, the measurements will be returned in the order requested.
+            By default all available measurements are included.
+
+        :param str crs: The coordinate reference system of `points`. Default is ``'EPSG:4326'``,
+            ie. `points` are (longitude, latitude).
+
+        :param datasets:
+            Optional. If this is a non-empty list of :class:`datacube.model.Dataset` objects, these will be read
+            instead of performing a database lookup.
+
+        :param use_threads:
+            Optional. Number of datasets to read at the same time, see :meth:`load_data`.
+
+            Default is True.
+
+        :param query: Search parameters for products and dimension ranges as described in :meth:`load`, other than
+            the spatial ones.
+
+        :return: Requested data with dimensions (time, point), and `x` and `y` coordinates for each point.
+        :rtype: :class:`xarray.Dataset`
+        """
+        crs = geometry.CRS(crs)
+        points = [geometry.point(x, y, crs) for x, y in points or []]
+        if not points:
+            raise ValueError("Must specify some 'points'")
+
+        observations = datasets or self.find_datasets(product=product,
+                                                      geopolygon=geometry.multipoint([point.coords[0]
+                                                                                      for point in points], crs),
+                                                      **query)
+        if not observations:
+            return xarray.Dataset()
+
+        grouped = self.group_datasets(observations, query_group_by(**query))
+        measurements = self.index.products.get_by_name(product).lookup_measurements(measurements)
+
+        arrays = _read_points_into(grouped, points, measurements.values(), driver_manager=self.driver_manager,
+                                   num_threads=_num_load_threads(use_threads))
+
+        return _points_dataset(grouped, points, crs, measurements.values(), arrays)
+
+    def _prepare_load(self, product, measurements, output_crs, resolution, resampling, like, align, datasets,
+                      query):
+        """
+        Find and group the datasets, and work out the output geobox and measurements, for :meth:`load`.
+
+        :return: (grouped datasets, geobox, measurements), or None if no datasets were found
         """
         observations = datasets or self.find_datasets(product=product, like=like, **query)
         if not observations:
-            return None if stack else xarray.Dataset()
+            return None
 
         if like:
             assert output_crs is None, "'like' and 'output_crs' are not supported together"
@@ -383,15 +591,7 @@ class Datacube(object):
         measurements = self.index.products.get_by_name(product).lookup_measurements(measurements)
         measurements = set_resampling_method(measurements, resampling)
 
-        result = self.load_data(grouped, geobox, measurements.values(),
-                                fuse_func=fuse_func, dask_chunks=dask_chunks, use_threads=use_threads,
-                                driver_manager=self.driver_manager)
-        if not stack:
-            return result
-        else:
-            if not isinstance(stack, string_types):
-                stack = 'measurement'
-            return result.to_array(dim=stack)
+        return grouped, geobox, measurements
 
     def product_observations(self, **kwargs):
         warnings.warn("product_observations() has been renamed to find_datasets() and will eventually be removed",
@@ -429,10 +629,15 @@ class Datacube(object):
                                               **query.search_terms)
 
         polygon = query.geopolygon
+        # The query polygon reprojected to each dataset CRS, as most datasets share a few CRSs
+        polygons_by_crs = {}
         for dataset in datasets:
             if polygon:
+                crs = dataset.crs
+                if crs.crs_str not in polygons_by_crs:
+                    polygons_by_crs[crs.crs_str] = polygon.to_crs(crs)
                 # Check against the bounding box of the original scene, can throw away some portions
-                if intersects(polygon.to_crs(dataset.crs), dataset.extent):
+                if intersects(polygons_by_crs[crs.crs_str], dataset.extent):
                     yield dataset
             else:
                 yield dataset
@@ -454,18 +659,30 @@ class Datacube(object):
             - name of the new dimension
             - unit for the new dimension
             - function to sort by before grouping
+            - optionally, a function returning arrays of the sort keys and labels of all the datasets at once,
+              used instead of the two functions above
         :rtype: xarray.DataArray
 
         .. seealso:: :meth:`find_datasets`, :meth:`load_data`, :meth:`query_group_by`
         """
-        dimension, group_func, units, sort_key = group_by
-        datasets.sort(key=sort_key)
-        groups = [Group(key, tuple(group)) for key, group in groupby(datasets, group_func)]
-
-        data = numpy.empty(len(groups), dtype=object)
-        for index, group in enumerate(groups):
-            data[index] = group.datasets
-        coords = [sort_key(v.datasets[0]) for v in groups]
+        dimension, group_func, units, sort_key = group_by[:4]
+        datasets = list(datasets)
+        if getattr(group_by, 'group_keys', None) is not None and datasets:
+            sort_keys, labels = group_by.group_keys(datasets)
+        else:
+            sort_keys = _object_array([sort_key(dataset) for dataset in datasets])
+            labels = _object_array([group_func(dataset) for dataset in datasets])
+
+        # A stable sort keeps datasets with equal sort keys in their search order, as list.sort() did
+        order = numpy.argsort(sort_keys, kind='mergesort')
+        labels = labels[order]
+        starts = numpy.flatnonzero(numpy.concatenate([[True], labels[1:] != labels[:-1]])) if datasets else order
+        stops = numpy.append(starts[1:], len(order))
+
+        data = numpy.empty(len(starts), dtype=object)
+        for index, (start, stop) in enumerate(zip(starts, stops)):
+            data[index] = tuple(datasets[i] for i in order[start:stop])
+        coords = sort_keys[order[starts]]
         sources = xarray.DataArray(data, dims=[dimension], coords=[coords])
         sources[dimension].attrs['units'] = units
         return sources
@@ -491,12 +708,14 @@ class Datacube(object):
             function to fill the storage with data. It is called once for each measurement, with the measurement
             as an argument. It should return an appropriately shaped numpy array.
 
-        :param bool use_threads:
-            Optional. If this is set to True, IO will be multi-thread.
-            May not work for all drivers due to locking/GIL.
+        :param use_threads:
+            Optional. If True, or a number of worker threads, `data_func` is called for the measurements
+            concurrently. May not work for all drivers due to locking/GIL.
 
             Default is False.
 
+        :type use_threads: bool or int
+
         :rtype: :class:`xarray.Dataset`
 
         .. seealso:: :meth:`find_datasets` :meth:`group_datasets`
@@ -514,15 +733,12 @@ class Datacube(object):
         for name, coord in geobox.coordinates.items():
             result[name] = (name, coord.values, {'units': coord.units})
 
-        def work_measurements(measurement, data_func):
-            return data_func(measurement)
-
-        if use_threads and ('SharedArray' not in sys.modules or 'pathos.threading' not in sys.modules):
-            use_threads = False
-
         if use_threads:
-            pool = ThreadPool(32)
-            results = pool.map(work_measurements, measurements, repeat(data_func))
+            pool = ThreadPool(_num_load_threads(use_threads))
+            try:
+                results = pool.map(data_func, measurements)
+            finally:
+                pool.terminate()
         else:
             results = [data_func(a) for a in measurements]
 
@@ -552,7 +768,7 @@ class Datacube(object):
 
     @staticmethod
     def load_data(sources, geobox, measurements, fuse_func=None, dask_chunks=None, skip_broken_datasets=False,
-                  use_threads=False, driver_manager=None):
+                  use_threads=True, driver_manager=None, dask_multiband=False, out=None, mask=None):
         """
         Load data from :meth:`group_datasets` into an :class:`xarray.Dataset`.
 
@@ -575,17 +791,40 @@ class Datacube(object):
             See the documentation on using `xarray with dask <http://xarray.pydata.org/en/stable/dask.html>`_
             for more information.
 
-        :param bool use_threads:
-            Optional. If this is set to True, IO will be multi-thread.
-            May not work for all drivers due to locking/GIL.
+        :param bool dask_multiband:
+            Optional. Only used with ``dask_chunks``. If True, each time slice and chunk is a single task reading
+            all measurements together, instead of one task per measurement. This cuts scheduler overhead and
+            duplicate reads of the same files.
 
             Default is False.
 
+        :param use_threads:
+            Optional. If True, IO is spread over a pool of ``load_threads`` worker threads
+            (see :class:`datacube.set_options`), one task per time slice, source and file.
+            Each source is read into the output array in place, and sources are fused in their group order.
+            An integer sets the number of worker threads directly. False reads one file at a time.
+            Ignored when ``dask_chunks`` is supplied.
+
+            Default is True.
+
+        :type use_threads: bool or int
+
         :param DriverManager driver_manager: The driver manager to
           use. If not specified, an new manager will be created using
           the index if specified, or the default configuration
           otherwise.
 
+        :param dict out:
+            Optional. Mapping of measurement name to a preallocated output array, which is filled in place
+            and used as the data of the returned variable. Can be a :class:`numpy.ndarray`, a :class:`numpy.memmap`,
+            or any writable buffer, and must match the output shape and the measurement dtype.
+            Arrays are allocated as usual for measurements not in the mapping.
+            Not supported with ``dask_chunks``.
+
+        :param numpy.ndarray mask:
+            Optional. Boolean array of ``geobox.shape``, True for the pixels to load. Pixels outside the mask are
+            nodata, and datasets or dask chunks that only cover pixels outside it are not read.
+
         :rtype: xarray.Dataset
 
         .. seealso:: :meth:`find_datasets` :meth:`group_datasets`
@@ -593,40 +832,31 @@ class Datacube(object):
         if driver_manager is None:
             driver_manager = DriverManager()
 
-        if use_threads and ('SharedArray' not in sys.modules or 'pathos.threading' not in sys.modules):
-            use_threads = False
+        if out and dask_chunks is not None:
+            raise ValueError("'out' is not supported together with 'dask_chunks'")
 
         if dask_chunks is None:
+            arrays = OrderedDict((measurement['name'], _output_array(out, measurement, sources.shape + geobox.shape))
+                                 for measurement in measurements)
+            _fill_arrays(arrays, sources, geobox, measurements, fuse_func=fuse_func,
+                         skip_broken_datasets=skip_broken_datasets, driver_manager=driver_manager,
+                         num_threads=_num_load_threads(use_threads), mask=mask)
+
             def data_func(measurement):
-                if not use_threads:
-                    data = numpy.full(sources.shape + geobox.shape, measurement['nodata'], dtype=measurement['dtype'])
-                    for index, datasets in numpy.ndenumerate(sources.values):
-                        _fuse_measurement(data[index], datasets, geobox, measurement, fuse_func=fuse_func,
-                                          skip_broken_datasets=skip_broken_datasets,
-                                          driver_manager=driver_manager)
-                else:
-                    def work_load_data(array_name, index, datasets):
-                        data = sa.attach(array_name)
-                        _fuse_measurement(data[index], datasets, geobox, measurement, fuse_func=fuse_func,
-                                          skip_broken_datasets=skip_broken_datasets,
-                                          driver_manager=driver_manager)
-
-                    array_name = '_'.join(['DCCORE', str(uuid.uuid4()), str(os.getpid())])
-                    sa.create(array_name, shape=sources.shape + geobox.shape, dtype=measurement['dtype'])
-                    data = sa.attach(array_name)
-                    data[:] = measurement['nodata']
-
-                    pool = ThreadPool(32)
-                    pool.map(work_load_data, repeat(array_name), *zip(*numpy.ndenumerate(sources.values)))
-                    sa.delete(array_name)
-                return data
+                return arrays[measurement['name']]
+        elif dask_multiband:
+            arrays = _make_dask_arrays(sources, geobox, measurements, fuse_func, dask_chunks,
+                                       driver_manager=driver_manager, mask=mask)
+
+            def data_func(measurement):
+                return arrays[measurement['name']]
         else:
             def data_func(measurement):
                 return _make_dask_array(sources, geobox, measurement, fuse_func, dask_chunks,
-                                        driver_manager=driver_manager)
+                                        driver_manager=driver_manager, mask=mask)
 
         return Datacube.create_storage(OrderedDict((dim, sources.coords[dim]) for dim in sources.dims),
-                                       geobox, measurements, data_func, use_threads)
+                                       geobox, measurements, data_func)
 
     @staticmethod
     def measurement_data(sources, geobox, measurement, fuse_func=None, dask_chunks=None,
@@ -675,30 +905,38 @@ class Datacube(object):
         self.close()
 
 
-def fuse_lazy(datasets, geobox, measurement, fuse_func=None, prepend_dims=0, driver_manager=None):
-    prepend_shape = (1,) * prepend_dims
-    data = numpy.full(geobox.shape, measurement['nodata'], dtype=measurement['dtype'])
-    _fuse_measurement(data, datasets, geobox, measurement, fuse_func=fuse_func, driver_manager=driver_manager)
-    return data.reshape(prepend_shape + geobox.shape)
+def _object_array(values):
+    """
+    1-D object array of `values`, even if they are sequences themselves.
+    """
+    array = numpy.empty(len(values), dtype=object)
+    for index, value in enumerate(values):
+        array[index] = value
+    return array
+
+
+def _stack_result(result, stack):
+    if not stack:
+        return result
+    if not isinstance(stack, string_types):
+        stack = 'measurement'
+    return result.to_array(dim=stack)
 
 
-def _fuse_measurement(dest, datasets, geobox, measurement, skip_broken_datasets=False,
-                      fuse_func=None, driver_manager=None):
-    reproject_and_fuse([driver_manager.get_datasource(dataset, measurement['name']) for dataset in datasets],
-                       dest,
-                       geobox.affine,
-                       geobox.crs,
-                       dest.dtype.type(measurement['nodata']),
-                       resampling=measurement.get('resampling_method', 'nearest'),
-                       fuse_func=fuse_func,
-                       skip_broken_datasets=skip_broken_datasets)
+def _num_load_threads(use_threads):
+    if use_threads is True:
+        return OPTIONS['load_threads']
+    if not use_threads:
+        return 1
+    return int(use_threads)
 
 
 def get_bounds(datasets, crs):
-    left = min([d.extent.to_crs(crs).boundingbox.left for d in datasets])
-    right = max([d.extent.to_crs(crs).boundingbox.right for d in datasets])
-    top = max([d.extent.to_crs(crs).boundingbox.top for d in datasets])
-    bottom = min([d.extent.to_crs(crs).boundingbox.bottom for d in datasets])
+    bounds = bounding_boxes([d.extent for d in datasets], crs)
+    left = min(bbox.left for bbox in bounds)
+    right = max(bbox.right for bbox in bounds)
+    top = max(bbox.top for bbox in bounds)
+    bottom = min(bbox.bottom for bbox in bounds)
     return geometry.box(left, bottom, right, top, crs=crs)
 
 
@@ -731,58 +969,3 @@ def datatset_type_to_row(dt):
             'resolution': dt.grid_spec.resolution,
         })
     return row
-
-
-def _chunk_geobox(geobox, chunk_size):
-    num_grid_chunks = [int(ceil(s / float(c))) for s, c in zip(geobox.shape, chunk_size)]
-    geobox_subsets = {}
-    for grid_index in numpy.ndindex(*num_grid_chunks):
-        slices = [slice(min(d * c, stop), min((d + 1) * c, stop))
-                  for d, c, stop in zip(grid_index, chunk_size, geobox.shape)]
-        geobox_subsets[grid_index] = geobox[slices]
-    return geobox_subsets
-
-
-def _calculate_chunk_sizes(sources, geobox, dask_chunks):
-    valid_keys = sources.dims + geobox.dimensions
-    bad_keys = set(dask_chunks) - set(valid_keys)
-    if bad_keys:
-        raise KeyError('Unknown dask_chunk dimension {}. Valid dimensions are: {}'.format(bad_keys, valid_keys))
-
-    # If chunk size is not specified, the entire dimension length is used, as in xarray
-    chunks = {dim: size for dim, size in zip(sources.dims, sources.shape)}
-    chunks.update({dim: size for dim, size in zip(geobox.dimensions, geobox.shape)})
-
-    chunks.update(dask_chunks)
-
-    irr_chunks = tuple(chunks[dim] for dim in sources.dims)
-    grid_chunks = tuple(chunks[dim] for dim in geobox.dimensions)
-
-    return irr_chunks, grid_chunks
-
-
-# pylint: disable=too-many-locals
-def _make_dask_array(sources, geobox, measurement, fuse_func=None, dask_chunks=None,
-                     driver_manager=None):
-    dsk_name = 'datacube_' + measurement['name']
-
-    irr_chunks, grid_chunks = _calculate_chunk_sizes(sources, geobox, dask_chunks)
-    sliced_irr_chunks = (1,) * sources.ndim
-
-    dsk = {}
-    geobox_subsets = _chunk_geobox(geobox, grid_chunks)
-
-    for irr_index, datasets in numpy.ndenumerate(sources.values):
-        for grid_index, subset_geobox in geobox_subsets.items():
-            dsk[(dsk_name,) + irr_index + grid_index] = (fuse_lazy,
-                                                         datasets, subset_geobox, measurement,
-                                                         fuse_func, sources.ndim, driver_manager)
-
-    data = da.Array(dsk, dsk_name,
-                    chunks=(sliced_irr_chunks + grid_chunks),
-                    dtype=measurement['dtype'],
-                    shape=(sources.shape + geobox.shape))
-
-    if irr_chunks != sliced_irr_chunks:
-        data = data.rechunk(chunks=(irr_chunks + grid_chunks))
-    return data
@@ -342,7 +342,7 @@ class GridWorkflow(object):
 
     @staticmethod
     def load(tile, measurements=None, dask_chunks=None, fuse_func=None, resampling=None,
-             skip_broken_datasets=False, driver_manager=None):
+             skip_broken_datasets=False, driver_manager=None, dask_multiband=False):
         """
         Load data for a cell/tile.
 
@@ -378,6 +378,9 @@ class GridWorkflow(object):
           the index if specified, or the default configuration
           otherwise.
 
+        :param bool dask_multiband: Only used with ``dask_chunks``. If True, read all measurements of a chunk
+            in a single task rather than one task per measurement. See :meth:`.Datacube.load_data`.
+
         :rtype: :py:class:`xarray.Dataset`
 
         .. seealso::
@@ -392,7 +395,7 @@ class GridWorkflow(object):
 
         dataset = Datacube.load_data(tile.sources, tile.geobox, measurements.values(), dask_chunks=dask_chunks,
                                      fuse_func=fuse_func, skip_broken_datasets=skip_broken_datasets,
-                                     driver_manager=driver_manager)
+                                     driver_manager=driver_manager, dask_multiband=dask_multiband)
 
         return dataset
 
@@ -29,11 +29,15 @@ import numpy as np
 from ..compat import string_types, integer_types
 from ..model import Range
 from ..utils import geometry, datetime_to_seconds_since_1970
+from ..utils.footprints import bounding_boxes
 
 _LOG = logging.getLogger(__name__)
 
 
-GroupBy = collections.namedtuple('GroupBy', ['dimension', 'group_by_func', 'units', 'sort_key'])
+GroupBy = collections.namedtuple('GroupBy', ['dimension', 'group_by_func', 'units', 'sort_key', 'group_keys'])
+# `group_keys` is optional: a function of a list of datasets returning arrays of their sort keys and group labels,
+# to group many datasets at once instead of calling `sort_key` and `group_by_func` on each one
+GroupBy.__new__.__defaults__ = (None,)
 
 FLOAT_TOLERANCE = 0.0000001  # TODO: For DB query, use some sort of 'contains' query, rather than range overlap.
 SPATIAL_KEYS = ('latitude', 'lat', 'y', 'longitude', 'lon', 'long', 'x')
@@ -181,12 +185,14 @@ def query_group_by(group_by='time', **kwargs):
     time_grouper = GroupBy(dimension='time',
                            group_by_func=lambda ds: ds.center_time,
                            units='seconds since 1970-01-01 00:00:00',
-                           sort_key=lambda ds: ds.center_time)
+                           sort_key=lambda ds: ds.center_time,
+                           group_keys=_time_group_keys)
 
     solar_day_grouper = GroupBy(dimension='time',
                                 group_by_func=solar_day,
                                 units='seconds since 1970-01-01 00:00:00',
-                                sort_key=lambda ds: ds.center_time)
+                                sort_key=lambda ds: ds.center_time,
+                                group_keys=_solar_day_group_keys)
 
     group_by_map = {
         None: time_grouper,
@@ -323,3 +329,36 @@ def solar_day(dataset):
     longitude = (bb.left + bb.right) * 0.5
     solar_time = _convert_to_solar_time(utc, longitude)
     return np.datetime64(solar_time.date(), 'D')
+
+
+def _center_times(datasets):
+    """
+    :return: `center_time` of each dataset, as a datetime64[ns] array in UTC
+    """
+    return pandas_to_datetime([dataset.center_time for dataset in datasets], utc=True).values
+
+
+def _mean_longitudes(datasets):
+    """
+    Longitude in the middle of each dataset's footprint, as :func:`solar_day` works it out.
+
+    The footprints of all datasets in the same CRS are reprojected to WGS84 together, segmentized the same way
+    :func:`solar_day` segmentizes each of them. See :func:`datacube.utils.footprints.bounding_boxes`.
+
+    :return: numpy array of longitudes
+    """
+    boxes = np.array(bounding_boxes([dataset.extent for dataset in datasets], geometry.CRS('WGS84')),
+                     dtype='float64').reshape(-1, 4)
+    return (boxes[:, 0] + boxes[:, 2]) * 0.5
+
+
+def _time_group_keys(datasets):
+    times = _center_times(datasets)
+    return times, times
+
+
+def _solar_day_group_keys(datasets):
+    times = _center_times(datasets)
+    # Truncated towards zero, as in _convert_to_solar_time
+    offsets = (_mean_longitudes(datasets) * 240).astype('int64').astype('timedelta64[s]')
+    return times, (times + offsets).astype('datetime64[D]')
@@ -0,0 +1,282 @@
+# coding=utf-8
+"""
+Streaming reductions over the time dimension, used by :meth:`datacube.Datacube.load_reduce`.
+
+Each reduction keeps running per-pixel accumulators and folds in one time slice at a time, so memory use scales with
+the spatial size of the data, not with the number of time slices.
+"""
+from __future__ import absolute_import, division
+
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+
+import numpy
+import xarray
+from six import add_metaclass
+
+
+def _valid_mask(data, nodata):
+    """
+    :return: boolean array, True where `data` holds a valid observation
+    """
+    if data.dtype.kind == 'f':
+        valid = ~numpy.isnan(data)
+        if nodata is not None and not numpy.isnan(nodata):
+            valid &= data != nodata
+        return valid
+    if nodata is None:
+        return numpy.ones(data.shape, dtype=numpy.bool_)
+    return data != nodata
+
+
+@add_metaclass(ABCMeta)
+class Accumulator(object):
+    """
+    Running reduction of the valid observations of one variable.
+    """
+    def __init__(self, shape, dtype, nodata):
+        """
+        :param tuple shape: spatial shape of each time slice
+        :param numpy.dtype dtype: data type of the input
+        :param nodata: nodata value of the input, or None
+        """
+        self.shape = shape
+        self.dtype = numpy.dtype(dtype)
+        self.nodata = nodata
+
+    @abstractmethod
+    def add(self, data, valid):
+        """
+        Fold in a time slice.
+
+        :param numpy.ndarray data: slice of data
+        :param numpy.ndarray valid: boolean mask of the valid observations in `data`
+        """
+
+    @abstractmethod
+    def result(self):
+        """
+        :return: (reduced array, its nodata value)
+        """
+
+
+class CountAccumulator(Accumulator):
+    """Number of valid observations"""
+    def __init__(self, shape, dtype, nodata):
+        super(CountAccumulator, self).__init__(shape, dtype, nodata)
+        self.count = numpy.zeros(shape, dtype='int32')
+
+    def add(self, data, valid):
+        self.count += valid
+
+    def result(self):
+        return self.count, None
+
+
+class MeanAccumulator(Accumulator):
+    """Mean of the valid observations, as float64, NaN where there are none"""
+    def __init__(self, shape, dtype, nodata):
+        super(MeanAccumulator, self).__init__(shape, dtype, nodata)
+        self.total = numpy.zeros(shape, dtype='float64')
+        self.count = numpy.zeros(shape, dtype='int32')
+
+    def add(self, data, valid):
+        numpy.add(self.total, data, out=self.total, where=valid)
+        self.count += valid
+
+    def result(self):
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            mean = self.total / self.count
+        mean[self.count == 0] = numpy.nan
+        return mean, numpy.nan
+
+
+class _ExtremeAccumulator(Accumulator):
+    """Pick one valid observation per pixel using `choose`, keeping the input dtype and nodata"""
+    def __init__(self, shape, dtype, nodata):
+        super(_ExtremeAccumulator, self).__init__(shape, dtype, nodata)
+        self.value = numpy.empty(shape, dtype=self.dtype)
+        self.seen = numpy.zeros(shape, dtype=numpy.bool_)
+
+    def add(self, data, valid):
+        numpy.copyto(self.value, self.choose(self.value, data), where=valid & self.seen)
+        numpy.copyto(self.value, data, where=valid & ~self.seen)
+        self.seen |= valid
+
+    @abstractmethod
+    def choose(self, current, data):
+        """
+        :return: per-pixel choice between the current values and a new slice
+        """
+
+    def result(self):
+        nodata = self.nodata
+        if nodata is None and self.dtype.kind == 'f':
+            nodata = numpy.nan
+        if nodata is not None:
+            self.value[~self.seen] = nodata
+        return self.value, nodata
+
+
+class MinAccumulator(_ExtremeAccumulator):
+    """Smallest valid observation"""
+    def choose(self, current, data):
+        return numpy.minimum(current, data)
+
+
+class MaxAccumulator(_ExtremeAccumulator):
+    """Largest valid observation"""
+    def choose(self, current, data):
+        return numpy.maximum(current, data)
+
+
+class MedianApproxAccumulator(Accumulator):
+    """
+    Approximate median of the valid observations, as float64, NaN where there are none.
+
+    Uses the P-squared algorithm (Jain & Chlamtac, 1985), which tracks five markers per pixel instead of keeping
+    every observation. The median is exact for up to five observations.
+    """
+    #: Increments of the desired marker positions for each new observation, for the median
+    _DESIRED_STEP = numpy.array([0, 0.25, 0.5, 0.75, 1])
+
+    def __init__(self, shape, dtype, nodata):
+        super(MedianApproxAccumulator, self).__init__(shape, dtype, nodata)
+        self.count = numpy.zeros(shape, dtype='int32')
+        # Marker heights, and the first five observations until there are enough to start
+        self.heights = numpy.empty((5,) + tuple(shape), dtype='float64')
+        self.positions = numpy.empty((5,) + tuple(shape), dtype='float64')
+
+    def add(self, data, valid):
+        starting = valid & (self.count < 5)
+        if starting.any():
+            self.heights[(self.count[starting],) + numpy.nonzero(starting)] = data[starting]
+            started = starting & (self.count == 4)
+            if started.any():
+                self.heights[:, started] = numpy.sort(self.heights[:, started], axis=0)
+                self.positions[:, started] = numpy.arange(1, 6)[:, None]
+
+        updating = valid & (self.count >= 5)
+        if updating.any():
+            heights, positions = self._update(self.heights[:, updating], self.positions[:, updating],
+                                              data[updating].astype('float64'), self.count[updating] + 1)
+            self.heights[:, updating] = heights
+            self.positions[:, updating] = positions
+
+        self.count += valid
+
+    def _update(self, q, n, x, count):
+        """
+        Add observations `x` to the markers of the pixels they belong to.
+
+        :param q: (5, pixels) marker heights
+        :param n: (5, pixels) marker positions
+        :param x: (pixels,) new observations
+        :param count: (pixels,) number of observations including `x`
+        """
+        numpy.minimum(q[0], x, out=q[0])
+        numpy.maximum(q[4], x, out=q[4])
+        cell = (x[None, :] >= q[1:4]).sum(axis=0)
+        n += numpy.arange(5)[:, None] > cell
+
+        desired = 1 + (count - 1) * self._DESIRED_STEP[:, None]
+        for i in (1, 2, 3):
+            offset = desired[i] - n[i]
+            adjust = (((offset >= 1) & (n[i + 1] - n[i] > 1)) |
+                      ((offset <= -1) & (n[i - 1] - n[i] < -1)))
+            if not adjust.any():
+                continue
+            step = numpy.sign(offset[adjust])
+            qa, na = q[:, adjust], n[:, adjust]
+            qa[i] = self._moved_height(qa, na, i, step)
+            na[i] += step
+            q[:, adjust], n[:, adjust] = qa, na
+        return q, n
+
+    @staticmethod
+    def _moved_height(q, n, i, step):
+        """
+        New height of marker `i` after moving it by `step`: the piecewise-parabolic prediction, or the linear one
+        where the parabola would take it past a neighbouring marker.
+        """
+        parabolic = q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+        neighbour = numpy.where(step > 0, i + 1, i - 1)
+        columns = numpy.arange(q.shape[1])
+        linear = q[i] + step * (q[neighbour, columns] - q[i]) / (n[neighbour, columns] - n[i])
+
+        in_order = (q[i - 1] < parabolic) & (parabolic < q[i + 1])
+        return numpy.where(in_order, parabolic, linear)
+
+    def result(self):
+        median = self.heights[2].copy()
+
+        few = (self.count > 0) & (self.count < 5)
+        if few.any():
+            first = self.heights[:, few]
+            first[numpy.arange(5)[:, None] >= self.count[few]] = numpy.nan
+            median[few] = numpy.nanmedian(first, axis=0)
+
+        median[self.count == 0] = numpy.nan
+        return median, numpy.nan
+
+
+#: Reductions available by name to :func:`reduce_datasets`
+REDUCERS = {
+    'count': CountAccumulator,
+    'mean': MeanAccumulator,
+    'min': MinAccumulator,
+    'max': MaxAccumulator,
+    'median-approx': MedianApproxAccumulator,
+}
+
+
+def reduce_datasets(datasets, reducer, dim='time'):
+    """
+    Reduce loaded data along `dim`, folding in one slice at a time.
+
+    :param datasets: iterable of :class:`xarray.Dataset` blocks covering the same area, eg. from
+        :meth:`datacube.Datacube.load_iter`
+    :param reducer: name of a reduction in :data:`REDUCERS`, or a function ``reducer(accumulated, dataset)``
+        returning the fold of a slice ``dataset`` into ``accumulated``, which is None for the first slice
+    :param str dim: dimension to reduce
+    :rtype: xarray.Dataset
+    """
+    if callable(reducer):
+        result = None
+        for dataset in datasets:
+            for index in range(dataset[dim].size):
+                result = reducer(result, dataset.isel(**{dim: index}))
+        return xarray.Dataset() if result is None else result
+
+    if reducer not in REDUCERS:
+        raise ValueError('Unknown reducer {!r}. Valid reducers are: {}'.format(reducer, sorted(REDUCERS)))
+
+    template = None
+    accumulators = OrderedDict()
+    for dataset in datasets:
+        for index in range(dataset[dim].size):
+            time_slice = dataset.isel(**{dim: index})
+            if template is None:
+                template = time_slice
+                for name, variable in time_slice.data_vars.items():
+                    accumulators[name] = REDUCERS[reducer](variable.shape, variable.dtype,
+                                                           variable.attrs.get('nodata'))
+
+            for name, accumulator in accumulators.items():
+                data = time_slice[name].values
+                accumulator.add(data, _valid_mask(data, accumulator.nodata))
+
+    if template is None:
+        return xarray.Dataset()
+
+    result = xarray.Dataset(coords={name: (coord.dims, coord.values, coord.attrs)
+                                    for name, coord in template.coords.items() if name != dim},
+                            attrs=template.attrs)
+    for name, accumulator in accumulators.items():
+        data, nodata = accumulator.result()
+        variable = template[name]
+        attrs = dict(variable.attrs, nodata=nodata)
+        result[name] = (variable.dims, data, attrs)
+    return result
@@ -30,6 +30,8 @@ db_hostname:
 db_database: datacube
 # If a connection is unused for this length of time, expect it to be invalidated.
 db_connection_timeout: 60
+# Dataset searches are streamed from the database this many rows at a time. 0 reads all results at once.
+db_fetch_size: 1000
 # Which driver to activate by default in this environment (eg. "NetCDF CF", 's3')
 default_driver: NetCDF CF
 
@@ -115,6 +117,10 @@ class LocalConfig(object):
     def db_connection_timeout(self):
         return int(self._environment_prop('db_connection_timeout'))
 
+    @property
+    def db_fetch_size(self):
+        return int(self._environment_prop('db_fetch_size'))
+
     @property
     def db_username(self):
         try:
@@ -155,7 +161,9 @@ class LocalConfig(object):
         return self.__str__()
 
 
-OPTIONS = {'reproject_threads': 4}
+OPTIONS = {'reproject_threads': 4, 'load_threads': 8,
+           'handle_cache_size': 64, 'handle_cache_idle_timeout': 60, 'handle_cache_check_interval': 0,
+           'document_cache_dir': None, 'document_cache_max_age': 30 * 24 * 60 * 60}
 
 
 #: pylint: disable=invalid-name
@@ -164,6 +172,15 @@ class set_options(object):
 
     Currently, the only supported options are:
     * reproject_threads: The number of threads to use when reprojecting
+    * load_threads: The number of threads used to read files concurrently when loading into memory
+    * handle_cache_size: The maximum number of idle open file handles kept for reuse (0 disables reuse)
+    * handle_cache_idle_timeout: Seconds after which an unused cached file handle is closed
+    * handle_cache_check_interval: Seconds between checks that a file with cached handles hasn't changed on disk
+      (0 checks every time it is opened)
+    * document_cache_dir: Directory to cache parsed dataset documents in, or None to parse them every time they
+      are read. Cached documents are pickled, so nobody untrusted should be able to write to it.
+    * document_cache_max_age: Seconds after which cached documents are removed from the cache, the next time a
+      process writes to it
 
     You can use ``set_options`` either as a context manager::
 
@@ -25,3 +25,11 @@ class DataSource(object):
     @abstractmethod
     def get_crs(self):
         return None
+
+    def get_extent(self):
+        """The footprint of the data, used to avoid opening sources that can't be needed.
+
+        :return: The footprint, or None if it is unknown.
+        :rtype: datacube.utils.geometry.Geometry
+        """
+        return None
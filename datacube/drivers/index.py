@@ -32,6 +32,20 @@ class IndexExtension(object):
         """
         pass
 
+    def add_specifics_many(self, datasets):
+        """Extend the docs of several datasets with driver specific
+        index data.
+
+        The datasets are modified in place. Drivers that query the
+        database for their data should override this method to fetch
+        it for all the datasets at once.
+
+        :param list datasets: The :cls:`datacube.model.Dataset`
+          objects to add driver-specific indexing data to.
+        """
+        for dataset in datasets:
+            self.add_specifics(dataset)
+
 
 class Index(base_index.Index, IndexExtension):
     """Generic driver.
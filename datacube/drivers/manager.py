@@ -5,10 +5,11 @@ from __future__ import absolute_import, division
 import logging
 import weakref
 from pathlib import Path
-from collections import Iterable
+from collections import Iterable, OrderedDict
 from cloudpickle import loads, dumps
 
 from ..compat import load_module
+from ..storage.storage import MultiBandDataSource
 from .driver import Driver
 from .index import Index
 
@@ -275,11 +276,21 @@ class DriverManager(object):
 
         The appropriate driver is determined from the dataset uris,
         then the datasource created using that driver.
+
+        If `band_name` is a list of names, a
+        :class:`datacube.storage.storage.MultiBandDataSource` is
+        returned instead, which reads all those bands while opening
+        each distinct file only once.
+
         :param dataset: The dataset to read.
-        :param band_name: the name of the band to read.
+        :param band_name: the name of the band to read, or a list of
+          band names.
 
         """
-        return self.get_driver_by_scheme(dataset.uris).get_datasource(dataset, band_name)
+        driver = self.get_driver_by_scheme(dataset.uris)
+        if isinstance(band_name, (list, tuple)):
+            return MultiBandDataSource([driver.get_datasource(dataset, name) for name in band_name])
+        return driver.get_datasource(dataset, band_name)
 
     def add_specifics(self, dataset):
         """Pulls driver-specific index data from the DB.
@@ -294,6 +305,22 @@ class DriverManager(object):
         """
         return self.get_driver_by_scheme(dataset.uris).index.add_specifics(dataset)
 
+    def add_specifics_many(self, datasets):
+        """Pulls driver-specific index data from the DB for several
+        datasets.
+
+        The datasets are grouped by the driver handling them, and each
+        driver adds the specific data to its whole group at once.
+
+        :param list datasets: The datasets for which to extract the
+          specific data.
+        """
+        by_driver = OrderedDict()
+        for dataset in datasets:
+            by_driver.setdefault(self.get_driver_by_scheme(dataset.uris), []).append(dataset)
+        for driver, driver_datasets in by_driver.items():
+            driver.index.add_specifics_many(driver_datasets)
+
     def __enter__(self):
         return self
 
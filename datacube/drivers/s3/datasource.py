@@ -152,3 +152,10 @@ class S3DataSource(DataSource):
         :return: The CRS of the dataset.
         """
         return self._dataset.crs
+
+    def get_extent(self):
+        """The dataset footprint.
+
+        :return: The extent of the dataset, or None if unknown.
+        """
+        return self._dataset.extent
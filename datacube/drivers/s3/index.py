@@ -35,6 +35,15 @@ class Index(base_index.Index, base_index.IndexExtension):
         """
         self.datasets.add_specifics(dataset)
 
+    def add_specifics_many(self, datasets):
+        """Extend the docs of several datasets with driver specific
+        index data, using a single query.
+
+        :param list datasets: The :cls:`datacube.model.Dataset`
+          objects to add s3-specific indexing data to.
+        """
+        self.datasets.add_specifics_many(datasets)
+
     def add_datasets(self, datasets, sources_policy='verify'):
         """Index several datasets using the current driver.
 
@@ -80,10 +89,17 @@ class DatasetResource(base_dataset.DatasetResource):
         self.uri_scheme = uri_scheme
 
     def add(self, dataset, sources_policy='verify', **kwargs):
+        return super(DatasetResource, self).add(self._set_uri_scheme(dataset), sources_policy, **kwargs)
+
+    def add_many(self, datasets, sources_policy='verify', batch_size=1000):
+        return super(DatasetResource, self).add_many((self._set_uri_scheme(dataset) for dataset in datasets),
+                                                     sources_policy, batch_size)
+
+    def _set_uri_scheme(self, dataset):
         # Set uri scheme to s3
         dataset.uris = ['%s:%s' % (self.uri_scheme, uri.split(':', 1)[1]) for uri in dataset.uris] \
             if dataset.uris else []
-        return super(DatasetResource, self).add(dataset, sources_policy, **kwargs)
+        return dataset
 
     def _add_s3_dataset(self, transaction, s3_dataset_id, band, output):
         """Add the new s3 dataset to DB.
@@ -206,17 +222,39 @@ class DatasetResource(base_dataset.DatasetResource):
         :param :cls:`datacube.model.Dataset` dataset: The dataset to
           add NetCDF-specific indexing data to.
         """
-        dataset.s3_metadata = {}
-        if dataset.measurements:
-            with self._db.begin() as transaction:
-                for band in dataset.measurements.keys():
-                    s3_datasets = self.get_s3_dataset(transaction, dataset.id, band)
-                    for s3_dataset in s3_datasets:
-                        dataset.s3_metadata[band] = {
-                            's3_dataset': s3_dataset,
-                            # TODO(csiro): commenting this out for now, not using it yet.
-                            # 's3_chunks': transaction.get_s3_dataset_chunk(s3_dataset.id)
-                        }
+        self.add_specifics_many([dataset])
+
+    def add_specifics_many(self, datasets):
+        """Extend the documents of several datasets with driver
+        specific index data.
+
+        The `s3_dataset` rows of all the datasets and their bands are
+        fetched with a single query, rather than one query per band
+        of each dataset.
+
+        :param list datasets: The :cls:`datacube.model.Dataset`
+          objects to add s3-specific indexing data to.
+        """
+        by_id = {}
+        bands = set()
+        for dataset in datasets:
+            dataset.s3_metadata = {}
+            if dataset.measurements:
+                by_id[dataset.id] = dataset
+                bands.update(dataset.measurements.keys())
+        if not by_id:
+            return
+
+        with self._db.connect() as connection:
+            s3_datasets = self.get_s3_datasets(connection, list(by_id), list(bands))
+        for s3_dataset in s3_datasets:
+            dataset = by_id[s3_dataset.dataset_ref]
+            if s3_dataset.band in dataset.measurements:
+                dataset.s3_metadata[s3_dataset.band] = {
+                    's3_dataset': s3_dataset,
+                    # TODO(csiro): commenting this out for now, not using it yet.
+                    # 's3_chunks': transaction.get_s3_dataset_chunk(s3_dataset.id)
+                }
 
     # S3 specific functions
     # See .tables for description of each column
@@ -297,6 +335,34 @@ class DatasetResource(base_dataset.DatasetResource):
             )
         ).fetchall()
 
+    def get_s3_datasets(self, _connection, dataset_refs, bands):
+        """:type dataset_refs: list[uuid.UUID]
+        :type bands: list[str]"""
+        return _connection.execute(
+            select(
+                [S3_DATASET_MAPPING.c.dataset_ref,
+                 S3_DATASET.c.id,
+                 S3_DATASET.c.base_name,
+                 S3_DATASET.c.band,
+                 S3_DATASET.c.bucket,
+                 S3_DATASET.c.macro_shape,
+                 S3_DATASET.c.chunk_size,
+                 S3_DATASET.c.numpy_type,
+                 S3_DATASET.c.dimensions,
+                 S3_DATASET.c.regular_dims,
+                 S3_DATASET.c.regular_index,
+                 S3_DATASET.c.irregular_index]
+            ).select_from(
+                S3_DATASET.join(S3_DATASET_MAPPING,
+                                S3_DATASET_MAPPING.c.s3_dataset_id == S3_DATASET.c.id)
+            ).where(
+                and_(
+                    S3_DATASET_MAPPING.c.dataset_ref.in_(dataset_refs),
+                    S3_DATASET_MAPPING.c.band.in_(bands)
+                )
+            )
+        ).fetchall()
+
 
     def put_s3_dataset_chunk(self, _connection, s3_dataset_id, s3_key,
                              chunk_id, compression_scheme,
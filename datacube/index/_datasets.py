@@ -4,11 +4,13 @@ API for dataset indexing, access and search.
 """
 from __future__ import absolute_import
 
+import itertools
 import logging
 import warnings
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from uuid import UUID
 
+import pandas
 from cachetools.func import lru_cache
 
 from datacube import compat
@@ -21,6 +23,12 @@ from .exceptions import DuplicateRecordError
 
 _LOG = logging.getLogger(__name__)
 
+#: Number of rows read from the database at a time when building columnar search results
+_COLUMNS_BATCH_SIZE = 10000
+
+#: Number of datasets at a time whose driver-specific data is fetched together when searching
+_SPECIFICS_BATCH_SIZE = 1000
+
 try:
     from typing import Any, Iterable, Mapping, Set, Tuple, Union
 except ImportError:
@@ -641,6 +649,41 @@ class ProductResource(object):
         )
 
 
+def _split_range_fields(fields_):
+    """
+    Replace each range field with the fields of its lower and greater bounds.
+    """
+    for field in fields_:
+        if hasattr(field, 'lower') and hasattr(field, 'greater'):
+            yield field.lower
+            yield field.greater
+        else:
+            yield field
+
+
+def _column_values(column):
+    """
+    :param pandas.Series column:
+    :return: values of the column as a numpy array, with timezone-aware times converted to UTC datetime64
+    """
+    if getattr(column.dtype, 'tz', None) is not None:
+        column = column.dt.tz_convert('UTC').dt.tz_localize(None)
+    return column.values
+
+
+def _document_without_sources(dataset):
+    """
+    :return: the metadata document of the dataset as it is stored in the index, without the documents of its sources
+    """
+    reader = dataset.type.dataset_reader(dataset.metadata_doc)
+    sources = reader.sources
+    reader.sources = {}
+    try:
+        return jsonify_document(dataset.metadata_doc)
+    finally:
+        reader.sources = sources
+
+
 def _readable_offset(offset):
     return '.'.join(map(str, offset))
 
@@ -764,6 +807,70 @@ class DatasetResource(object):
 
         return dataset
 
+    def add_many(self, datasets, sources_policy='verify', batch_size=1000):
+        """
+        Add many datasets to the index. Datasets that are already present are skipped.
+
+        Each batch of datasets is staged in temporary tables and merged into the index with a few set-based
+        statements in one transaction, which is much faster than calling :meth:`add` for each dataset. As with
+        :meth:`add`, a dataset that is already indexed with a different document raises a
+        :class:`~datacube.utils.changes.DocumentMismatchError`, and new locations of existing datasets are added.
+        A batch that fails is rolled back as a whole.
+
+        :param datasets: iterable of :class:`Dataset` to add
+        :param str sources_policy: how should source datasets included in these datasets be handled, as for
+            :meth:`add`. Sources that are added are included in the same batch as their dataset.
+        :param int batch_size: number of datasets to add in each transaction
+        :return: number of datasets that weren't already indexed, including sources
+        :rtype: int
+        """
+        added = 0
+        datasets = iter(datasets)
+        while True:
+            batch = list(itertools.islice(datasets, batch_size))
+            if not batch:
+                return added
+            added += self._add_batch(batch, sources_policy)
+
+    def _add_batch(self, datasets, sources_policy):
+        if sources_policy not in ('verify', 'ensure', 'skip'):
+            raise ValueError('sources_policy must be one of ("verify", "ensure", "skip")')
+
+        # Datasets to stage, sources first, with whether to check they match the indexed dataset of the same id.
+        # As with add(), sources are only checked with the 'verify' policy.
+        staged = OrderedDict()
+
+        def stage(dataset, check):
+            if dataset.sources is None:
+                raise ValueError('Dataset has missing (None) sources. Was this loaded without include_sources=True?')
+            if sources_policy != 'skip':
+                for source in dataset.sources.values():
+                    stage(source, sources_policy == 'verify')
+            if dataset.id in staged:
+                check = check or staged[dataset.id][1]
+                dataset = staged[dataset.id][0]
+            staged[dataset.id] = (dataset, check)
+
+        for dataset in datasets:
+            stage(dataset, True)
+
+        products = {}
+        dataset_rows, source_rows, location_rows = [], [], []
+        for dataset, _ in staged.values():
+            if dataset.type.name not in products:
+                products[dataset.type.name] = self._get_or_add_product(dataset.type)
+            dataset_rows.append((dataset.id, products[dataset.type.name].id, _document_without_sources(dataset)))
+            source_rows.extend((dataset.id, classifier, source.id) for classifier, source in dataset.sources.items())
+            location_rows.extend((dataset.id, uri) for uri in dataset.uris or ())
+
+        _LOG.info('Indexing %s datasets', len(dataset_rows))
+        with self._db.begin() as transaction:
+            transaction.stage_datasets(dataset_rows, source_rows, location_rows)
+            for dataset_id, existing_doc, new_doc in transaction.get_staged_dataset_conflicts():
+                if staged[dataset_id][1]:
+                    check_doc_unchanged(existing_doc, new_doc, 'Dataset {}'.format(dataset_id))
+            return len(transaction.merge_staged_datasets())
+
     def search_product_duplicates(self, product, *group_fields):
         # type: (DatasetType, Iterable[Union[str, Field]]) -> Iterable[tuple, Set[UUID]]
         """
@@ -1041,10 +1148,15 @@ class DatasetResource(object):
 
         :param bool full_info: Include all available fields
         """
+        dataset = self._make_without_specifics(dataset_res, full_info=full_info)
+        self._driver_manager.add_specifics(dataset)
+        return dataset
+
+    def _make_without_specifics(self, dataset_res, full_info=False):
         uris = dataset_res.uris
         if uris:
             uris = [uri for uri in uris if uri] if uris else []
-        dataset = Dataset(
+        return Dataset(
             type_=self.types.get(dataset_res.dataset_type_ref),
             metadata_doc=dataset_res.metadata,
             uris=uris,
@@ -1052,14 +1164,22 @@ class DatasetResource(object):
             indexed_time=dataset_res.added if full_info else None,
             archived_time=dataset_res.archived
         )
-        self._driver_manager.add_specifics(dataset)
-        return dataset
 
     def _make_many(self, query_result):
         """
-        :rtype list[Dataset]
+        Driver-specific data is added to a batch of datasets at a time, rather than one dataset at a time.
+
+        :rtype: __generator[Dataset]
         """
-        return (self._make(dataset) for dataset in query_result)
+        query_result = iter(query_result)
+        while True:
+            datasets = [self._make_without_specifics(dataset_res)
+                        for dataset_res in itertools.islice(query_result, _SPECIFICS_BATCH_SIZE)]
+            if not datasets:
+                return
+            self._driver_manager.add_specifics_many(datasets)
+            for dataset in datasets:
+                yield dataset
 
     def search_by_metadata(self, metadata):
         """
@@ -1120,6 +1240,42 @@ class DatasetResource(object):
             for columns in results:
                 yield result_type(*columns)
 
+    def search_returning_columns(self, field_names=None, with_pandas=False, **query):
+        """
+        Perform a search, returning the specified fields as columns rather than a result per row.
+
+        Rows are read from the database in batches and converted to arrays in bulk, so this is much faster
+        than :meth:`search_returning` or :meth:`search_summaries` for large numbers of results.
+
+        Range fields such as `time` and `lat` are returned as two columns holding their bounds, named like
+        `time_lower` and `time_greater`.
+
+        :param tuple[str] field_names: fields to return, defaults to all search fields, as :meth:`search_summaries`
+        :param bool with_pandas: return a :class:`pandas.DataFrame` instead of a dict of numpy arrays
+        :param dict[str,str|float|datacube.model.Range] query:
+        :rtype: pandas.DataFrame | collections.OrderedDict[str, numpy.ndarray]
+        """
+        columns = []
+        frames = []
+        for _, results in self._do_search_by_product(query,
+                                                     return_fields=True,
+                                                     select_field_names=field_names,
+                                                     split_ranges=True):
+            columns = results.keys()
+            rows = results.fetchmany(_COLUMNS_BATCH_SIZE)
+            while rows:
+                frames.append(pandas.DataFrame.from_records(rows, columns=columns))
+                rows = results.fetchmany(_COLUMNS_BATCH_SIZE)
+
+        if frames:
+            frame = pandas.concat(frames, ignore_index=True)
+        else:
+            frame = pandas.DataFrame(columns=columns)
+
+        if with_pandas:
+            return frame
+        return OrderedDict((name, _column_values(frame[name])) for name in frame.columns)
+
     def count(self, **query):
         """
         Perform a search, returning count of results.
@@ -1170,13 +1326,17 @@ class DatasetResource(object):
         """
         return next(self._do_time_count(period, query, ensure_single=True))[1]
 
+    def _get_or_add_product(self, product):
+        existing = self.types.get_by_name(product.name)
+        if existing is None:
+            _LOG.warning('Adding product "%s" as it doesn\'t exist.', product.name)
+            existing = self.types.add(product)
+        return existing
+
     def _try_add(self, dataset):
         was_inserted = False
 
-        product = self.types.get_by_name(dataset.type.name)
-        if product is None:
-            _LOG.warning('Adding product "%s" as it doesn\'t exist.', dataset.type.name)
-            product = self.types.add(dataset.type)
+        product = self._get_or_add_product(dataset.type)
         if dataset.sources is None:
             raise ValueError("Dataset has missing (None) sources. Was this loaded without include_sources=True?")
 
@@ -1216,7 +1376,7 @@ class DatasetResource(object):
     # pylint: disable=too-many-locals
     def _do_search_by_product(self, query, return_fields=False, select_field_names=None,
                               with_source_ids=False, source_filter=None,
-                              limit=None):
+                              limit=None, split_ranges=False):
 
         if source_filter:
             product_queries = list(self._get_product_queries(source_filter))
@@ -1246,7 +1406,9 @@ class DatasetResource(object):
                 else:
                     select_fields = tuple(dataset_fields[field_name]
                                           for field_name in select_field_names)
-            with self._db.connect() as connection:
+                if split_ranges:
+                    select_fields = tuple(_split_range_fields(select_fields))
+            with self._db.connect(stream_results=True) as connection:
                 yield (product,
                        connection.search_datasets(
                            query_exprs,
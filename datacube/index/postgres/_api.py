@@ -13,6 +13,7 @@ from __future__ import absolute_import
 
 import logging
 
+from six import raise_from
 from sqlalchemy import cast
 from sqlalchemy import delete
 from sqlalchemy import select, text, bindparam, and_, or_, func, literal, distinct
@@ -25,6 +26,7 @@ from datacube.index.fields import OrExpression
 from datacube.index.postgres._fields import PgExpression
 from datacube.model import Range
 from . import _dynamic as dynamic
+from . import _staging as staging
 from . import tables
 from ._fields import parse_fields, NativeField, Expression, PgField
 from .tables import (
@@ -152,8 +154,14 @@ def get_dataset_fields(dataset_search_fields):
 
 
 class PostgresDbAPI(object):
-    def __init__(self, connection):
+    def __init__(self, connection, fetch_size=None):
+        """
+        :param connection: sqlalchemy connection
+        :param int fetch_size: stream dataset search results this many rows at a time, or None to read them all at once.
+            Streaming needs a connection that isn't in autocommit mode.
+        """
         self._connection = connection
+        self._fetch_size = fetch_size
 
     @property
     def in_transaction(self):
@@ -279,6 +287,49 @@ class PostgresDbAPI(object):
                 raise MissingRecordError("Referenced source dataset doesn't exist")
             raise
 
+    def stage_datasets(self, datasets, sources, locations):
+        """
+        Load datasets into temporary tables, to be merged into the index by :meth:`merge_staged_datasets`.
+
+        Each is loaded with a single multi-row insert. Must be called in a transaction: the tables are dropped
+        when it ends.
+
+        :param list[(uuid.UUID, int, dict)] datasets: id, dataset type id and metadata document of each dataset
+        :param list[(uuid.UUID, str, uuid.UUID)] sources: dataset id, classifier and source dataset id of each source
+        :param list[(uuid.UUID, str)] locations: dataset id and uri of each location
+        """
+        self._connection.execute(text(staging.CREATE_STAGING_TABLES))
+        locations = [(dataset_id,) + _split_uri(uri) for dataset_id, uri in locations]
+        for insert in staging.insert_staged_rows(datasets, sources, locations):
+            self._connection.execute(insert)
+
+    def get_staged_dataset_conflicts(self):
+        """
+        Find staged datasets that are already indexed with a different metadata document.
+
+        :return: rows of (id, stored metadata document, staged metadata document)
+        """
+        return self._connection.execute(staging.select_staged_conflicts()).fetchall()
+
+    def merge_staged_datasets(self):
+        """
+        Insert the staged datasets that aren't already indexed, with their sources, and add any new locations
+        of all the staged datasets.
+
+        :return: ids of the datasets inserted
+        :rtype: list[uuid.UUID]
+        """
+        self._connection.execute(staging.mark_new_staged_datasets())
+        self._connection.execute(staging.insert_new_datasets())
+        try:
+            self._connection.execute(staging.insert_new_dataset_sources())
+        except IntegrityError as e:
+            if e.orig.pgcode == PGCODE_FOREIGN_KEY_VIOLATION:
+                raise_from(MissingRecordError("Referenced source dataset doesn't exist"), e)
+            raise
+        self._connection.execute(staging.insert_new_dataset_locations())
+        return [row[0] for row in self._connection.execute(staging.select_new_dataset_ids())]
+
     def archive_dataset(self, dataset_id):
         self._connection.execute(
             DATASET.update().where(
@@ -475,7 +526,15 @@ class PostgresDbAPI(object):
         """
         select_query = self.search_datasets_query(expressions, source_exprs,
                                                   select_fields, with_source_ids, limit)
-        return self._connection.execute(select_query)
+        if not self._fetch_size:
+            return self._connection.execute(select_query)
+
+        # Read the results through a named (server-side) cursor, so only one batch of rows is held in memory.
+        # Postgres only allows these cursors inside a transaction: see PostgresDb.connect(stream_results=True)
+        return self._connection.execution_options(
+            stream_results=True,
+            max_row_buffer=self._fetch_size
+        ).execute(select_query)
 
     def get_duplicates(self, match_fields, expressions):
         # type: (Tuple[PgField], Tuple[PgExpression]) -> Iterable[tuple]
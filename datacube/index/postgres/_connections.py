@@ -28,6 +28,9 @@ _LIB_ID = 'agdc-' + str(datacube.__version__)
 
 _LOG = logging.getLogger(__name__)
 
+#: Number of rows read at a time when streaming dataset search results. 0 reads all results at once.
+DEFAULT_FETCH_SIZE = 1000
+
 
 class IndexSetupError(Exception):
     pass
@@ -48,17 +51,21 @@ class PostgresDb(object):
     or else use a separate instance of this class in each process.
     """
 
-    def __init__(self, engine):
+    def __init__(self, engine, fetch_size=DEFAULT_FETCH_SIZE):
         # We don't recommend using this constructor directly as it may change.
         # Use static methods PostgresDb.create() or PostgresDb.from_config()
         self._engine = engine
+        self._fetch_size = fetch_size
+        # Named cursors, which stream results, can't be used in autocommit mode. Connections from this engine
+        # share the pool, and have their isolation level restored when they return to it.
+        self._stream_engine = engine.execution_options(isolation_level='READ COMMITTED')
 
     def __getstate__(self):
         _LOG.warning("Serializing PostgresDb engine %s", self.url)
-        return {'url': self.url}
+        return {'url': self.url, 'fetch_size': self._fetch_size}
 
     def __setstate__(self, state):
-        self.__init__(self._create_engine(state['url']))
+        self.__init__(self._create_engine(state['url']), fetch_size=state.get('fetch_size', DEFAULT_FETCH_SIZE))
 
     @property
     def url(self):
@@ -86,7 +93,7 @@ class PostgresDb(object):
 
     @classmethod
     def create(cls, hostname, database, username=None, password=None, port=None,
-               application_name=None, validate=True, pool_timeout=60):
+               application_name=None, validate=True, pool_timeout=60, fetch_size=DEFAULT_FETCH_SIZE):
         engine = cls._create_engine(
             EngineUrl(
                 'postgresql',
@@ -107,7 +114,7 @@ class PostgresDb(object):
                     'An administrator must run init:\n\t{init_command}'.format(
                         init_command='datacube -v system init'
                     ))
-        return PostgresDb(engine)
+        return PostgresDb(engine, fetch_size=fetch_size)
 
     @classmethod
     def from_config(cls, config=LocalConfig.find(), application_name=None, validate_connection=True):
@@ -121,7 +128,8 @@ class PostgresDb(object):
             config.db_port,
             application_name=app_name,
             validate=validate_connection,
-            pool_timeout=config.db_connection_timeout
+            pool_timeout=config.db_connection_timeout,
+            fetch_size=config.db_fetch_size
         )
 
     def close(self):
@@ -178,7 +186,7 @@ class PostgresDb(object):
 
         return is_new
 
-    def connect(self):
+    def connect(self, stream_results=False):
         """
         Borrow a connection from the pool.
 
@@ -191,7 +199,12 @@ class PostgresDb(object):
         The connection can raise errors if not following this advice ("server closed the connection unexpectedly"),
         as some servers will aggressively close idle connections (eg. DEA's NCI servers). It also prevents the
         connection from being reused while borrowed.
+
+        :param bool stream_results: stream dataset search results from the server rather than reading them all at
+            once. The connection isn't in autocommit mode, so it should only be used for searches.
         """
+        if stream_results and self._fetch_size:
+            return _PostgresDbConnection(self._stream_engine, self._fetch_size)
         return _PostgresDbConnection(self._engine)
 
     def begin(self):
@@ -217,13 +230,14 @@ class PostgresDb(object):
 
 
 class _PostgresDbConnection(object):
-    def __init__(self, engine):
+    def __init__(self, engine, fetch_size=None):
         self._engine = engine
+        self._fetch_size = fetch_size
         self._connection = None
 
     def __enter__(self):
         self._connection = self._engine.connect()
-        return _api.PostgresDbAPI(self._connection)
+        return _api.PostgresDbAPI(self._connection, fetch_size=self._fetch_size)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self._connection.close()
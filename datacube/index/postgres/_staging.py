@@ -0,0 +1,151 @@
+# coding=utf-8
+"""
+Temporary tables that datasets are staged in by :meth:`PostgresDbAPI.stage_datasets`, and the set-based
+statements that merge them into the index, for :meth:`datacube.index._datasets.DatasetResource.add_many`.
+
+The tables are dropped at the end of the transaction that created them.
+"""
+from __future__ import absolute_import
+
+from sqlalchemy import MetaData, Table, Column, Boolean, SmallInteger, String
+from sqlalchemy import select, and_, exists
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+from .tables import DATASET, DATASET_SOURCE, DATASET_LOCATION, DATASET_TYPE
+
+_STAGING_METADATA = MetaData()
+STAGED_DATASET = Table(
+    'staged_dataset', _STAGING_METADATA,
+    Column('id', UUID(as_uuid=True)),
+    Column('dataset_type_ref', SmallInteger),
+    Column('metadata', JSONB),
+    # Whether the dataset isn't already in the index. Set when merging.
+    Column('is_new', Boolean),
+)
+STAGED_DATASET_SOURCE = Table(
+    'staged_dataset_source', _STAGING_METADATA,
+    Column('dataset_ref', UUID(as_uuid=True)),
+    Column('classifier', String),
+    Column('source_dataset_ref', UUID(as_uuid=True)),
+)
+STAGED_DATASET_LOCATION = Table(
+    'staged_dataset_location', _STAGING_METADATA,
+    Column('dataset_ref', UUID(as_uuid=True)),
+    Column('uri_scheme', String),
+    Column('uri_body', String),
+)
+CREATE_STAGING_TABLES = """
+create temporary table staged_dataset (
+    id uuid, dataset_type_ref smallint, metadata jsonb, is_new boolean
+) on commit drop;
+create temporary table staged_dataset_source (
+    dataset_ref uuid, classifier varchar, source_dataset_ref uuid
+) on commit drop;
+create temporary table staged_dataset_location (
+    dataset_ref uuid, uri_scheme varchar, uri_body varchar
+) on commit drop;
+"""
+
+
+def insert_staged_rows(datasets, sources, locations):
+    """
+    :param list[(uuid.UUID, int, dict)] datasets: id, dataset type id and metadata document of each dataset
+    :param list[(uuid.UUID, str, uuid.UUID)] sources: dataset id, classifier and source dataset id of each source
+    :param list[(uuid.UUID, str, str)] locations: dataset id, uri scheme and uri body of each location
+    :return: one multi-row insert per table with any rows to stage
+    """
+    inserts = []
+    if datasets:
+        inserts.append(STAGED_DATASET.insert().values([
+            dict(id=dataset_id, dataset_type_ref=dataset_type_id, metadata=metadata_doc)
+            for dataset_id, dataset_type_id, metadata_doc in datasets
+        ]))
+    if sources:
+        inserts.append(STAGED_DATASET_SOURCE.insert().values([
+            dict(dataset_ref=dataset_id, classifier=classifier, source_dataset_ref=source_dataset_id)
+            for dataset_id, classifier, source_dataset_id in sources
+        ]))
+    if locations:
+        inserts.append(STAGED_DATASET_LOCATION.insert().values([
+            dict(dataset_ref=dataset_id, uri_scheme=uri_scheme, uri_body=uri_body)
+            for dataset_id, uri_scheme, uri_body in locations
+        ]))
+    return inserts
+
+
+def select_staged_conflicts():
+    """
+    :return: query for the (id, stored metadata document, staged metadata document) of the staged datasets that
+        are already indexed with a different metadata document
+    """
+    return select(
+        [DATASET.c.id, DATASET.c.metadata, STAGED_DATASET.c.metadata]
+    ).select_from(
+        STAGED_DATASET.join(DATASET, DATASET.c.id == STAGED_DATASET.c.id)
+    ).where(
+        DATASET.c.metadata != STAGED_DATASET.c.metadata
+    )
+
+
+def mark_new_staged_datasets():
+    return STAGED_DATASET.update().values(
+        is_new=~exists().where(DATASET.c.id == STAGED_DATASET.c.id)
+    )
+
+
+def insert_new_datasets():
+    return DATASET.insert().from_select(
+        ['id', 'dataset_type_ref', 'metadata_type_ref', 'metadata'],
+        select([
+            STAGED_DATASET.c.id,
+            STAGED_DATASET.c.dataset_type_ref,
+            DATASET_TYPE.c.metadata_type_ref,
+            STAGED_DATASET.c.metadata
+        ]).select_from(
+            STAGED_DATASET.join(DATASET_TYPE, DATASET_TYPE.c.id == STAGED_DATASET.c.dataset_type_ref)
+        ).where(
+            STAGED_DATASET.c.is_new
+        )
+    )
+
+
+def insert_new_dataset_sources():
+    return DATASET_SOURCE.insert().from_select(
+        ['dataset_ref', 'classifier', 'source_dataset_ref'],
+        select([
+            STAGED_DATASET_SOURCE.c.dataset_ref,
+            STAGED_DATASET_SOURCE.c.classifier,
+            STAGED_DATASET_SOURCE.c.source_dataset_ref
+        ]).select_from(
+            STAGED_DATASET_SOURCE.join(STAGED_DATASET,
+                                       STAGED_DATASET.c.id == STAGED_DATASET_SOURCE.c.dataset_ref)
+        ).where(
+            STAGED_DATASET.c.is_new
+        )
+    )
+
+
+def insert_new_dataset_locations():
+    """
+    :return: statement adding the staged locations that aren't indexed yet, of new and existing datasets alike
+    """
+    return DATASET_LOCATION.insert().from_select(
+        ['dataset_ref', 'uri_scheme', 'uri_body'],
+        select([
+            STAGED_DATASET_LOCATION.c.dataset_ref,
+            STAGED_DATASET_LOCATION.c.uri_scheme,
+            STAGED_DATASET_LOCATION.c.uri_body
+        ]).distinct().where(
+            ~exists().where(
+                and_(
+                    DATASET_LOCATION.c.dataset_ref == STAGED_DATASET_LOCATION.c.dataset_ref,
+                    DATASET_LOCATION.c.uri_scheme == STAGED_DATASET_LOCATION.c.uri_scheme,
+                    DATASET_LOCATION.c.uri_body == STAGED_DATASET_LOCATION.c.uri_body
+                )
+            )
+        )
+    )
+
+
+def select_new_dataset_ids():
+    return select([STAGED_DATASET.c.id]).where(STAGED_DATASET.c.is_new)
@@ -14,7 +14,8 @@ from uuid import UUID
 from affine import Affine
 
 from datacube.utils import geometry
-from datacube.utils import parse_time, cached_property, uri_to_local_path, intersects, schema_validated, DocReader
+from datacube.utils import (parse_time, cached_property, cached_slot_property, uri_to_local_path, intersects,
+                            schema_validated, DocReader)
 from datacube.utils.geometry import (CRS as _CRS,
                                      GeoBox as _GeoBox,
                                      Coordinate as _Coordinate,
@@ -74,6 +75,12 @@ class Dataset(object):
     :param dict metadata_doc: the document (typically a parsed json/yaml)
     :param list[str] uris: All active uris for the dataset
     """
+    # Catalogue-wide searches keep many datasets in memory, so they don't get an instance dictionary unless an
+    # unknown attribute is set. Values read from the document are cached in the `_cached_` slots.
+    __slots__ = ('type', '_metadata_doc', 'uris', 'sources', 'indexed_by', 'indexed_time', 'archived_time',
+                 '_cached_id', '_cached_time', '_cached_center_time', '_cached_bounds',
+                 '_cached_transform', '_cached_crs', '_cached_extent', '__dict__', '__weakref__')
+    _CACHED_SLOTS = tuple(slot for slot in __slots__ if slot.startswith('_cached_'))
 
     def __init__(self, type_, metadata_doc, local_uri=None, uris=None, sources=None,
                  indexed_by=None, indexed_time=None, archived_time=None):
@@ -82,9 +89,6 @@ class Dataset(object):
         #: :rtype: DatasetType
         self.type = type_
 
-        #: The document describing the dataset as a dictionary. It is often serialised as YAML on disk
-        #: or inside a NetCDF file, and as JSON-B inside the database index.
-        #: :type: dict
         self.metadata_doc = metadata_doc
 
         if local_uri:
@@ -118,6 +122,23 @@ class Dataset(object):
         #: :type: datetime.datetime
         self.archived_time = archived_time
 
+    @property
+    def metadata_doc(self):
+        """
+        The document describing the dataset as a dictionary. It is often serialised as YAML on disk
+        or inside a NetCDF file, and as JSON-B inside the database index.
+
+        :type: dict
+        """
+        return self._metadata_doc
+
+    @metadata_doc.setter
+    def metadata_doc(self, metadata_doc):
+        self._metadata_doc = metadata_doc
+        for slot in self._CACHED_SLOTS:
+            if hasattr(self, slot):
+                delattr(self, slot)
+
     @property
     def metadata_type(self):
         return self.type.metadata_type if self.type else None
@@ -143,7 +164,7 @@ class Dataset(object):
         """
         return uri_to_local_path(self.local_uri)
 
-    @property
+    @cached_slot_property
     def id(self):
         """
         :rtype: UUID
@@ -167,7 +188,7 @@ class Dataset(object):
             return {}
         return self.metadata.measurements
 
-    @cached_property
+    @cached_slot_property
     def center_time(self):
         """
         :rtype: datetime.datetime
@@ -175,12 +196,12 @@ class Dataset(object):
         time = self.time
         return time.begin + (time.end - time.begin) // 2
 
-    @property
+    @cached_slot_property
     def time(self):
         time = self.metadata.time
         return Range(parse_time(time.begin), parse_time(time.end))
 
-    @property
+    @cached_slot_property
     def bounds(self):
         """
         :rtype: geometry.BoundingBox
@@ -191,7 +212,7 @@ class Dataset(object):
                                     top=max(bounds['ur']['y'], bounds['ll']['y']),
                                     bottom=min(bounds['ur']['y'], bounds['ll']['y']))
 
-    @property
+    @cached_slot_property
     def transform(self):
         bounds = self.metadata.grid_spatial['geo_ref_points']
         return Affine(bounds['lr']['x'] - bounds['ul']['x'], 0, bounds['ul']['x'],
@@ -221,7 +242,7 @@ class Dataset(object):
         """
         return not self.is_archived
 
-    @property
+    @cached_slot_property
     def crs(self):
         """
         :rtype: geometry.CRS
@@ -255,7 +276,7 @@ class Dataset(object):
 
         return None
 
-    @cached_property
+    @cached_slot_property
     def extent(self):
         """
         :rtype: geometry.Geometry
@@ -297,6 +318,17 @@ class Dataset(object):
     def __repr__(self):
         return self.__str__()
 
+    def __getstate__(self):
+        # Cached values are dropped: they are cheap to recompute and not all of them can be pickled.
+        state = {slot: getattr(self, slot) for slot in self.__slots__
+                 if slot not in self._CACHED_SLOTS and slot not in ('__dict__', '__weakref__') and hasattr(self, slot)}
+        state.update(getattr(self, '__dict__', {}))
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
     @property
     def metadata(self):
         return self.metadata_type.dataset_reader(self.metadata_doc)
@@ -640,10 +672,17 @@ class GridSpec(object):
         """
         result = []
         geopolygon = geopolygon.to_crs(self.crs)
-        for tile_index, tile_geobox in self.tiles(geopolygon.boundingbox.buffered(*tile_buffer)):
+        bounds = geopolygon.boundingbox
+        for tile_index, tile_geobox in self.tiles(bounds.buffered(*tile_buffer)):
             if tile_buffer:
                 tile_geobox = tile_geobox.buffered(*tile_buffer)
 
+            # Only build the tile polygon for tiles that overlap the bounds of the geopolygon
+            tile_bounds = tile_geobox.boundingbox
+            if (tile_bounds.left > bounds.right or tile_bounds.right < bounds.left or
+                    tile_bounds.bottom > bounds.top or tile_bounds.top < bounds.bottom):
+                continue
+
             if intersects(tile_geobox.extent, geopolygon):
                 result.append((tile_index, tile_geobox))
         return result
@@ -2,8 +2,11 @@ from __future__ import absolute_import
 
 import csv
 import datetime
+import itertools
 import logging
+import multiprocessing
 import sys
+import time
 from collections import OrderedDict
 from decimal import Decimal
 from pathlib import Path
@@ -15,6 +18,7 @@ from click import echo
 import json
 from yaml import Node
 
+from datacube.config import OPTIONS, set_options
 from datacube.index._api import Index
 from datacube.index.exceptions import MissingRecordError
 from datacube.model import Dataset
@@ -23,6 +27,7 @@ from datacube.ui import click as ui
 from datacube.ui.click import cli
 from datacube.ui.common import get_metadata_path
 from datacube.utils import read_documents, changes, InvalidDocException
+from datacube.utils.changes import DocumentMismatchError
 
 try:
     from typing import Iterable
@@ -31,6 +36,12 @@ except ImportError:
 
 _LOG = logging.getLogger('datacube-dataset')
 
+#: Number of datasets added to the index in each transaction when indexing with several jobs
+_INDEX_BATCH_SIZE = 1000
+
+#: Errors adding a dataset that are reported, and the dataset skipped, rather than stopping the indexing
+_ADD_DATASET_ERRORS = (ValueError, MissingRecordError, DocumentMismatchError)
+
 
 class BadMatch(Exception):
     pass
@@ -159,20 +170,31 @@ def parse_match_rules_options(index, match_rules, dtype, auto_match):
 'ensure' - add source dataset if it doesn't exist
 'skip' - dont add the derived dataset if source dataset doesn't exist""")
 @click.option('--dry-run', help='Check if everything is ok', is_flag=True, default=False)
+@click.option('--document-cache', type=click.Path(file_okay=False, writable=True),
+              help='Directory to cache parsed dataset documents in. Documents that are unchanged since they were '
+                   'cached are not parsed again.')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=1,
+              help='Number of processes reading and matching dataset documents. With more than one, '
+                   'datasets are added to the index in batches.')
 @click.argument('dataset-paths',
                 type=click.Path(exists=True, readable=True, writable=False), nargs=-1)
 @ui.pass_index()
-def index_cmd(index, match_rules, dtype, auto_match, sources_policy, dry_run, dataset_paths):
+def index_cmd(index, match_rules, dtype, auto_match, sources_policy, dry_run, document_cache, jobs, dataset_paths):
     rules = parse_match_rules_options(index, match_rules, dtype, auto_match)
     if rules is None:
         return
 
-    # If outputting directly to terminal, show a progress bar.
-    if sys.stdout.isatty():
-        with click.progressbar(dataset_paths, label='Indexing datasets') as dataset_path_iter:
-            index_dataset_paths(sources_policy, dry_run, index, rules, dataset_path_iter)
-    else:
-        index_dataset_paths(sources_policy, dry_run, index, rules, dataset_paths)
+    with set_options(document_cache_dir=document_cache or OPTIONS['document_cache_dir']):
+        if jobs > 1:
+            index_dataset_paths_parallel(sources_policy, dry_run, index, rules, dataset_paths, jobs)
+            return
+
+        # If outputting directly to terminal, show a progress bar.
+        if sys.stdout.isatty():
+            with click.progressbar(dataset_paths, label='Indexing datasets') as dataset_path_iter:
+                index_dataset_paths(sources_policy, dry_run, index, rules, dataset_path_iter)
+        else:
+            index_dataset_paths(sources_policy, dry_run, index, rules, dataset_paths)
 
 
 def index_dataset_paths(sources_policy, dry_run, index, rules, dataset_paths):
@@ -181,10 +203,106 @@ def index_dataset_paths(sources_policy, dry_run, index, rules, dataset_paths):
         if not dry_run:
             try:
                 index.datasets.add(dataset, sources_policy=sources_policy)
-            except (ValueError, MissingRecordError) as e:
+            except _ADD_DATASET_ERRORS as e:
+                _LOG.error('Failed to add dataset %s: %s', dataset.local_uri, e)
+
+
+def index_dataset_paths_parallel(sources_policy, dry_run, index, rules, dataset_paths, jobs,
+                                 batch_size=_INDEX_BATCH_SIZE):
+    """
+    Read and match the documents of `dataset_paths` in `jobs` worker processes, while this process adds the
+    matched datasets to the index in batches.
+    """
+    # Connections mustn't be shared with the workers: close the idle ones, the index reconnects when next used
+    index.close()
+    pool = multiprocessing.Pool(jobs, initializer=_init_load_worker, initargs=(rules, dict(OPTIONS)))
+    try:
+        loaded = pool.imap_unordered(_load_dataset_path, dataset_paths)
+
+        # If outputting directly to terminal, show a progress bar.
+        if sys.stdout.isatty():
+            with click.progressbar(loaded, length=len(dataset_paths), label='Indexing datasets') as loaded:
+                _index_loaded_datasets(sources_policy, dry_run, index, rules, loaded, batch_size)
+        else:
+            _index_loaded_datasets(sources_policy, dry_run, index, rules, loaded, batch_size)
+    finally:
+        pool.terminate()
+
+
+def _index_loaded_datasets(sources_policy, dry_run, index, rules, loaded, batch_size):
+    datasets = (_dataset_from_match(match, rules) for matches in loaded for match in matches)
+    start_time = time.time()
+    count = 0
+    while True:
+        batch = list(itertools.islice(datasets, batch_size))
+        if not batch:
+            break
+        for dataset in batch:
+            _LOG.info('Matched %s', dataset)
+        if not dry_run:
+            _add_dataset_batch(index, batch, sources_policy)
+        count += len(batch)
+        _LOG.info('%s %d datasets (%.1f datasets/s)', 'Matched' if dry_run else 'Indexed',
+                  count, count / max(time.time() - start_time, 1e-6))
+
+    elapsed = time.time() - start_time
+    _LOG.info('%s %d datasets in %.1fs', 'Matched' if dry_run else 'Indexed', count, elapsed)
+
+
+def _add_dataset_batch(index, datasets, sources_policy):
+    try:
+        index.datasets.add_many(datasets, sources_policy=sources_policy, batch_size=len(datasets))
+    except _ADD_DATASET_ERRORS as batch_error:
+        # The whole batch was rolled back: add its datasets one at a time to skip only the failing ones.
+        _LOG.warning('Failed to add batch of datasets (%s), adding them individually', batch_error)
+        for dataset in datasets:
+            try:
+                index.datasets.add(dataset, sources_policy=sources_policy)
+            except _ADD_DATASET_ERRORS as e:
                 _LOG.error('Failed to add dataset %s: %s', dataset.local_uri, e)
 
 
+_WORKER_RULES = None
+
+
+def _init_load_worker(rules, options):
+    global _WORKER_RULES  # pylint: disable=global-statement
+    _WORKER_RULES = rules
+    OPTIONS.update(options)
+
+
+def _load_dataset_path(dataset_path):
+    """
+    Read and match the datasets of a path, in a worker process.
+
+    :return: the datasets as matches, which are much cheaper to send back to the indexing process
+    """
+    matches = []
+    for dataset in load_datasets([dataset_path], _WORKER_RULES):
+        try:
+            matches.append(_dataset_to_match(dataset, _WORKER_RULES))
+        except BadMatch as e:
+            _LOG.error('Unable to match Dataset %s: %s', dataset.local_uri, e)
+    return matches
+
+
+def _dataset_to_match(dataset, rules):
+    """
+    :return: (position of the dataset's product in `rules`, document, uris, {classifier: source match})
+    """
+    position = next((i for i, rule in enumerate(rules) if rule['type'] is dataset.type), None)
+    if position is None:
+        raise BadMatch('Product %s of dataset %s is not in the match rules' % (dataset.type.name, dataset.id))
+    sources = {classifier: _dataset_to_match(source, rules) for classifier, source in dataset.sources.items()}
+    return position, dataset.metadata_doc, dataset.uris, sources
+
+
+def _dataset_from_match(match, rules):
+    position, metadata_doc, uris, sources = match
+    return Dataset(rules[position]['type'], metadata_doc, uris=uris,
+                   sources={classifier: _dataset_from_match(source, rules) for classifier, source in sources.items()})
+
+
 def parse_update_rules(allow_any):
     updates = {}
     for key_str in allow_any:
@@ -200,18 +318,30 @@ def parse_update_rules(allow_any):
 @click.option('--auto-match', '-a', help="Automatically associate datasets with products by matching metadata",
               is_flag=True, default=False)
 @click.option('--dry-run', help='Check if everything is ok', is_flag=True, default=False)
+@click.option('--document-cache', type=click.Path(file_okay=False, writable=True),
+              help='Directory to cache parsed dataset documents in. Documents that are unchanged since they were '
+                   'cached are not parsed again.')
 @click.argument('datasets',
                 type=click.Path(exists=True, readable=True, writable=False), nargs=-1)
 @ui.pass_index()
-def update_cmd(index, allow_any, match_rules, dtype, auto_match, dry_run, datasets):
+def update_cmd(index, allow_any, match_rules, dtype, auto_match, dry_run, document_cache, datasets):
     rules = parse_match_rules_options(index, match_rules, dtype, auto_match)
     if rules is None:
         return
 
     updates = parse_update_rules(allow_any)
 
+    with set_options(document_cache_dir=document_cache or OPTIONS['document_cache_dir']):
+        success, fail = update_dataset_paths(index, updates, dry_run, rules, datasets)
+    echo('%d successful, %d failed' % (success, fail))
+
+
+def update_dataset_paths(index, updates, dry_run, rules, dataset_paths):
+    """
+    :return: (number of datasets updated, or that could be in a dry run, number that failed)
+    """
     success, fail = 0, 0
-    for dataset in load_datasets(datasets, rules):
+    for dataset in load_datasets(dataset_paths, rules):
         _LOG.info('Matched %s', dataset)
 
         if not dry_run:
@@ -227,7 +357,7 @@ def update_cmd(index, allow_any, match_rules, dtype, auto_match, dry_run, datase
                 success += 1
             else:
                 fail += 1
-    echo('%d successful, %d failed' % (success, fail))
+    return success, fail
 
 
 def update_dry_run(index, updates, dataset):
@@ -0,0 +1,201 @@
+# coding=utf-8
+"""
+Cache of open :mod:`rasterio` file handles, shared by the data sources of :mod:`datacube.storage.storage`.
+"""
+from __future__ import absolute_import
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import rasterio
+
+from datacube.config import OPTIONS
+
+
+class HandleCache(object):
+    """
+    Process-wide cache of open :mod:`rasterio` file handles, so repeated reads of a file don't re-open it.
+
+    A handle is only ever used by one reader at a time: :meth:`open` checks an idle handle out of the cache (or
+    opens a new one) and puts it back afterwards. Idle handles are closed when the cache holds more than
+    `max_size` of them (least recently used first), or when they have been idle for longer than `idle_timeout`
+    seconds. Both default to the ``handle_cache_size`` and ``handle_cache_idle_timeout`` options
+    (see :class:`datacube.set_options`); a size of 0 disables caching.
+
+    There is no background timer: timed out handles are closed the next time the cache is used (by :meth:`open`,
+    :meth:`stats` or :meth:`expire`). A process that stops reading keeps up to `max_size` handles open until then,
+    until :meth:`clear` is called, or until the cache itself is garbage collected.
+
+    Handles of local files are only reused while the file's modification time and size are unchanged, so a file
+    that has been rewritten in place is opened again. Checking costs an :func:`os.stat` call, which is slow on
+    network filesystems, so a file is only checked again once `check_interval` seconds have passed since it was
+    last checked. This defaults to the ``handle_cache_check_interval`` option.
+
+    The `hits`, `misses` and `evictions` counters record how effective the cache is.
+    """
+    def __init__(self, max_size=None, idle_timeout=None, opener=None, check_interval=None):
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._check_interval = check_interval
+        self._opener = opener
+
+        #: (filename, file signature, id(handle)) -> (handle, time last used, time the signature was found),
+        #: least recently used first
+        self._idle = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_size(self):
+        return OPTIONS['handle_cache_size'] if self._max_size is None else self._max_size
+
+    @property
+    def idle_timeout(self):
+        return OPTIONS['handle_cache_idle_timeout'] if self._idle_timeout is None else self._idle_timeout
+
+    @property
+    def check_interval(self):
+        return OPTIONS['handle_cache_check_interval'] if self._check_interval is None else self._check_interval
+
+    def stats(self):
+        """
+        :return: dict of the `hits`, `misses` and `evictions` counters, and the number of `idle` handles
+        """
+        self.expire()
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'idle': len(self._idle)}
+
+    @contextmanager
+    def open(self, filename):
+        """Context manager which returns an open handle for `filename`, for the exclusive use of the caller"""
+        signature, checked = self._signature(filename)
+        handle = self._checkout(filename, signature)
+        if handle is None:
+            handle = (self._opener or rasterio.open)(filename)
+
+        try:
+            yield handle
+        except BaseException:
+            # Don't hand out a handle that may have been left in a bad state
+            handle.close()
+            raise
+        self._checkin(filename, signature, checked, handle)
+
+    def expire(self):
+        """Close the idle handles that have timed out, or that are beyond `max_size`."""
+        with self._lock:
+            self._forget_if_forked()
+            to_close = self._expire(time.time())
+        for stale in to_close:
+            stale.close()
+
+    def clear(self):
+        """Close all idle handles."""
+        with self._lock:
+            self._forget_if_forked()
+            handles = [entry[0] for entry in self._idle.values()]
+            self._idle.clear()
+        for handle in handles:
+            handle.close()
+
+    def __del__(self):
+        self.clear()
+
+    def _signature(self, filename):
+        """
+        :return: (signature of `filename`, time it was found), reusing the signature of an idle handle of the file if
+            it was found less than `check_interval` seconds ago
+        """
+        now = time.time()
+        check_interval = self.check_interval
+        with self._lock:
+            for key, (_, _, checked) in reversed(self._idle.items()):
+                if key[0] == filename and now - checked < check_interval:
+                    return key[1], checked
+        return _file_signature(filename), now
+
+    def _checkout(self, filename, signature):
+        with self._lock:
+            self._forget_if_forked()
+            to_close = self._expire(time.time())
+            handle = None
+            for key in [key for key in reversed(self._idle) if key[0] == filename]:
+                if key[1] != signature:
+                    # The file has changed since this handle was opened
+                    to_close.append(self._idle.pop(key)[0])
+                    self.evictions += 1
+                elif handle is None:
+                    handle = self._idle.pop(key)[0]
+            if handle is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        for stale in to_close:
+            stale.close()
+        return handle
+
+    def _checkin(self, filename, signature, checked, handle):
+        with self._lock:
+            self._forget_if_forked()
+            now = time.time()
+            to_close = []
+            if self.max_size > 0 and not handle.closed:
+                self._idle[(filename, signature, id(handle))] = (handle, now, checked)
+            else:
+                to_close.append(handle)
+            to_close.extend(self._expire(now))
+
+        for stale in to_close:
+            stale.close()
+
+    def _expire(self, now):
+        """Remove least recently used and timed out handles from the cache. Must be called with the lock held."""
+        expired = []
+        while self._idle:
+            key = next(iter(self._idle))
+            handle, last_used, _ = self._idle[key]
+            if len(self._idle) <= self.max_size and now - last_used <= self.idle_timeout:
+                break
+            del self._idle[key]
+            expired.append(handle)
+        self.evictions += len(expired)
+        return expired
+
+    def _forget_if_forked(self):
+        # GDAL handles must not be shared with a forked child process, leave them to the parent
+        if self._pid != os.getpid():
+            self._idle = OrderedDict()
+            self._pid = os.getpid()
+
+
+def _file_signature(filename):
+    """
+    (modification time, size) of the local file behind the GDAL `filename`, or None if it isn't a local file.
+
+    >>> _file_signature('s3://bucket/key.tif') is None
+    True
+    """
+    filename = str(filename)
+    paths = [filename]
+    if ':' in filename:
+        # eg. NETCDF:/path/to/file.nc:variable
+        paths.append(filename.split(':', 1)[1].rsplit(':', 1)[0])
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            continue
+        return stat.st_mtime, stat.st_size
+    return None
+
+
+#: The handle cache used by :meth:`datacube.storage.storage.RasterioDataSource.open`
+HANDLE_CACHE = HandleCache()
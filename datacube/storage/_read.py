@@ -0,0 +1,318 @@
+# coding=utf-8
+"""
+Read a raster band into a destination grid, reading as little of the source as possible: decimated reads for
+1:1 copies and zoomed out nearest neighbour loads, overview level reads for other zoomed out loads, and otherwise
+only the window of the source under the destination.
+"""
+from __future__ import absolute_import, division
+
+import math
+
+import numpy
+import rasterio
+from affine import Affine
+
+from datacube.config import OPTIONS
+from datacube.utils import clamp, geometry
+
+try:
+    from rasterio.warp import Resampling
+except ImportError:
+    from rasterio.warp import RESAMPLING as Resampling
+
+
+def _calc_offsets_impl(off, scale, src_size, dst_size):
+    assert scale >= 1-1e-5
+
+    if off >= 0:
+        write_off = 0
+    else:
+        write_off = math.ceil((-off-0.5)/scale)
+    read_off = round((write_off+0.5)*scale-0.5+off) - round(0.5*(scale-1.0))  # assuming read_size/write_size ~= scale
+    if read_off >= src_size:
+        return 0, 0, 0, 0
+
+    write_end = dst_size
+    write_size = write_end-write_off
+    read_end = read_off+round(write_size*scale)
+    if read_end > src_size:
+        # +0.5 below is a fudge that will return last row in more situations, but will change the scale more
+        write_end = math.floor((src_size-off+0.5)/scale)
+        write_size = write_end-write_off
+        read_end = clamp(read_off+round(write_size*scale), read_off, src_size)
+    read_size = read_end-read_off
+
+    return int(read_off), int(write_off), int(read_size), int(write_size)
+
+
+def _calc_offsets2(off, scale, src_size, dst_size):
+    if scale < 0:
+        r_off, write_off, read_size, write_size = _calc_offsets_impl(off + dst_size*scale, -scale, src_size, dst_size)
+        return r_off, dst_size - write_size - write_off, read_size, write_size
+    else:
+        return _calc_offsets_impl(off, scale, src_size, dst_size)
+
+
+def _read_decimated(array_transform, src, dest_shape):
+    dy_dx = (array_transform.f, array_transform.c)
+    sy_sx = (array_transform.e, array_transform.a)
+    read, write, read_shape, write_shape = zip(*map(_calc_offsets2, dy_dx, sy_sx, src.shape, dest_shape))
+    if all(write_shape):
+        window = ((read[0], read[0] + read_shape[0]), (read[1], read[1] + read_shape[1]))
+        tmp = src.read(window=window, out_shape=write_shape)
+        scale = (read_shape[0]/write_shape[0] if sy_sx[0] > 0 else -read_shape[0]/write_shape[0],
+                 read_shape[1]/write_shape[1] if sy_sx[1] > 0 else -read_shape[1]/write_shape[1])
+        offset = (read[0] + (0 if sy_sx[0] > 0 else read_shape[0]),
+                  read[1] + (0 if sy_sx[1] > 0 else read_shape[1]))
+        transform = Affine(scale[1], 0, offset[1], 0, scale[0], offset[0])
+        return tmp[::(-1 if sy_sx[0] < 0 else 1), ::(-1 if sy_sx[1] < 0 else 1)], write, transform
+    return None, None, None
+
+
+def _no_scale(affine, eps=1e-5):
+    return abs(abs(affine.a) - 1.0) < eps and abs(abs(affine.e) - 1.0) < eps
+
+
+def _no_fractional_translate(affine, eps=0.01):
+    return abs(affine.c % 1.0) < eps and abs(affine.f % 1.0) < eps
+
+
+def _zoomed_out(affine, eps=1e-5):
+    return abs(affine.a) >= 1.0 - eps and abs(affine.e) >= 1.0 - eps
+
+
+def _can_read_decimated(array_transform, resampling):
+    """
+    Whether :func:`_read_decimated` can be used instead of reprojecting: for 1:1 copies, and for zoomed out nearest
+    neighbour reads. The latter only read one source pixel per destination pixel, which GDAL takes from the file's
+    overviews if it has any.
+    """
+    if resampling == Resampling.nearest:
+        return _no_scale(array_transform) or _zoomed_out(array_transform)
+    return _no_scale(array_transform) and _no_fractional_translate(array_transform)
+
+
+def _overview_factor(array_transform, eps=1e-5):
+    """
+    How much a zoomed out read can be decimated before resampling: the largest power of two no bigger than the
+    zoom out factor, which is the overview level GDAL would pick. 1 when not zoomed out by at least 2.
+    """
+    if abs(array_transform.b) > eps or abs(array_transform.d) > eps:
+        return 1
+    scale = min(abs(array_transform.a), abs(array_transform.e))
+    factor = 1
+    while factor * 2 <= scale + eps:
+        factor *= 2
+    return factor
+
+
+def read_from_source(source, dest, dst_transform, dst_nodata, dst_projection, resampling):
+    """
+    Read from `source` into `dest`, reprojecting if necessary.
+
+    Sources whose footprint doesn't overlap `dest` are not opened at all.
+
+    :param RasterioDataSource source: Data source
+    :param numpy.ndarray dest: Data destination
+    """
+    if not _source_overlaps(source, dest.shape, dst_transform, dst_projection):
+        dest.fill(dst_nodata)
+        return
+
+    with source.open() as src:
+        _read_from_band(src, dest, dst_transform, dst_nodata, dst_projection, resampling)
+
+
+def _extent_pixel_bounds(extent, dst_transform, dst_projection):
+    """
+    Rows and columns of the grid given by `dst_transform` and `dst_projection` that `extent` may touch, as
+    ((row_start, row_stop), (col_start, col_stop)), padded by a pixel for resampling.
+
+    Only the bounding box of `extent` is used, so this errs on the side of including too much.
+
+    :param geometry.Geometry extent: footprint, may be None
+    :return: pixel ranges, or None if they are unknown
+    """
+    if extent is None:
+        return None
+
+    bbox = extent.to_crs(dst_projection).boundingbox
+    inverse = ~dst_transform
+    cols, rows = zip(*[inverse * (x, y) for x in (bbox.left, bbox.right) for y in (bbox.bottom, bbox.top)])
+    if not numpy.isfinite(cols + rows).all():
+        return None
+
+    return ((int(math.floor(min(rows))) - 1, int(math.ceil(max(rows))) + 1),
+            (int(math.floor(min(cols))) - 1, int(math.ceil(max(cols))) + 1))
+
+
+def _source_overlaps(source, shape, dst_transform, dst_projection):
+    """
+    Whether `source` may have data for a destination array of `shape`, judged from its footprint without opening it.
+    Errs on the side of True when unsure.
+    """
+    get_extent = getattr(source, 'get_extent', None)
+    if get_extent is None or not isinstance(dst_projection, geometry.CRS):
+        return True
+
+    extent = get_extent()
+    if not isinstance(extent, geometry.Geometry):
+        return True
+
+    bounds = _extent_pixel_bounds(extent, dst_transform, dst_projection)
+    if bounds is None:
+        return True
+
+    (row_start, row_stop), (col_start, col_stop) = bounds
+    return row_start < shape[0] and row_stop > 0 and col_start < shape[1] and col_stop > 0
+
+
+def _read_from_band(src, dest, dst_transform, dst_nodata, dst_projection, resampling):
+    """
+    Read from the already opened band `src` into `dest`, reprojecting if necessary.
+
+    :param BandDataSource src: Band data source, as returned by opening a :class:`RasterioDataSource`
+    :param numpy.ndarray dest: Data destination
+    """
+    array_transform = ~src.transform * dst_transform
+    # if the CRS is the same use decimated reads if possible (NN or 1:1 scaling)
+    if src.crs == dst_projection and _can_read_decimated(array_transform, resampling):
+        dest.fill(dst_nodata)
+        tmp, offset, _ = _read_decimated(array_transform, src, dest.shape)
+        if tmp is None:
+            return
+        dest = dest[offset[0]:offset[0] + tmp.shape[0], offset[1]:offset[1] + tmp.shape[1]]
+        numpy.copyto(dest, tmp, where=(tmp != src.nodata))
+        return
+
+    window = _source_window(src, dest.shape, dst_transform, dst_projection)
+    if window is not None and not all(window_size for window_size in _window_shape(window)):
+        dest.fill(dst_nodata)
+        return
+
+    if dest.dtype == numpy.dtype('int8'):
+        dest = dest.view(dtype='uint8')
+        dst_nodata = dst_nodata.astype('uint8')
+
+    # Zoomed out reads resample from an overview level (or a decimated read) instead of the full resolution
+    factor = _overview_factor(array_transform) if src.crs == dst_projection else 1
+    if window is None and factor == 1:
+        src.reproject(dest,
+                      dst_transform=dst_transform,
+                      dst_crs=str(dst_projection),
+                      dst_nodata=dst_nodata,
+                      resampling=resampling,
+                      NUM_THREADS=OPTIONS['reproject_threads'])
+        return
+
+    # Only read, and reproject from, the part of the source under the destination
+    if window is None:
+        window = ((0, src.shape[0]), (0, src.shape[1]))
+    data, src_transform = _read_window(src, window, factor)
+    src_nodata = src.nodata
+    if data.dtype == numpy.dtype('int8'):
+        data = data.view(dtype='uint8')
+        if src_nodata is not None:
+            src_nodata = numpy.asarray(src_nodata).astype('uint8')
+    rasterio.warp.reproject(data,
+                            dest,
+                            src_transform=src_transform,
+                            src_crs=str(src.crs),
+                            src_nodata=src_nodata,
+                            dst_transform=dst_transform,
+                            dst_crs=str(dst_projection),
+                            dst_nodata=dst_nodata,
+                            resampling=resampling,
+                            NUM_THREADS=OPTIONS['reproject_threads'])
+
+
+def _window_shape(window):
+    return tuple(stop - start for start, stop in window)
+
+
+def _read_window(src, window, factor=1):
+    """
+    Read `window` of `src`, decimated by `factor` in each direction.
+
+    Each pixel of a decimated read covers a `factor` by `factor` block of the source (GDAL uses the file's overviews
+    for this when it has them), so the window is made a whole number of blocks.
+
+    :return: (data, the transform of `data`)
+    """
+    aligned = _aligned_window(window, factor, src.shape) if factor > 1 else None
+    if aligned is None:
+        (row_start, _), (col_start, _) = window
+        return src.read(window=window), src.transform * Affine.translation(col_start, row_start)
+
+    (row_start, _), (col_start, _) = aligned
+    height, width = _window_shape(aligned)
+    data = src.read(window=aligned, out_shape=(height // factor, width // factor))
+    # Each pixel of `data` covers a block, starting from the corner of the window
+    transform = src.transform * Affine.translation(col_start, row_start) * Affine.scale(factor, factor)
+    return data, transform
+
+
+def _aligned_window(window, factor, src_shape):
+    """
+    Grow `window` to a multiple of `factor` pixels in each direction, staying within `src_shape`. Where the source
+    isn't a whole number of blocks the last partial block is left out, as it is less than a decimated pixel.
+
+    :return: the aligned window, or None if the source is smaller than a block
+    """
+    aligned = []
+    for (start, stop), size in zip(window, src_shape):
+        length = min(int(math.ceil((stop - start) / factor)), size // factor) * factor
+        if length == 0:
+            return None
+        start = min(start, size - length)
+        aligned.append((start, start + length))
+    return tuple(aligned)
+
+
+def _source_window(src, dest_shape, dst_transform, dst_projection, margin=3):
+    """
+    Window of `src` that reprojecting into the destination can touch: the destination bounds, transformed to the
+    source CRS, padded by `margin` destination pixels' worth of source pixels for the resampling kernel.
+
+    :return: ((row_start, row_stop), (col_start, col_stop)) within the source, or None to use all of it
+    """
+    corners = _destination_corners_in_source(src, dest_shape, dst_transform, dst_projection)
+    if corners is None:
+        return None
+
+    rows, cols = corners
+    height, width = dest_shape
+    scale = max((max(rows) - min(rows)) / height, (max(cols) - min(cols)) / width, 1)
+    pad = int(math.ceil(margin * scale))
+
+    src_height, src_width = src.shape
+    window = ((clamp(int(math.floor(min(rows))) - pad, 0, src_height),
+               clamp(int(math.ceil(max(rows))) + pad, 0, src_height)),
+              (clamp(int(math.floor(min(cols))) - pad, 0, src_width),
+               clamp(int(math.ceil(max(cols))) + pad, 0, src_width)))
+    if window == ((0, src_height), (0, src_width)):
+        return None
+    return window
+
+
+def _destination_corners_in_source(src, dest_shape, dst_transform, dst_projection):
+    """
+    Corners of the bounding box of the destination, transformed to the source CRS, in source pixel coordinates.
+
+    :return: (rows, cols) of the corners, or None if they can't be worked out
+    """
+    height, width = dest_shape
+    xs, ys = zip(*[dst_transform * corner for corner in ((0, 0), (width, 0), (0, height), (width, height))])
+    try:
+        bounds = rasterio.warp.transform_bounds(str(dst_projection), str(src.crs),
+                                                min(xs), min(ys), max(xs), max(ys), densify_pts=21)
+    except Exception:  # pylint: disable=broad-except
+        # Best effort, eg. the destination extends beyond the valid area of the source CRS
+        return None
+    if not numpy.isfinite(bounds).all():
+        return None
+
+    left, bottom, right, top = bounds
+    inverse = ~src.transform
+    cols, rows = zip(*[inverse * (x, y) for x in (left, right) for y in (bottom, top)])
+    return rows, cols
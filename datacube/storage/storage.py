@@ -12,17 +12,20 @@ from __future__ import absolute_import, division, print_function
 
 import logging
 import math
+import threading
+from collections import OrderedDict
 from contextlib import contextmanager
 from pathlib import Path
 from abc import ABCMeta, abstractmethod
 from six import add_metaclass
 
 from datacube.compat import urlparse, urljoin, url_parse_module
-from datacube.config import OPTIONS
 from datacube.model import Dataset
 from datacube.storage import netcdf_writer
+from datacube.storage._handles import HandleCache, HANDLE_CACHE
+from datacube.storage._read import read_from_source, _read_from_band, _source_overlaps
 from datacube.drivers.datasource import DataSource
-from datacube.utils import clamp, datetime_to_seconds_since_1970, DatacubeException, ignore_exceptions_if
+from datacube.utils import datetime_to_seconds_since_1970, DatacubeException, ignore_exceptions_if
 from datacube.utils import geometry
 from datacube.utils import is_url, uri_to_local_path
 
@@ -80,132 +83,281 @@ else:
         return src.affine
 
 
-def _calc_offsets_impl(off, scale, src_size, dst_size):
-    assert scale >= 1-1e-5
+def reproject_and_fuse(sources, destination, dst_transform, dst_projection, dst_nodata,
+                       resampling='nearest', fuse_func=None, skip_broken_datasets=False):
+    """
+    Reproject and fuse `sources` into a 2D numpy array `destination`.
 
-    if off >= 0:
-        write_off = 0
-    else:
-        write_off = math.ceil((-off-0.5)/scale)
-    read_off = round((write_off+0.5)*scale-0.5+off) - round(0.5*(scale-1.0))  # assuming read_size/write_size ~= scale
-    if read_off >= src_size:
-        return 0, 0, 0, 0
-
-    write_end = dst_size
-    write_size = write_end-write_off
-    read_end = read_off+round(write_size*scale)
-    if read_end > src_size:
-        # +0.5 below is a fudge that will return last row in more situations, but will change the scale more
-        write_end = math.floor((src_size-off+0.5)/scale)
-        write_size = write_end-write_off
-        read_end = clamp(read_off+round(write_size*scale), read_off, src_size)
-    read_size = read_end-read_off
-
-    return int(read_off), int(write_off), int(read_size), int(write_size)
-
-
-def _calc_offsets2(off, scale, src_size, dst_size):
-    if scale < 0:
-        r_off, write_off, read_size, write_size = _calc_offsets_impl(off + dst_size*scale, -scale, src_size, dst_size)
-        return r_off, dst_size - write_size - write_off, read_size, write_size
+    With the default fuser, remaining sources are not read once `destination` has no nodata pixels left.
+
+    :param List[RasterioDataSource] sources: Data sources to open and read from
+    :param numpy.ndarray destination: ndarray of appropriate size to read data into
+    :type resampling: str
+    :type fuse_func: callable or None
+    :param bool skip_broken_datasets: Carry on in the face of adversity and failing reads.
+    """
+    fuser = OrderedFuser(destination, len(sources), dst_transform, dst_projection, dst_nodata,
+                         resampling=resampling, fuse_func=fuse_func, skip_broken_datasets=skip_broken_datasets)
+    if len(sources) > 1:
+        # Muitiple sources, we need to fuse them together into a single array
+        buffer_ = numpy.empty(destination.shape, dtype=destination.dtype)
     else:
-        return _calc_offsets_impl(off, scale, src_size, dst_size)
+        buffer_ = None
 
+    for position, source in enumerate(sources):
+        fuser.read(position, source, buffer_)
 
-def _read_decimated(array_transform, src, dest_shape):
-    dy_dx = (array_transform.f, array_transform.c)
-    sy_sx = (array_transform.e, array_transform.a)
-    read, write, read_shape, write_shape = zip(*map(_calc_offsets2, dy_dx, sy_sx, src.shape, dest_shape))
-    if all(write_shape):
-        window = ((read[0], read[0] + read_shape[0]), (read[1], read[1] + read_shape[1]))
-        tmp = src.read(window=window, out_shape=write_shape)
-        scale = (read_shape[0]/write_shape[0] if sy_sx[0] > 0 else -read_shape[0]/write_shape[0],
-                 read_shape[1]/write_shape[1] if sy_sx[1] > 0 else -read_shape[1]/write_shape[1])
-        offset = (read[0] + (0 if sy_sx[0] > 0 else read_shape[0]),
-                  read[1] + (0 if sy_sx[1] > 0 else read_shape[1]))
-        transform = Affine(scale[1], 0, offset[1], 0, scale[0], offset[0])
-        return tmp[::(-1 if sy_sx[0] < 0 else 1), ::(-1 if sy_sx[1] < 0 else 1)], write, transform
-    return None, None, None
+    return destination
 
 
-def _no_scale(affine, eps=1e-5):
-    return abs(abs(affine.a) - 1.0) < eps and abs(abs(affine.e) - 1.0) < eps
+def _nodata_mask(data, nodata):
+    """
+    :return: boolean array, True where `data` is `nodata`
+    """
+    if data.dtype.kind == 'f' and numpy.isnan(nodata):
+        return numpy.isnan(data)
+    return data == nodata
 
 
-def _no_fractional_translate(affine, eps=0.01):
-    return abs(affine.c % 1.0) < eps and abs(affine.f % 1.0) < eps
+class OrderedFuser(object):
+    """
+    Reproject and fuse a known number of sources into a 2D numpy array `destination`, in a fixed order.
 
+    Sources may be read concurrently from several threads, each calling :meth:`read` with the position of its
+    source. Fusing into `destination` happens strictly in position order, so the result is the same as with
+    :func:`reproject_and_fuse`.
 
-def read_from_source(source, dest, dst_transform, dst_nodata, dst_projection, resampling):
+    The default fuser keeps track of the pixels that are still nodata. Once there are none left, :attr:`is_full`
+    is set and later sources are skipped without being read.
     """
-    Read from `source` into `dest`, reprojecting if necessary.
+    def __init__(self, destination, num_sources, dst_transform, dst_projection, dst_nodata,
+                 resampling='nearest', fuse_func=None, skip_broken_datasets=False):
+        """
+        :param numpy.ndarray destination: ndarray of appropriate size to read data into
+        :param int num_sources: number of sources that will be read into `destination`
+        :type resampling: str
+        :type fuse_func: callable or None
+        :param bool skip_broken_datasets: Carry on in the face of adversity and failing reads.
+        """
+        assert len(destination.shape) == 2
 
-    :param RasterioDataSource source: Data source
-    :param numpy.ndarray dest: Data destination
-    """
-    with source.open() as src:
-        array_transform = ~src.transform * dst_transform
-        # if the CRS is the same use decimated reads if possible (NN or 1:1 scaling)
-        if src.crs == dst_projection and _no_scale(array_transform) and (resampling == Resampling.nearest or
-                                                                         _no_fractional_translate(array_transform)):
-            dest.fill(dst_nodata)
-            tmp, offset, _ = _read_decimated(array_transform, src, dest.shape)
-            if tmp is None:
-                return
-            dest = dest[offset[0]:offset[0] + tmp.shape[0], offset[1]:offset[1] + tmp.shape[1]]
-            numpy.copyto(dest, tmp, where=(tmp != src.nodata))
-        else:
-            if dest.dtype == numpy.dtype('int8'):
-                dest = dest.view(dtype='uint8')
-                dst_nodata = dst_nodata.astype('uint8')
-            src.reproject(dest,
-                          dst_transform=dst_transform,
-                          dst_crs=str(dst_projection),
-                          dst_nodata=dst_nodata,
-                          resampling=resampling,
-                          NUM_THREADS=OPTIONS['reproject_threads'])
+        self.destination = destination
+        self.num_sources = num_sources
+        self.dst_transform = dst_transform
+        self.dst_projection = dst_projection
+        self.dst_nodata = dst_nodata
+        self.resampling = _rasterio_resampling_method(resampling)
+        self.fuse_func = fuse_func or self._copyto_fuser
+        self.skip_broken_datasets = skip_broken_datasets
 
+        # Pixels not yet filled by any source, only known when using the default fuser
+        self._missing = None if fuse_func else numpy.ones(destination.shape, dtype=numpy.bool_)
+        self.is_full = False
 
-def reproject_and_fuse(sources, destination, dst_transform, dst_projection, dst_nodata,
-                       resampling='nearest', fuse_func=None, skip_broken_datasets=False):
+        self._next_position = 0
+        self._turn = threading.Condition()
+
+        destination.fill(dst_nodata)
+
+    def _copyto_fuser(self, dest, src):
+        """
+        :type dest: numpy.ndarray
+        :type src: numpy.ndarray
+        """
+        numpy.copyto(dest, src, where=self._missing)
+        self._missing &= _nodata_mask(src, self.dst_nodata)
+        self.is_full = not self._missing.any()
+
+    def read(self, position, source, buffer_=None):
+        """
+        Read `source` and fuse it into the destination once all sources before `position` have been fused.
+
+        :param int position: order of this source, from 0 to `num_sources` - 1
+        :param RasterioDataSource source: Data source to open and read from
+        :param numpy.ndarray buffer_: Optional scratch array, shaped like the destination, owned by the caller
+        """
+        self._read(position, read_from_source, source, buffer_)
+
+    def read_band(self, position, band, buffer_=None):
+        """
+        Like :meth:`read`, but from a band data source that has already been opened.
+
+        :param BandDataSource band: Band data source to read from
+        """
+        self._read(position, _read_from_band, band, buffer_)
+
+    def overlaps(self, source):
+        """
+        Whether the footprint of `source` overlaps the destination, so reading it may change the result.
+        """
+        return _source_overlaps(source, self.destination.shape, self.dst_transform, self.dst_projection)
+
+    def skip(self, position):
+        """
+        Give up the turn of the source at `position` without reading it.
+        """
+        self._fuse_in_turn(position, None)
+
+    def _read(self, position, reader, source, buffer_):
+        if self.num_sources == 1:
+            # Single source, read straight into the destination
+            with ignore_exceptions_if(self.skip_broken_datasets):
+                reader(source, self.destination, self.dst_transform, self.dst_nodata,
+                       self.dst_projection, self.resampling)
+            return
+
+        if self.is_full:
+            # Earlier sources have already filled every pixel
+            self._fuse_in_turn(position, None)
+            return
+
+        if buffer_ is None:
+            buffer_ = numpy.empty(self.destination.shape, dtype=self.destination.dtype)
+
+        data = None
+        try:
+            with ignore_exceptions_if(self.skip_broken_datasets):
+                reader(source, buffer_, self.dst_transform, self.dst_nodata,
+                       self.dst_projection, self.resampling)
+                data = buffer_
+        finally:
+            # Always take our turn, even on failure, so later sources are not left waiting
+            self._fuse_in_turn(position, data)
+
+    def _fuse_in_turn(self, position, data):
+        with self._turn:
+            while self._next_position != position:
+                self._turn.wait()
+            try:
+                if data is not None and not self.is_full:
+                    with ignore_exceptions_if(self.skip_broken_datasets):
+                        self.fuse_func(self.destination, data)
+            finally:
+                self._next_position += 1
+                self._turn.notify_all()
+
+
+def read_and_fuse_bands(source, fusers, position, skip_broken_datasets=False):
     """
-    Reproject and fuse `sources` into a 2D numpy array `destination`.
+    Read every band of `source` into its fuser, opening each distinct file only once.
 
-    :param List[RasterioDataSource] sources: Data sources to open and read from
-    :param numpy.ndarray destination: ndarray of appropriate size to read data into
-    :type resampling: str
-    :type fuse_func: callable or None
+    :param MultiBandDataSource source: Bands to read, from a single dataset
+    :param List[OrderedFuser] fusers: One fuser per band of `source`, in the same order
+    :param int position: order of `source` within the sources of each fuser
     :param bool skip_broken_datasets: Carry on in the face of adversity and failing reads.
     """
-    assert len(destination.shape) == 2
+    started = 0
+    try:
+        if all(fuser.is_full for fuser in fusers) or not fusers[0].overlaps(source):
+            # Nothing left to fill in any band, don't even open the files
+            return
+
+        with ignore_exceptions_if(skip_broken_datasets):
+            with source.open() as bands:
+                for band, fuser in zip(bands, fusers):
+                    started += 1
+                    fuser.read_band(position, band)
+    finally:
+        # Bands we never got to still need to give up their turn
+        for fuser in fusers[started:]:
+            fuser.skip(position)
+
 
-    resampling = _rasterio_resampling_method(resampling)
+def read_points(source, points):
+    """
+    Read the pixels containing `points` from every band of `source`, without reading anything else.
 
-    def copyto_fuser(dest, src):
+    :param MultiBandDataSource source: Bands to read, from a single dataset
+    :param list points: :class:`datacube.utils.geometry.Geometry` points, in any CRS
+    :return: one (values, valid) pair of arrays per band, each with an entry per point. `valid` is False for
+        points outside the band, or where it is nodata.
+    """
+    results = []
+    with source.open() as bands:
+        crs, pixels = None, None
+        for band in bands:
+            if crs is None or band.crs != crs:
+                crs = band.crs
+                inverse = ~band.transform
+                pixels = [inverse * point.to_crs(crs).coords[0] for point in points]
+
+            values = numpy.zeros(len(points), dtype=band.dtype)
+            valid = numpy.zeros(len(points), dtype=numpy.bool_)
+            height, width = band.shape
+            for i, (col, row) in enumerate(pixels):
+                row, col = int(math.floor(row)), int(math.floor(col))
+                if 0 <= row < height and 0 <= col < width:
+                    values[i] = band.read(window=((row, row + 1), (col, col + 1))).item(0)
+                    valid[i] = True
+            if band.nodata is not None:
+                valid &= ~_nodata_mask(values, band.nodata)
+            results.append((values, valid))
+    return results
+
+
+class MultiBandDataSource(object):
+    """
+    Several bands of one dataset, read together.
+
+    Bands stored in the same file (eg. a multi-band GeoTIFF) share a single open file handle, so the file and its
+    metadata are only read once however many bands are requested.
+    """
+    def __init__(self, sources):
         """
-        :type dest: numpy.ndarray
-        :type src: numpy.ndarray
+        :param list sources: One data source per band. :class:`RasterioDataSource` objects with the same
+            `filename` share an open file.
         """
-        numpy.copyto(dest, src, where=(dest == dst_nodata))
+        self.sources = list(sources)
 
-    fuse_func = fuse_func or copyto_fuser
+    def get_extent(self):
+        """The footprint of the dataset, or None if unknown"""
+        return self.sources[0].get_extent() if self.sources else None
 
-    destination.fill(dst_nodata)
-    if len(sources) == 0:
-        return destination
-    elif len(sources) == 1:
-        with ignore_exceptions_if(skip_broken_datasets):
-            read_from_source(sources[0], destination, dst_transform, dst_nodata, dst_projection, resampling)
-        return destination
-    else:
-        # Muitiple sources, we need to fuse them together into a single array
-        buffer_ = numpy.empty(destination.shape, dtype=destination.dtype)
-        for source in sources:
-            with ignore_exceptions_if(skip_broken_datasets):
-                read_from_source(source, buffer_, dst_transform, dst_nodata, dst_projection, resampling)
-                fuse_func(destination, buffer_)
+    def _file_groups(self):
+        groups = OrderedDict()
+        for index, source in enumerate(self.sources):
+            if isinstance(source, RasterioDataSource):
+                key = source.filename
+            else:
+                key = id(source)
+            groups.setdefault(key, []).append(index)
+        return list(groups.values())
 
-        return destination
+    def split_by_file(self):
+        """
+        Split into one :class:`MultiBandDataSource` per distinct file, so that files can be read independently.
+
+        :return: list of (band indices, :class:`MultiBandDataSource`) pairs
+        """
+        return [(indices, MultiBandDataSource([self.sources[index] for index in indices]))
+                for indices in self._file_groups()]
+
+    @contextmanager
+    def open(self):
+        """Context manager which returns a list of band data sources, in the same order as `sources`"""
+        bands = [None] * len(self.sources)
+        with self._open_groups(self._file_groups(), bands):
+            yield bands
+
+    @contextmanager
+    def _open_groups(self, groups, bands):
+        if not groups:
+            yield
+            return
+
+        indices = groups[0]
+        first = self.sources[indices[0]]
+        if len(indices) == 1:
+            with first.open() as band:
+                bands[indices[0]] = band
+                with self._open_groups(groups[1:], bands):
+                    yield
+        else:
+            with first.open_file() as src:
+                for index in indices:
+                    bands[index] = self.sources[index].band_source(src)
+                with self._open_groups(groups[1:], bands):
+                    yield
 
 
 class BandDataSource(object):
@@ -347,7 +499,7 @@ class OverrideBandDataSource(object):
         return self.source.ds.read(indexes=self.source.bidx, window=window, out_shape=out_shape)
 
     def reproject(self, dest, dst_transform, dst_crs, dst_nodata, resampling, **kwargs):
-        source = self.read()  # TODO: read only the part the we care about
+        source = self.read()
         return rasterio.warp.reproject(source,
                                        dest,
                                        src_transform=self.transform,
@@ -381,43 +533,62 @@ class RasterioDataSource(DataSource):
     @contextmanager
     def open(self):
         """Context manager which returns a :class:`BandDataSource`"""
+        with self.open_file() as src:
+            yield self.band_source(src)
+
+    @contextmanager
+    def open_file(self):
+        """
+        Context manager which returns the open :class:`rasterio.DatasetReader`
+
+        Handles are reused through :data:`HANDLE_CACHE`, so repeated reads of the same file only open it once.
+        """
         try:
             _LOG.debug("opening %s", self.filename)
-            with rasterio.open(self.filename) as src:
-                override = False
-
-                transform = _rasterio_transform(src)
-                if transform.is_identity:
-                    override = True
-                    transform = self.get_transform(src.shape)
-
-                try:
-                    crs = geometry.CRS(_rasterio_crs_wkt(src))
-                except ValueError:
-                    override = True
-                    crs = self.get_crs()
-
-                # The 1.0 onwards release of rasterio has a bug that means it
-                # cannot read multiband data into a numpy array during reprojection
-                # We override it here to force the reading and reprojection into separate steps
-                # TODO: Remove when rasterio bug fixed
-                bandnumber = self.get_bandnumber(src)
-                if bandnumber > 1 and str(rasterio.__version__) >= '1.0':
-                    override = True
-
-                band = rasterio.band(src, bandnumber)
-                nodata = numpy.dtype(band.dtype).type(src.nodatavals[0] if src.nodatavals[0] is not None
-                                                      else self.nodata)
-
-                if override:
-                    yield OverrideBandDataSource(band, nodata=nodata, crs=crs, transform=transform)
-                else:
-                    yield BandDataSource(band, nodata=nodata)
+            with HANDLE_CACHE.open(self.filename) as src:
+                yield src
 
         except Exception as e:
             _LOG.error("Error opening source dataset: %s", self.filename)
             raise e
 
+    def band_source(self, src):
+        """
+        Band data source for this source's band of `src`, which may be shared with other bands of the same file.
+
+        :param rasterio.DatasetReader src: the file opened by :meth:`open_file`
+        :rtype: BandDataSource or OverrideBandDataSource
+        """
+        override = False
+
+        transform = _rasterio_transform(src)
+        if transform.is_identity:
+            override = True
+            transform = self.get_transform(src.shape)
+
+        try:
+            crs = geometry.CRS(_rasterio_crs_wkt(src))
+        except ValueError:
+            override = True
+            crs = self.get_crs()
+
+        # The 1.0 onwards release of rasterio has a bug that means it
+        # cannot read multiband data into a numpy array during reprojection
+        # We override it here to force the reading and reprojection into separate steps
+        # TODO: Remove when rasterio bug fixed
+        bandnumber = self.get_bandnumber(src)
+        if bandnumber > 1 and str(rasterio.__version__) >= '1.0':
+            override = True
+
+        band = rasterio.band(src, bandnumber)
+        nodata = numpy.dtype(band.dtype).type(src.nodatavals[0] if src.nodatavals[0] is not None
+                                              else self.nodata)
+
+        if override:
+            return OverrideBandDataSource(band, nodata=nodata, crs=crs, transform=transform)
+        else:
+            return BandDataSource(band, nodata=nodata)
+
 
 class RasterFileDataSource(RasterioDataSource):
     def __init__(self, filename, bandnumber, nodata=None, crs=None, transform=None):
@@ -578,6 +749,9 @@ class RasterDatasetSource(RasterioDataSource):
     def get_crs(self):
         return self._dataset.crs
 
+    def get_extent(self):
+        return self._dataset.extent
+
 
 def create_netcdf_storage_unit(filename,
                                crs, coordinates, variables, variable_params, global_attributes=None,
@@ -6,12 +6,14 @@ from __future__ import absolute_import, division, print_function
 
 import os
 import gzip
+import hashlib
 import importlib
 import itertools
 import json
 import logging
 import pathlib
 import re
+import time as _time
 from collections import OrderedDict
 from contextlib import contextmanager
 from datetime import datetime, date
@@ -26,6 +28,7 @@ import numpy
 import xarray
 import yaml
 from dateutil.tz import tzutc
+from six.moves import cPickle as pickle
 
 try:
     from yaml import CSafeLoader as SafeLoader
@@ -33,6 +36,7 @@ except ImportError:
     from yaml import SafeLoader
 
 from datacube import compat
+from datacube.config import OPTIONS
 
 _LOG = logging.getLogger(__name__)
 
@@ -247,41 +251,130 @@ def read_documents(*paths):
     the datacube we use JSON in PostgreSQL and it will turn our dates
     to strings anyway.
 
+    If the ``document_cache_dir`` option is set (see :class:`datacube.set_options`), parsed documents are
+    cached in that directory, and files that haven't changed since they were cached aren't parsed again.
+    The cache holds one entry per file. Entries older than the ``document_cache_max_age`` option are removed
+    when the cache is first written to in a process. The directory can also be deleted at any time.
+
     :type paths: pathlib.Path
     :rtype: tuple[(pathlib.Path, dict)]
     """
+    cache_dir = OPTIONS.get('document_cache_dir')
     for path in paths:
         path = pathlib.Path(path)
-        suffix = path.suffix.lower()
+        if cache_dir:
+            for parsed_doc in _read_cached_documents(path, cache_dir):
+                yield path, parsed_doc
+        else:
+            for parsed_doc in _parse_documents(path):
+                yield path, parsed_doc
 
-        # If compressed, open as gzip stream.
-        opener = open
-        if suffix == '.gz':
-            suffix = path.suffixes[-2].lower()
-            opener = gzip.open
 
-        if suffix in ('.yaml', '.yml'):
-            try:
-                with opener(str(path), 'r') as handle:
-                    for parsed_doc in yaml.load_all(handle, Loader=NoDatesSafeLoader):
-                        yield path, parsed_doc
-            except yaml.YAMLError as e:
-                raise InvalidDocException('Failed to load %s: %s' % (path, e))
-        elif suffix == '.json':
-            try:
-                with opener(str(path), 'r') as handle:
-                    yield path, json.load(handle)
-            except ValueError as e:
-                raise InvalidDocException('Failed to load %s: %s' % (path, e))
-        elif suffix == '.nc':
-            try:
-                for doc in read_strings_from_netcdf(path, variable='dataset'):
-                    yield path, yaml.load(doc, Loader=NoDatesSafeLoader)
-            except Exception as e:
-                raise InvalidDocException('Unable to load dataset information from NetCDF file: %s. %s' % (path, e))
-        else:
-            raise ValueError('Unknown document type for {}; expected one of {!r}.'
-                             .format(path.name, _ALL_SUPPORTED_EXTENSIONS))
+def _parse_documents(path):
+    suffix = path.suffix.lower()
+
+    # If compressed, open as gzip stream.
+    opener = open
+    if suffix == '.gz':
+        suffix = path.suffixes[-2].lower()
+        opener = gzip.open
+
+    if suffix in ('.yaml', '.yml'):
+        try:
+            # Give the parser bytes: libyaml decodes them much faster than reading decoded text from Python.
+            with opener(str(path), 'rb') as handle:
+                for parsed_doc in yaml.load_all(handle, Loader=NoDatesSafeLoader):
+                    yield parsed_doc
+        except yaml.YAMLError as e:
+            raise InvalidDocException('Failed to load %s: %s' % (path, e))
+    elif suffix == '.json':
+        try:
+            with opener(str(path), 'r') as handle:
+                yield json.load(handle)
+        except ValueError as e:
+            raise InvalidDocException('Failed to load %s: %s' % (path, e))
+    elif suffix == '.nc':
+        try:
+            for doc in read_strings_from_netcdf(path, variable='dataset'):
+                yield yaml.load(doc, Loader=NoDatesSafeLoader)
+        except Exception as e:
+            raise InvalidDocException('Unable to load dataset information from NetCDF file: %s. %s' % (path, e))
+    else:
+        raise ValueError('Unknown document type for {}; expected one of {!r}.'
+                         .format(path.name, _ALL_SUPPORTED_EXTENSIONS))
+
+
+def _read_cached_documents(path, cache_dir):
+    """
+    Parsed documents of a file, from the cache if the file hasn't changed since they were cached.
+
+    Each file has one cache entry, named after its absolute path, which is replaced when the file changes.
+    Writing an entry prunes the cache once per process, see :func:`_prune_document_cache`.
+
+    .. warning::
+        Cached documents are unpickled, which can run arbitrary code. Only use a cache directory that nobody
+        you don't trust can write to.
+
+    :param pathlib.Path path: document file
+    :param str cache_dir: directory of the cache
+    :rtype: list[dict]
+    """
+    stat = path.stat()
+    absolute_path = str(path.absolute())
+    key = (absolute_path, getattr(stat, 'st_mtime_ns', stat.st_mtime), stat.st_size)
+    cache_path = os.path.join(cache_dir, hashlib.sha1(absolute_path.encode('utf-8')).hexdigest() + '.pickle')
+
+    try:
+        with open(cache_path, 'rb') as handle:
+            cached_key, parsed_docs = pickle.load(handle)
+        if cached_key == key:
+            return parsed_docs
+    except (IOError, OSError):
+        pass
+    except Exception as e:  # pylint: disable=broad-except
+        _LOG.warning('Ignoring unreadable cached documents of %s: %s', path, e)
+
+    parsed_docs = list(_parse_documents(path))
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        _prune_document_cache(cache_dir)
+        # Write to a temporary file first, so concurrent readers never see a partly written one.
+        temp_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+        with open(temp_path, 'wb') as handle:
+            pickle.dump((key, parsed_docs), handle, pickle.HIGHEST_PROTOCOL)
+        os.rename(temp_path, cache_path)
+    except (IOError, OSError) as e:
+        _LOG.warning('Unable to cache documents of %s: %s', path, e)
+    return parsed_docs
+
+
+_PRUNED_DOCUMENT_CACHES = set()
+
+
+def _prune_document_cache(cache_dir):
+    """
+    Remove the entries of the document cache in `cache_dir` written more than ``document_cache_max_age`` seconds
+    ago, and temporary files left behind, the first time it is called for `cache_dir` in this process.
+
+    Entries of files that were deleted or moved are never read again, this keeps them from piling up. Entries
+    still in use are written again the next time their file is read.
+    """
+    if cache_dir in _PRUNED_DOCUMENT_CACHES:
+        return
+    _PRUNED_DOCUMENT_CACHES.add(cache_dir)
+
+    oldest = _time.time() - OPTIONS['document_cache_max_age']
+    for name in os.listdir(cache_dir):
+        if not name.endswith(('.pickle', '.tmp')):
+            continue
+        entry_path = os.path.join(cache_dir, name)
+        try:
+            if os.path.getmtime(entry_path) < oldest:
+                os.remove(entry_path)
+        except OSError:
+            # Removed by another process pruning at the same time
+            pass
 
 
 def netcdf_extract_string(chars):
@@ -393,6 +486,29 @@ class cached_property(object):  # pylint: disable=invalid-name
         return value
 
 
+class cached_slot_property(property):  # pylint: disable=invalid-name
+    """ Like :class:`cached_property`, for classes with ``__slots__``. The value is kept in the slot named
+        ``_cached_<name>``, which the class must declare. Deleting that attribute resets the property.
+        """
+
+    def __init__(self, func):
+        super(cached_slot_property, self).__init__(func)
+        self.__doc__ = getattr(func, '__doc__')
+        self.func = func
+        self.slot = '_cached_' + func.__name__
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        try:
+            return getattr(obj, self.slot)
+        except AttributeError:
+            pass
+        value = self.func(obj)
+        setattr(obj, self.slot, value)
+        return value
+
+
 def transform_object_tree(f, o, key_transform=lambda k: k):
     """
     Apply a function (f) on all the values in the given document tree, returning a new document of
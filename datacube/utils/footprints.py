@@ -0,0 +1,85 @@
+# coding=utf-8
+"""
+Reprojection of the footprints of many datasets at once.
+"""
+from __future__ import absolute_import, division
+
+from collections import OrderedDict
+
+import numpy
+import rasterio.warp
+
+from .geometry import BoundingBox
+
+
+def bounding_boxes(geoms, crs, resolution=None):
+    """
+    compute the bounding boxes of many geometries in another CRS
+
+    Each geometry's bounding box is segmentized the way :meth:`datacube.utils.geometry.Geometry.to_crs` segmentizes
+    a geometry, and the vertices of all of them in the same CRS are reprojected together, in a single call. For
+    footprints that are rectangles in their own CRS, such as those of datasets, this is the same as
+    ``[geom.to_crs(crs, resolution).boundingbox for geom in geoms]``. For other geometries the boxes may be larger.
+
+    :param geoms: iterable of :class:`datacube.utils.geometry.Geometry`
+    :param CRS crs: CRS of the bounding boxes
+    :param float resolution: see :meth:`datacube.utils.geometry.Geometry.to_crs`
+    :rtype: list[BoundingBox]
+    """
+    geoms = list(geoms)
+    boxes = [None] * len(geoms)
+    by_crs = OrderedDict()
+    for index, geom in enumerate(geoms):
+        if geom.crs == crs or geom.is_empty:
+            boxes[index] = geom.to_crs(crs).boundingbox
+        else:
+            by_crs.setdefault(geom.crs.crs_str, (geom.crs, []))[1].append(index)
+
+    for src_crs, indices in by_crs.values():
+        bounds = numpy.array([geoms[index].boundingbox for index in indices], dtype='float64')
+        for index, box in zip(indices, _reprojected_bounds(bounds, src_crs, crs, resolution)):
+            boxes[index] = BoundingBox(*box)
+    return boxes
+
+
+def _reprojected_bounds(bounds, src_crs, crs, resolution=None):
+    """
+    :param numpy.ndarray bounds: (left, bottom, right, top) of each box in `src_crs`, one per row
+    :return: (left, bottom, right, top) in `crs` of each of the boxes, segmentized as in
+        :meth:`datacube.utils.geometry.Geometry.to_crs`
+    """
+    segment_length = resolution
+    if segment_length is None:
+        segment_length = 1 if src_crs.geographic else 100000
+
+    xs, ys, starts = _segmentized_boundaries(bounds, segment_length)
+    xs, ys = (numpy.asarray(values) for values in rasterio.warp.transform(str(src_crs), str(crs), xs, ys))
+    return numpy.stack([numpy.minimum.reduceat(xs, starts), numpy.minimum.reduceat(ys, starts),
+                        numpy.maximum.reduceat(xs, starts), numpy.maximum.reduceat(ys, starts)], axis=1)
+
+
+def _segmentized_boundaries(bounds, segment_length):
+    """
+    The vertices of the boundary of each box in `bounds`, with each side split into equal segments the way OGR's
+    ``Segmentize`` splits it: into ``floor(length / segment_length - 0.01) + 1`` segments when longer than
+    `segment_length`.
+
+    :return: (xs, ys, the position in them of the first vertex of each box)
+    """
+    left, bottom, right, top = bounds.T
+    # The four sides of each box, going round from the bottom left corner, as (N, 4) arrays of start and end
+    x0 = numpy.stack([left, left, right, right], axis=1)
+    y0 = numpy.stack([bottom, top, top, bottom], axis=1)
+    x1 = numpy.stack([left, right, right, left], axis=1)
+    y1 = numpy.stack([top, top, bottom, bottom], axis=1)
+
+    lengths = numpy.hypot(x1 - x0, y1 - y0).ravel()
+    counts = numpy.where(lengths > segment_length,
+                         numpy.floor(lengths / segment_length - 0.01) + 1, 1).astype('int64')
+
+    # Each side contributes its start and the points along it, but not its end, which the next side starts from
+    side = numpy.repeat(numpy.arange(len(counts)), counts)
+    fraction = (numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)) / counts[side]
+    x0, y0, x1, y1 = (values.ravel()[side] for values in (x0, y0, x1, y1))
+    starts = numpy.concatenate([[0], numpy.cumsum(counts.reshape(-1, 4).sum(axis=1))[:-1]])
+    return x0 + fraction * (x1 - x0), y0 + fraction * (y1 - y0), starts
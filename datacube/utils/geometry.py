@@ -2,6 +2,7 @@ from __future__ import absolute_import, division
 
 import functools
 import math
+import threading
 from collections import namedtuple, OrderedDict
 
 import cachetools
@@ -48,7 +49,7 @@ class InvalidCRSError(ValueError):
     pass
 
 
-@cachetools.cached({})
+@cachetools.cached(cachetools.LRUCache(maxsize=256), lock=threading.Lock())
 def _make_crs(crs_str):
     crs = osr.SpatialReference()
 
@@ -66,6 +67,50 @@ def _make_crs(crs_str):
     return crs
 
 
+def _normalise_crs_str(crs_str):
+    """
+    >>> _normalise_crs_str(' epsg:3577 ')
+    'EPSG:3577'
+    """
+    if not isinstance(crs_str, compat.string_types):
+        return crs_str
+    crs_str = crs_str.strip()
+    if crs_str.lower().startswith('epsg:'):
+        crs_str = crs_str.upper()
+    return crs_str
+
+
+@cachetools.cached(cachetools.LRUCache(maxsize=1024), lock=threading.Lock())
+def _crs_equal(crs_str, other_crs_str):
+    crs, other = _make_crs(crs_str), _make_crs(other_crs_str)
+    if crs.IsSame(other) == 1:
+        return True
+
+    def to_canonincal_proj4(crs_):
+        return set(crs_.ExportToProj4().split() + ['+wktext'])
+    return to_canonincal_proj4(crs) == to_canonincal_proj4(other)
+
+
+# Coordinate transformations and spatial references can't be shared between threads, so each thread caches
+# transformations between its own copies of the spatial references
+_TRANSFORMS = threading.local()
+
+
+def _make_transform(src_crs, dst_crs):
+    """
+    :return: cached :class:`osr.CoordinateTransformation` from `src_crs` to `dst_crs`, for the current thread
+    """
+    cache = getattr(_TRANSFORMS, 'cache', None)
+    if cache is None:
+        cache = _TRANSFORMS.cache = cachetools.LRUCache(maxsize=64)
+    key = (src_crs.crs_str, dst_crs.crs_str)
+    transform = cache.get(key)
+    if transform is None:
+        transform = cache[key] = osr.CoordinateTransformation(src_crs._crs.Clone(),  # pylint: disable=protected-access
+                                                              dst_crs._crs.Clone())  # pylint: disable=protected-access
+    return transform
+
+
 class CRS(object):
     """
     Wrapper around `osr.SpatialReference` providing a more pythonic interface
@@ -110,27 +155,44 @@ class CRS(object):
     ... except InvalidCRSError as e:
     ...    print(e)
     Not a valid CRS: 'PROJCS["...
+    >>> CRS('EPSG:3577') is CRS(' epsg:3577')
+    True
     """
+    #: Recently used instances by class and normalised CRS string, so a CRS is usually only parsed once
+    _interned = cachetools.LRUCache(maxsize=256)
+    _interned_lock = threading.Lock()
 
-    def __init__(self, crs_str):
+    def __new__(cls, crs_str):
         """
 
         :param crs_str: string representation of a CRS, often an EPSG code like 'EPSG:4326'
         :raises: InvalidCRSError
         """
         if isinstance(crs_str, CRS):
-            crs_str = crs_str.crs_str
-        self.crs_str = crs_str
-        self._crs = _make_crs(crs_str)
+            return crs_str
+        if crs_str is None:
+            raise InvalidCRSError("Not a valid CRS: %r" % crs_str)
+
+        crs_str = _normalise_crs_str(crs_str)
+        with CRS._interned_lock:
+            crs = CRS._interned.get((cls, crs_str))
+        if crs is None:
+            crs = super(CRS, cls).__new__(cls)
+            crs.crs_str = crs_str
+            crs._crs = _make_crs(crs_str)  # pylint: disable=protected-access
+            with CRS._interned_lock:
+                crs = CRS._interned.setdefault((cls, crs_str), crs)
+        return crs
+
+    def __init__(self, crs_str):
+        # Everything is set up by __new__, which may return an existing instance
+        pass
 
     def __getitem__(self, item):
         return self._crs.GetAttrValue(item)
 
-    def __getstate__(self):
-        return {'crs_str': self.crs_str}
-
-    def __setstate__(self, state):
-        self.__init__(state['crs_str'])
+    def __reduce__(self):
+        return CRS, (self.crs_str,)
 
     @property
     def wkt(self):
@@ -225,20 +287,15 @@ class CRS(object):
     def __eq__(self, other):
         if isinstance(other, compat.string_types):
             other = CRS(other)
-        gdal_thinks_issame = self._crs.IsSame(other._crs) == 1  # pylint: disable=protected-access
-        if gdal_thinks_issame:
+        if self is other:
             return True
-
-        def to_canonincal_proj4(crs):
-            return set(crs.ExportToProj4().split() + ['+wktext'])
-        proj4_repr_is_same = to_canonincal_proj4(self._crs) == to_canonincal_proj4(other._crs)  # pylint: disable=protected-access
-        return proj4_repr_is_same
+        return _crs_equal(self.crs_str, other.crs_str)
 
     def __ne__(self, other):
         if isinstance(other, compat.string_types):
             other = CRS(other)
         assert isinstance(other, self.__class__)
-        return self._crs.IsSame(other._crs) != 1  # pylint: disable=protected-access
+        return not self == other
 
 
 ###################################################
@@ -471,11 +528,11 @@ class Geometry(object):
         if resolution is None:
             resolution = 1 if self.crs.geographic else 100000
 
-        transform = osr.CoordinateTransformation(self.crs._crs, crs._crs)  # pylint: disable=protected-access
+        transform = _make_transform(self.crs, crs)
         clone = self._geom.Clone()
 
         if wrapdateline and crs.geographic:
-            rtransform = osr.CoordinateTransformation(crs._crs, self.crs._crs)  # pylint: disable=protected-access
+            rtransform = _make_transform(crs, self.crs)
             clone = _chop_along_antimeridian(clone, transform, rtransform)
 
         clone.Segmentize(resolution)
@@ -707,6 +764,8 @@ class GeoBox(object):
     Defines the location and resolution of a rectangular grid of data,
     including it's :py:class:`CRS`.
 
+    The :py:attr:`extent` polygon is only built when it is first used, so GeoBoxes are cheap to create and slice.
+
     :param geometry.CRS crs: Coordinate Reference System
     :param affine.Affine affine: Affine transformation defining the location of the geobox
     """
@@ -719,8 +778,29 @@ class GeoBox(object):
         self.height = height
         #: :rtype: affine.Affine
         self.affine = affine
-        #: :rtype: geometry.Geometry
-        self.extent = polygon_from_transform(width, height, affine, crs=crs)
+        self._crs = crs
+        self._extent = None
+
+    @property
+    def extent(self):
+        """
+        :rtype: geometry.Geometry
+        """
+        if self._extent is None:
+            self._extent = polygon_from_transform(self.width, self.height, self.affine, crs=self._crs)
+        return self._extent
+
+    @property
+    def boundingbox(self):
+        """
+        Bounding box of the extent, computed from the affine transform without building the extent
+
+        :rtype: BoundingBox
+        """
+        corners = [self.affine * corner for corner in ((0, 0), (0, self.height),
+                                                       (self.width, self.height), (self.width, 0))]
+        xs, ys = zip(*corners)
+        return BoundingBox(left=min(xs), bottom=min(ys), right=max(xs), top=max(ys))
 
     @classmethod
     def from_geopolygon(cls, geopolygon, resolution, crs=None, align=None):
@@ -782,7 +862,7 @@ class GeoBox(object):
         """
         :rtype: CRS
         """
-        return self.extent.crs
+        return self._crs
 
     @property
     def dimensions(self):
@@ -844,7 +924,7 @@ class GeoBox(object):
             width=self.width,
             height=self.height,
             affine=self.affine,
-            crs=self.extent.crs
+            crs=self._crs
         )
 
 
@@ -242,6 +242,38 @@ def test_index_dataset_with_sources(index, default_metadata_type):
         index.datasets.add(child, sources_policy='verify')
 
 
+def test_add_many_datasets_with_sources(index, default_metadata_type):
+    type_ = index.products.add_document(_pseudo_telemetry_dataset_type)
+
+    parent_doc = copy.deepcopy(_telemetry_dataset)
+    parent = Dataset(type_, parent_doc, uris=['file:///tmp/parent.yaml'], sources={})
+    child_doc = copy.deepcopy(_telemetry_dataset)
+    child_doc['lineage'] = {'source_datasets': {'source': _telemetry_dataset}}
+    child_doc['id'] = '051a003f-5bba-43c7-b5f1-7f1da3ae9cfb'
+    child = Dataset(type_, child_doc, uris=['file:///tmp/child.yaml'], sources={'source': parent})
+
+    with pytest.raises(MissingRecordError):
+        index.datasets.add_many([child], sources_policy='skip')
+    assert not index.datasets.has(child.id)
+
+    assert index.datasets.add_many([child], sources_policy='ensure', batch_size=1) == 2
+    assert index.datasets.get(parent.id)
+    assert index.datasets.get(child.id, include_sources=True).sources['source'].id == parent.id
+    # Sources aren't stored in the dataset's own document
+    assert index.datasets.get(child.id).metadata_doc['lineage']['source_datasets'] == {}
+
+    # Adding again does nothing, except add new locations
+    child.uris = ['file:///tmp/moved/child.yaml']
+    assert index.datasets.add_many([child, parent], sources_policy='verify') == 0
+    assert index.datasets.get_locations(child.id) == ['file:///tmp/moved/child.yaml', 'file:///tmp/child.yaml']
+    assert index.datasets.get_locations(parent.id) == ['file:///tmp/parent.yaml']
+
+    parent_doc['platform'] = {'code': 'LANDSAT_9'}
+    assert index.datasets.add_many([child], sources_policy='ensure') == 0
+    with pytest.raises(DocumentMismatchError):
+        index.datasets.add_many([child], sources_policy='verify')
+
+
 def test_index_dataset_with_location(index, default_metadata_type, driver):
     """
     :type index: datacube.index._api.Index
@@ -518,6 +518,32 @@ def test_search_returning(index, pseudo_ls8_type, pseudo_ls8_dataset, indexed_ls
     assert document == pseudo_ls8_dataset.metadata_doc
 
 
+def test_search_returning_columns(index, pseudo_ls8_type, pseudo_ls8_dataset, pseudo_ls8_dataset2,
+                                  indexed_ls5_scene_dataset_types):
+    columns = index.datasets.search_returning_columns(
+        ('id', 'sat_path', 'time'),
+        platform='LANDSAT_8',
+        instrument='OLI_TIRS',
+    )
+    assert list(columns) == ['id', 'sat_path_lower', 'sat_path_greater', 'time_lower', 'time_greater']
+    assert set(columns['id']) == {pseudo_ls8_dataset.id, pseudo_ls8_dataset2.id}
+    assert list(columns['sat_path_lower']) == [Decimal('116'), Decimal('116')]
+    assert columns['time_lower'].dtype.kind == 'M'
+
+    frame = index.datasets.search_returning_columns(
+        ('id', 'sat_row'),
+        with_pandas=True,
+        platform='LANDSAT_8',
+        instrument='OLI_TIRS',
+    )
+    assert list(frame.columns) == ['id', 'sat_row_lower', 'sat_row_greater']
+    assert len(frame) == 2
+
+    # No results
+    frame = index.datasets.search_returning_columns(('id',), with_pandas=True, platform='LANDSAT_42')
+    assert len(frame) == 0
+
+
 def test_search_returning_rows(index, pseudo_ls8_type,
                                pseudo_ls8_dataset, pseudo_ls8_dataset2,
                                indexed_ls5_scene_dataset_types):
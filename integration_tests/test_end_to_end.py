@@ -119,6 +119,31 @@ def test_end_to_end(global_integration_cli_args, driver_manager, testdata_dir):
     check_analytics_pixel_drill(driver_manager)
 
 
+@pytest.mark.usefixtures('default_metadata_type')
+def test_index_datasets_with_several_jobs(global_integration_cli_args, driver_manager, testdata_dir):
+    """
+    Index the sample Landsat 5 scenes with several worker processes, twice, as a re-indexing run would.
+    """
+    lbg_nbar = testdata_dir / 'lbg' / LBG_NBAR
+    lbg_pq = testdata_dir / 'lbg' / LBG_PQ
+
+    run_click_command(galsprepare.main, [str(lbg_nbar)])
+    run_click_command(datacube.scripts.cli_app.cli,
+                      global_integration_cli_args + ['-v', 'product', 'add', str(LS5_DATASET_TYPES)])
+
+    for _ in range(2):
+        run_click_command(datacube.scripts.cli_app.cli,
+                          global_integration_cli_args +
+                          ['-v', 'dataset', 'add', '--auto-match', '--jobs', '2',
+                           str(lbg_nbar), str(lbg_pq)])
+
+    index = driver_manager.index
+    nbar_datasets = index.datasets.search_eager(product='ls5_nbar_scene')
+    pq_datasets = index.datasets.search_eager(product='ls5_pq_scene')
+    assert len(nbar_datasets) == 1
+    assert len(pq_datasets) == 1
+
+
 def run_click_command(command, args):
     result = CliRunner().invoke(
         command,
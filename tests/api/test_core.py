@@ -1,7 +1,20 @@
-from datacube.api.query import GroupBy
+import datetime
+from contextlib import contextmanager
+from operator import getitem
 
+import dask
+import mock
+import numpy
+import pytest
+import xarray
+from affine import Affine
+
+from datacube.api.query import GroupBy
 from datacube import Datacube
-import datetime
+from datacube.api._footprints import _datasets_by_chunk, _geopolygon_mask, _sort_by_coverage
+from datacube.api._fuse import _make_dask_array, _make_dask_arrays, _output_array, fuse_lazy, fuse_lazy_multiband
+from datacube.api._points import _read_points_into
+from datacube.utils import geometry
 
 
 def test_grouping_datasets():
@@ -50,3 +63,250 @@ def _group_datasets_by_date(datasets):
 
     group_by = GroupBy(dimension, group_func, units, sort_key)
     return Datacube.group_datasets(datasets, group_by)
+
+
+_ALBERS = geometry.CRS('EPSG:3577')
+#: 100x100 pixels of 10m, from (0, 0) to (1000, 1000)
+_GEOBOX = geometry.GeoBox(100, 100, Affine(10, 0, 0, 0, -10, 1000), _ALBERS)
+_BLUE = {'name': 'blue', 'dtype': 'int16', 'nodata': -999}
+
+
+def _albers_box(left, bottom, right, top):
+    return geometry.box(left, bottom, right, top, _ALBERS)
+
+
+def _single_time_sources(*datasets):
+    """The datasets of a single time, grouped as :meth:`Datacube.group_datasets` groups them"""
+    sources = numpy.empty(1, dtype=object)
+    sources[0] = datasets
+    return xarray.DataArray(sources, dims=['time'], coords=[[datetime.datetime(2016, 1, 1)]])
+
+
+class _ConstantBand(object):
+    """
+    A band on the grid of `_GEOBOX`, `value` within `extent` and nodata elsewhere.
+    """
+    def __init__(self, extent, value, nodata=-999, dtype='int16'):
+        self.crs = _GEOBOX.crs
+        self.transform = _GEOBOX.affine
+        self.shape = _GEOBOX.shape
+        self.nodata = nodata
+        self.data = numpy.full(_GEOBOX.shape, nodata, dtype=dtype)
+        bbox = extent.boundingbox
+        left, top = ~_GEOBOX.affine * (bbox.left, bbox.top)
+        right, bottom = ~_GEOBOX.affine * (bbox.right, bbox.bottom)
+        self.data[int(top):int(bottom), int(left):int(right)] = value
+
+    def read(self, window=None, out_shape=None):
+        return self.data[slice(*window[0]), slice(*window[1])]
+
+
+class _FakeDataset(object):
+    """
+    A dataset with `value` in its `blue` and `pq` bands, which counts how many times its files are opened.
+    """
+    # Not a Mock: dask would call it, taking the tuple of datasets in a read task for a task of its own
+    def __init__(self, extent, value):
+        self.extent = extent
+        self.bands = {'blue': _ConstantBand(extent, value),
+                      'pq': _ConstantBand(extent, value, nodata=0, dtype='uint8')}
+        self.opens = 0
+
+
+class _FakeDataSource(object):
+    def __init__(self, dataset, names):
+        self.dataset = dataset
+        self.names = names
+
+    @contextmanager
+    def open(self):
+        self.dataset.opens += 1
+        if isinstance(self.names, list):
+            yield [self.dataset.bands[name] for name in self.names]
+        else:
+            yield self.dataset.bands[self.names]
+
+
+def _fake_driver_manager():
+    driver_manager = mock.Mock()
+    driver_manager.get_datasource.side_effect = _FakeDataSource
+    return driver_manager
+
+
+def test_dask_chunks_only_get_overlapping_datasets():
+    top_left = mock.Mock(extent=_albers_box(0, 850, 150, 1000))
+    bottom_right = mock.Mock(extent=_albers_box(550, 0, 1000, 250))
+    outside = mock.Mock(extent=_albers_box(2000, 0, 3000, 250))
+    unknown = mock.Mock(extent=None)
+
+    by_chunk = _datasets_by_chunk([top_left, bottom_right, outside, unknown], _GEOBOX, (50, 50))
+    assert by_chunk == {
+        (0, 0): [top_left, unknown],
+        (0, 1): [unknown],
+        (1, 0): [unknown],
+        (1, 1): [bottom_right, unknown],
+    }
+
+    corner = _FakeDataset(_albers_box(0, 850, 150, 1000), 1)
+    data = _make_dask_array(_single_time_sources(corner), _GEOBOX, _BLUE, dask_chunks={'x': 50, 'y': 50},
+                            driver_manager=_fake_driver_manager())
+    # Chunks away from the only dataset are constant nodata, without a read task
+    assert len([task for task in dict(data.dask).values() if task[0] is fuse_lazy]) == 1
+
+    values = data.compute()
+    assert corner.opens == 1
+    assert (values[0, :15, :15] == 1).all()
+    assert (values[0, 15:, :] == -999).all() and (values[0, :, 15:] == -999).all()
+
+
+def test_dask_chunks_outside_the_geopolygon_are_not_read():
+    dataset = _FakeDataset(_albers_box(0, 0, 1000, 1000), 1)
+
+    # The triangle above the diagonal from the bottom left to the top right
+    mask = _geopolygon_mask(geometry.polygon([(0, 0), (0, 1000), (1000, 1000), (0, 0)], _ALBERS), _GEOBOX)
+    assert mask[:50, :50].all() and not mask[50:, 50:].any()
+
+    data = _make_dask_array(_single_time_sources(dataset), _GEOBOX, _BLUE, dask_chunks={'x': 50, 'y': 50},
+                            driver_manager=_fake_driver_manager(), mask=mask)
+    read_tasks = {key[2:]: task for key, task in dict(data.dask).items() if task[0] is fuse_lazy}
+    # The bottom right chunk is outside the triangle, the top left one is entirely inside it
+    assert sorted(read_tasks) == [(0, 0), (0, 1), (1, 0)]
+    assert read_tasks[(0, 0)][-1] is None
+    assert (read_tasks[(0, 1)][-1] == mask[:50, 50:]).all()
+
+    values = data.compute()
+    assert dataset.opens == 3
+    assert (values[0][mask] == 1).all()
+    assert (values[0][~mask] == -999).all()
+
+
+def test_dask_multiband_shares_one_task_per_chunk():
+    corner = _FakeDataset(_albers_box(0, 850, 150, 1000), 1)
+    measurements = [_BLUE, {'name': 'pq', 'dtype': 'uint8', 'nodata': 0}]
+
+    arrays = _make_dask_arrays(_single_time_sources(corner), _GEOBOX, measurements, dask_chunks={'x': 50, 'y': 50},
+                               driver_manager=_fake_driver_manager())
+    assert list(arrays) == ['blue', 'pq']
+
+    graph = dict(arrays['blue'].dask)
+    graph.update(arrays['pq'].dask)
+    read_tasks = [task for task in graph.values() if task[0] is fuse_lazy_multiband]
+    assert len(read_tasks) == 1
+
+    assert arrays['pq'].dtype == numpy.uint8
+    blue, pq = dask.compute(arrays['blue'], arrays['pq'])
+    # Both bands were read from a single opening of the dataset
+    assert corner.opens == 1
+    assert (blue[0, :15, :15] == 1).all() and (pq[0, :15, :15] == 1).all()
+    assert (blue[0, 15:, :] == -999).all() and (pq[0, 15:, :] == 0).all()
+
+
+def test_dask_multiband_with_a_single_measurement():
+    corner = _FakeDataset(_albers_box(0, 850, 150, 1000), 1)
+
+    arrays = _make_dask_arrays(_single_time_sources(corner), _GEOBOX, [_BLUE], dask_chunks={'x': 50, 'y': 50},
+                               driver_manager=_fake_driver_manager())
+    graph = dict(arrays['blue'].dask)
+    read_keys = [key for key, task in graph.items() if task[0] is fuse_lazy_multiband]
+    assert len(read_keys) == 1
+    # The read task isn't shadowed by the band picked out of it
+    assert graph[('datacube_blue', 0, 0, 0)] == (getitem, read_keys[0], 0)
+
+    values = arrays['blue'].compute()
+    assert corner.opens == 1
+    assert (values[0, :15, :15] == 1).all()
+    assert (values[0, 15:, :] == -999).all()
+
+
+def test_load_iter_yields_one_block_per_time_and_spatial_chunk():
+    times = [datetime.datetime(2016, 1, day) for day in (1, 2, 3)]
+    grouped = xarray.DataArray(numpy.empty(3, dtype=object), coords=[('time', times)])
+    measurements = {'red': {'name': 'red'}}
+
+    dc = Datacube(driver_manager=mock.MagicMock())
+    with mock.patch.object(dc, '_prepare_load', return_value=(grouped, _GEOBOX, measurements)), \
+            mock.patch.object(Datacube, 'load_data', side_effect=lambda sources, geobox, *args, **kwargs: (
+                sources.time.values.tolist(), geobox.shape)) as load_data:
+        blocks = list(dc.load_iter(product='ls5_nbar_albers', chunks={'time': 2, 'x': 60}, prefetch=2))
+
+    assert load_data.call_count == 4
+    assert [shape for _, shape in blocks] == [(100, 60), (100, 40), (100, 60), (100, 40)]
+    assert [len(block_times) for block_times, _ in blocks] == [2, 2, 1, 1]
+
+
+def test_output_arrays_are_reused_and_filled_with_nodata():
+    measurement = {'name': 'red', 'dtype': 'int16', 'nodata': -999}
+
+    allocated = _output_array(None, measurement, (2, 3, 4))
+    assert allocated.shape == (2, 3, 4) and (allocated == -999).all()
+
+    supplied = numpy.zeros((2, 3, 4), dtype='int16')
+    assert _output_array({'red': supplied}, measurement, (2, 3, 4)) is supplied
+    assert (supplied == -999).all()
+
+    buffer_ = bytearray(2 * 3 * 4 * 2)
+    from_buffer = _output_array({'red': buffer_}, measurement, (2, 3, 4))
+    from_buffer[0, 0, 0] = 7
+    assert numpy.frombuffer(buffer_, dtype='int16')[0] == 7
+
+    with pytest.raises(ValueError):
+        _output_array({'red': numpy.zeros((3, 4), dtype='int16')}, measurement, (2, 3, 4))
+    with pytest.raises(ValueError):
+        _output_array({'red': numpy.zeros((2, 3, 4), dtype='float32')}, measurement, (2, 3, 4))
+    with pytest.raises(ValueError):
+        _output_array({'red': bytes(buffer_)}, measurement, (2, 3, 4))
+
+
+def test_datasets_covering_more_of_the_output_are_fused_first():
+    corner = mock.Mock(extent=_albers_box(0, 850, 150, 1000))
+    half = mock.Mock(extent=_albers_box(0, 0, 500, 1000))
+    other_half = mock.Mock(extent=_albers_box(500, 0, 1000, 1000))
+    outside = mock.Mock(extent=_albers_box(2000, 0, 3000, 250))
+    unknown = mock.Mock(extent=None)
+
+    assert _sort_by_coverage([outside, corner, half, other_half, unknown], _GEOBOX) == [
+        unknown, half, other_half, corner, outside]
+
+
+def test_dask_chunks_fuse_overlapping_datasets_in_the_same_order_as_in_memory_loads():
+    # Both cover the same area overall, but each covers more of one of the two chunks
+    left = _FakeDataset(_albers_box(0, 0, 600, 1000), 1)
+    right = _FakeDataset(_albers_box(400, 0, 1000, 1000), 2)
+    # Covered by the others, so never read once they have been
+    hidden = _FakeDataset(_albers_box(100, 0, 300, 1000), 3)
+    sources = _single_time_sources(hidden, left, right)
+
+    eager = Datacube.load_data(sources, _GEOBOX, [_BLUE], driver_manager=_fake_driver_manager(), use_threads=False)
+    assert (eager.blue.values[0, :, :60] == 1).all()
+    assert (eager.blue.values[0, :, 60:] == 2).all()
+    assert (left.opens, right.opens, hidden.opens) == (1, 1, 0)
+
+    for dask_multiband in (False, True):
+        left.opens = right.opens = 0
+        lazy = Datacube.load_data(sources, _GEOBOX, [_BLUE], driver_manager=_fake_driver_manager(),
+                                  dask_chunks={'x': 50}, dask_multiband=dask_multiband)
+        assert (lazy.blue.values == eager.blue.values).all()
+        # The left chunk is filled by the left dataset alone
+        assert (left.opens, right.opens, hidden.opens) == (2, 1, 0)
+
+
+def test_points_are_read_from_the_first_dataset_with_data_for_them():
+    points = [geometry.point(x, 500, _ALBERS) for x in (100, 600, 2000)]
+    left = mock.Mock(extent=_albers_box(0, 0, 1000, 1000))
+    right = mock.Mock(extent=_albers_box(500, 0, 1500, 1000))
+    sources = _single_time_sources(left, right)
+    measurements = [_BLUE]
+
+    driver_manager = mock.Mock()
+    driver_manager.get_datasource.side_effect = lambda dataset, names: dataset
+    values = {
+        # The left dataset is nodata at the second point, which the right one covers too
+        left: [(numpy.array([1, -999], dtype='int16'), numpy.array([True, False]))],
+        right: [(numpy.array([2], dtype='int16'), numpy.array([True]))],
+    }
+    with mock.patch('datacube.api._points.read_points',
+                    side_effect=lambda dataset, dataset_points: values[dataset]) as read_points:
+        arrays = _read_points_into(sources, points, measurements, driver_manager=driver_manager)
+
+    assert [len(call[0][1]) for call in read_points.call_args_list] == [2, 1]
+    assert arrays['blue'].tolist() == [[1, 2, -999]]
@@ -16,13 +16,17 @@ from __future__ import absolute_import, division, print_function
 
 import datetime
 
+import mock
+import numpy
 import pytest
 from dateutil import tz
 
 from ..util import isclose
 
-from datacube.api.query import Query, DescriptorQuery, _datetime_to_timestamp, query_group_by
+from datacube.api.query import Query, DescriptorQuery, _datetime_to_timestamp, _mean_longitudes, query_group_by, \
+    solar_day
 from datacube.model import Range
+from datacube.utils import geometry
 
 
 def test_convert_descriptor_query_to_search_query():
@@ -220,3 +224,29 @@ def test_query_kwargs():
 
     with pytest.raises(LookupError):
         query_group_by(group_by='magic')
+
+
+def test_solar_day_group_keys_match_solar_day():
+    albers = geometry.CRS('EPSG:3577')
+    wgs84 = geometry.CRS('EPSG:4326')
+    datasets = [
+        mock.Mock(center_time=datetime.datetime(2016, 1, 1, 14, 30, tzinfo=tz.tzutc()),
+                  extent=geometry.box(149, -36, 150, -35, wgs84)),
+        mock.Mock(center_time=datetime.datetime(2016, 1, 1, 13, 0, tzinfo=tz.tzutc()),
+                  extent=geometry.box(1500000, -4000000, 1600000, -3900000, albers)),
+        mock.Mock(center_time=datetime.datetime(2016, 1, 2, 0, 30, tzinfo=tz.tzutc()),
+                  extent=geometry.box(-10, -36, -9, -35, wgs84)),
+        # Across the antimeridian, where the segmentized footprint gives a different longitude than its corners
+        mock.Mock(center_time=datetime.datetime(2016, 1, 1, 11, 0, tzinfo=tz.tzutc()),
+                  extent=geometry.box(700000, 5000000, 900000, 5200000, geometry.CRS('EPSG:32660'))),
+    ]
+
+    group_by = query_group_by('solar_day')
+    times, labels = group_by.group_keys(datasets)
+    assert list(labels) == [solar_day(dataset) for dataset in datasets]
+    assert list(times) == [numpy.datetime64(dataset.center_time.replace(tzinfo=None), 'ns') for dataset in datasets]
+
+    # The same longitudes as solar_day, not just the same days
+    expected = [(bbox.left + bbox.right) * 0.5
+                for bbox in (dataset.extent.to_crs(geometry.CRS('WGS84')).boundingbox for dataset in datasets)]
+    assert numpy.allclose(_mean_longitudes(datasets), expected, rtol=0, atol=1e-9)
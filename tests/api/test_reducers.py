@@ -0,0 +1,55 @@
+import numpy
+import pytest
+import xarray
+
+from datacube.api.reducers import reduce_datasets
+
+NODATA = -999
+
+
+def _time_slices(data):
+    times = numpy.arange(len(data))
+    dataset = xarray.Dataset({'red': (('time', 'y', 'x'), numpy.array(data, dtype='int16'), {'nodata': NODATA})},
+                             coords={'time': times, 'y': [1, 0], 'x': [0, 1]},
+                             attrs={'crs': 'EPSG:3577'})
+    return [dataset.isel(time=slice(i, i + 1)) for i in times]
+
+
+SLICES = [[[1, NODATA], [4, NODATA]],
+          [[3, NODATA], [2, 5]],
+          [[2, NODATA], [NODATA, 7]]]
+
+
+@pytest.mark.parametrize('reducer, expected', [
+    ('mean', [[2, numpy.nan], [3, 6]]),
+    ('min', [[1, NODATA], [2, 5]]),
+    ('max', [[3, NODATA], [4, 7]]),
+    ('count', [[3, 0], [2, 2]]),
+    ('median-approx', [[2, numpy.nan], [3, 6]]),
+])
+def test_reductions_ignore_nodata(reducer, expected):
+    result = reduce_datasets(_time_slices(SLICES), reducer)
+
+    assert result.red.dims == ('y', 'x')
+    assert 'time' not in result.coords
+    assert result.attrs['crs'] == 'EPSG:3577'
+    numpy.testing.assert_array_equal(result.red.values, expected)
+
+
+def test_median_approx_is_close_for_many_observations():
+    data = numpy.random.RandomState(1).normal(100, 10, size=(200, 2, 2)).round()
+    result = reduce_datasets(_time_slices(data), 'median-approx')
+
+    assert numpy.abs(result.red.values - numpy.median(data, axis=0)).max() < 2
+
+
+def test_callable_reducer_folds_every_slice():
+    result = reduce_datasets(_time_slices(SLICES), lambda total, time_slice: (
+        time_slice.red if total is None else total + time_slice.red))
+
+    numpy.testing.assert_array_equal(result.values, [[6, 3 * NODATA], [NODATA + 6, NODATA + 12]])
+
+
+def test_unknown_reducer():
+    with pytest.raises(ValueError):
+        reduce_datasets(_time_slices(SLICES), 'mode')
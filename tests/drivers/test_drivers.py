@@ -1,5 +1,10 @@
 from __future__ import print_function, absolute_import
 
+from collections import namedtuple
+from contextlib import contextmanager
+from uuid import uuid4
+
+import mock
 import pytest
 
 
@@ -23,3 +28,38 @@ def test_can_import_s3testdriver():
     pytest.importorskip('SharedArray')
     from datacube.drivers.s3_test.driver import S3TestDriver
     assert S3TestDriver is not None
+
+
+def test_s3_specifics_are_fetched_for_many_datasets_in_one_query():
+    from datacube.drivers.s3.index import DatasetResource
+
+    S3DatasetRow = namedtuple('S3DatasetRow', ['dataset_ref', 'id', 'band'])
+    ids = [uuid4(), uuid4(), uuid4()]
+    rows = [S3DatasetRow(ids[0], 's3-0-red', 'red'), S3DatasetRow(ids[0], 's3-0-green', 'green'),
+            S3DatasetRow(ids[1], 's3-1-red', 'red'), S3DatasetRow(ids[1], 's3-1-green', 'green')]
+
+    class FakeConnection(object):
+        def __init__(self):
+            self.queries = []
+
+        def execute(self, query):
+            self.queries.append(query)
+            return mock.Mock(fetchall=lambda: rows)
+
+    connection = FakeConnection()
+
+    @contextmanager
+    def connect():
+        yield connection
+
+    datasets = [mock.Mock(id=ids[0], measurements={'red': {}, 'green': {}}),
+                mock.Mock(id=ids[1], measurements={'red': {}}),
+                mock.Mock(id=ids[2], measurements={})]
+    resource = DatasetResource(None, mock.Mock(connect=connect), None)
+    resource.add_specifics_many(datasets)
+
+    assert len(connection.queries) == 1
+    assert ({band: m['s3_dataset'].id for band, m in datasets[0].s3_metadata.items()} ==
+            {'red': 's3-0-red', 'green': 's3-0-green'})
+    assert {band: m['s3_dataset'].id for band, m in datasets[1].s3_metadata.items()} == {'red': 's3-1-red'}
+    assert datasets[2].s3_metadata == {}
@@ -0,0 +1,61 @@
+# coding=utf-8
+"""
+Tests for how the postgres index uses its database connections.
+"""
+from __future__ import absolute_import
+
+import pytest
+from mock import MagicMock
+from sqlalchemy.exc import IntegrityError
+
+from datacube.index.exceptions import MissingRecordError
+from datacube.index.postgres._api import PostgresDbAPI, PGCODE_FOREIGN_KEY_VIOLATION
+from datacube.index.postgres._connections import PostgresDb
+
+
+def test_search_results_are_streamed_in_batches():
+    connection = MagicMock()
+    results = PostgresDbAPI(connection, fetch_size=500).search_datasets(())
+
+    # Only streaming is asked for: the connection's transaction mode is left as it is
+    connection.execution_options.assert_called_once_with(stream_results=True, max_row_buffer=500)
+    assert results is connection.execution_options.return_value.execute.return_value
+    assert not connection.execute.called
+
+
+def test_search_results_are_read_at_once_without_a_fetch_size():
+    connection = MagicMock()
+    results = PostgresDbAPI(connection).search_datasets(())
+
+    assert results is connection.execute.return_value
+    assert not connection.execution_options.called
+
+
+def test_only_streaming_connections_leave_autocommit_mode():
+    engine = MagicMock()
+    db = PostgresDb(engine, fetch_size=500)
+    engine.execution_options.assert_called_once_with(isolation_level='READ COMMITTED')
+
+    with db.connect(stream_results=True) as connection:
+        assert connection._fetch_size == 500
+    engine.execution_options.return_value.connect.assert_called_once_with()
+    assert not engine.connect.called
+
+    with db.connect() as connection:
+        assert connection._fetch_size is None
+    engine.connect.assert_called_once_with()
+
+    # Without a fetch size, searches read all their results from an ordinary connection
+    with PostgresDb(engine, fetch_size=0).connect(stream_results=True) as connection:
+        assert connection._fetch_size is None
+    assert engine.connect.call_count == 2
+
+
+def test_missing_staged_source_keeps_the_database_error():
+    error = IntegrityError('INSERT INTO dataset_source ...', {}, MagicMock(pgcode=PGCODE_FOREIGN_KEY_VIOLATION))
+    connection = MagicMock()
+    connection.execute.side_effect = [None, None, error]
+
+    with pytest.raises(MissingRecordError) as excinfo:
+        PostgresDbAPI(connection).merge_staged_datasets()
+    assert excinfo.value.__cause__ is error
@@ -0,0 +1,107 @@
+# coding=utf-8
+"""
+Tests for the parallel indexing helpers of the `datacube dataset` command.
+"""
+from __future__ import absolute_import
+
+import pickle
+
+import pytest
+from mock import MagicMock
+
+import datacube.scripts.dataset as dataset_script
+from datacube.model import Dataset, DatasetType, MetadataType
+from datacube.scripts.dataset import BadMatch, index_dataset_paths, index_dataset_paths_parallel
+from datacube.scripts.dataset import _add_dataset_batch, _dataset_from_match, _dataset_to_match
+from datacube.utils.changes import DocumentMismatchError
+
+_METADATA_TYPE = MetadataType({'name': 'eo', 'dataset': dict(id=['id'], sources=['lineage', 'source_datasets'])},
+                              dataset_search_fields={})
+
+
+def _make_product(name):
+    return DatasetType(_METADATA_TYPE, {'name': name, 'description': '', 'metadata_type': 'eo',
+                                        'metadata': {'product_type': name}})
+
+
+def _make_doc(id_, product_type, sources=None):
+    return {'id': id_, 'product_type': product_type, 'lineage': {'source_datasets': sources or {}}}
+
+
+def test_dataset_match_round_trip_keeps_sources():
+    level1, nbar = _make_product('level1'), _make_product('nbar')
+    rules = [{'type': type_, 'metadata': type_.metadata_doc} for type_ in (level1, nbar)]
+
+    level1_doc = _make_doc('b1f3a6e2-e8b9-11e4-87ff-1040f381a756', 'level1')
+    nbar_doc = _make_doc('4ec8fe97-e8b9-11e4-87ff-1040f381a756', 'nbar', {'level1': level1_doc})
+    dataset = Dataset(nbar, nbar_doc, uris=['file:///tmp/nbar/agdc-metadata.yaml'],
+                      sources={'level1': Dataset(level1, level1_doc, sources={})})
+
+    # Matches are what the worker processes send back
+    match = pickle.loads(pickle.dumps(_dataset_to_match(dataset, rules), pickle.HIGHEST_PROTOCOL))
+    rebuilt = _dataset_from_match(match, rules)
+
+    assert rebuilt.type is nbar
+    assert rebuilt.id == dataset.id
+    assert rebuilt.metadata_doc == nbar_doc
+    assert rebuilt.uris == dataset.uris
+
+    assert set(rebuilt.sources) == {'level1'}
+    source = rebuilt.sources['level1']
+    assert source.type is level1
+    assert source.id == dataset.sources['level1'].id
+    assert source.metadata_doc == level1_doc
+    assert not source.sources
+
+
+def test_failed_batch_is_added_individually():
+    nbar = _make_product('nbar')
+    datasets = [Dataset(nbar, _make_doc(id_, 'nbar'), uris=['file:///tmp/%s.yaml' % id_])
+                for id_ in ('4ec8fe97-e8b9-11e4-87ff-1040f381a756', '26931115-e8b9-11e4-87ff-1040f381a756')]
+
+    index = MagicMock()
+    index.datasets.add_many.side_effect = DocumentMismatchError('differs from the indexed document')
+    index.datasets.add.side_effect = [DocumentMismatchError('differs from the indexed document'), datasets[1]]
+
+    _add_dataset_batch(index, datasets, 'verify')
+
+    index.datasets.add_many.assert_called_once_with(datasets, sources_policy='verify', batch_size=2)
+    assert [call[0][0] for call in index.datasets.add.call_args_list] == datasets
+
+
+def test_dataset_of_a_product_without_rules_is_not_matched():
+    level1, nbar = _make_product('level1'), _make_product('nbar')
+    dataset = Dataset(nbar, _make_doc('4ec8fe97-e8b9-11e4-87ff-1040f381a756', 'nbar'), sources={})
+
+    with pytest.raises(BadMatch, match='nbar'):
+        _dataset_to_match(dataset, [{'type': level1, 'metadata': level1.metadata_doc}])
+
+
+def test_dataset_that_differs_from_the_index_is_skipped(monkeypatch):
+    nbar = _make_product('nbar')
+    datasets = [Dataset(nbar, _make_doc(id_, 'nbar'), uris=['file:///tmp/%s.yaml' % id_])
+                for id_ in ('4ec8fe97-e8b9-11e4-87ff-1040f381a756', '26931115-e8b9-11e4-87ff-1040f381a756')]
+    monkeypatch.setattr(dataset_script, 'load_datasets', lambda paths, rules: iter(datasets))
+
+    index = MagicMock()
+    index.datasets.add.side_effect = [DocumentMismatchError('differs from the indexed document'), datasets[1]]
+
+    index_dataset_paths('verify', False, index, [], ['/tmp'])
+
+    assert [call[0][0] for call in index.datasets.add.call_args_list] == datasets
+
+
+def test_index_connections_are_closed_before_starting_workers(monkeypatch):
+    index = MagicMock()
+    pool = MagicMock()
+    pool.imap_unordered.return_value = iter([])
+
+    def make_pool(*args, **kwargs):
+        assert index.close.called
+        return pool
+
+    monkeypatch.setattr(dataset_script.multiprocessing, 'Pool', make_pool)
+    index_dataset_paths_parallel('verify', False, index, [], [], jobs=2)
+
+    pool.terminate.assert_called_once_with()
+    assert not index.datasets.add_many.called
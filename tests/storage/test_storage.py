@@ -1,5 +1,7 @@
 from __future__ import absolute_import, division, print_function
 
+import gc
+import time
 from contextlib import contextmanager
 
 import mock
@@ -15,7 +17,8 @@ from datacube.drivers.datasource import DataSource
 from datacube.model import Dataset, DatasetType, MetadataType
 from datacube.storage.storage import OverrideBandDataSource, RasterFileDataSource, BandDataSource
 from datacube.storage.storage import write_dataset_to_netcdf, reproject_and_fuse, read_from_source, Resampling, \
-    RasterDatasetSource
+    RasterDatasetSource, OrderedFuser, MultiBandDataSource, HandleCache, read_points
+from datacube.storage._handles import _file_signature
 from datacube.utils import geometry
 
 GEO_PROJ = 'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],' \
@@ -148,6 +151,76 @@ def test_mixed_result_when_first_source_partially_empty():
     assert (output_data == [[1, 1], [2, 2]]).all()
 
 
+def test_ordered_fuser_keeps_source_priority_when_read_out_of_order():
+    from threading import Thread
+
+    crs = geometry.CRS('EPSG:4326')
+    shape = (2, 2)
+    no_data = -1
+
+    sources = [FakeDatasetSource([[1, no_data], [no_data, no_data]], crs=crs),
+               FakeDatasetSource([[2, 2], [no_data, no_data]], crs=crs),
+               FakeDatasetSource([[3, 3], [3, no_data]], crs=crs)]
+
+    output_data = np.empty(shape, dtype='int16')
+    fuser = OrderedFuser(output_data, len(sources), identity, crs, no_data)
+
+    # Start the reads last to first, fusing must still happen first to last
+    threads = [Thread(target=fuser.read, args=(position, source))
+               for position, source in reversed(list(enumerate(sources)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (output_data == [[1, 2], [3, no_data]]).all()
+
+
+def test_ordered_fuser_stops_reading_once_destination_is_full():
+    crs = geometry.CRS('EPSG:4326')
+    no_data = -1
+
+    first = FakeDatasetSource([[1, no_data], [no_data, no_data]], crs=crs)
+    second = FakeDatasetSource([[2, 2], [2, 2]], crs=crs)
+    third = FakeDatasetSource([[3, 3], [3, 3]], crs=crs)
+    third.open = mock.Mock()
+
+    output_data = np.empty((2, 2), dtype='int16')
+    fuser = OrderedFuser(output_data, 3, identity, crs, no_data)
+    for position, source in enumerate([first, second, third]):
+        fuser.read(position, source)
+
+    assert (output_data == [[1, 2], [2, 2]]).all()
+    assert fuser.is_full
+    assert not third.open.called
+
+    # NaN nodata is still recognised as missing
+    output_data = np.empty((2, 2), dtype='float32')
+    fuser = OrderedFuser(output_data, 2, identity, crs, np.float32('nan'))
+    fuser.read(0, FakeDatasetSource([[1, np.nan], [np.nan, np.nan]], crs=crs))
+    fuser.read(1, FakeDatasetSource([[2, 2], [2, 2]], crs=crs))
+    assert (output_data == [[1, 2], [2, 2]]).all()
+
+
+def test_read_from_source_skips_sources_outside_destination_without_opening():
+    crs = geometry.CRS('EPSG:4326')
+    no_data = -1
+
+    outside = FakeDatasetSource([[2, 2], [2, 2]], crs=crs)
+    outside.get_extent = lambda: geometry.box(10, -12, 12, -10, crs)
+    outside.open = mock.Mock()
+
+    output_data = np.zeros((2, 2), dtype='int16')
+    read_from_source(outside, output_data, identity, no_data, crs, 'nearest')
+    assert (output_data == no_data).all()
+    assert not outside.open.called
+
+    inside = FakeDatasetSource([[2, 2], [2, 2]], crs=crs)
+    inside.get_extent = lambda: geometry.box(0, 0, 2, 2, crs)
+    read_from_source(inside, output_data, identity, no_data, crs, 'nearest')
+    assert (output_data == 2).all()
+
+
 class FakeBandDataSource(object):
     def __init__(self, value, *args, **kwargs):
         self.value = value
@@ -250,17 +323,33 @@ class FakeDataSource(object):
 
         self.data = np.full(self.shape, self.nodata, dtype='int16')
         self.data[:512, :512] = np.arange(512) + np.arange(512).reshape((512, 1))
+        self.dtype = self.data.dtype
+        # Whether decimated reads average each block, like a file with averaged overviews
+        self.average_overviews = False
 
     def read(self, window=None, out_shape=None):
         data = self.data
         if window:
             data = self.data[slice(*window[0]), slice(*window[1])]
+        if out_shape and self.average_overviews:
+            return self._read_averaged(data, out_shape)
         if out_shape:
-            xidx = ((np.arange(out_shape[1]) + 0.5) * (data.shape[1] / out_shape[1]) - 0.5).round().astype('int')
-            yidx = ((np.arange(out_shape[0]) + 0.5) * (data.shape[0] / out_shape[0]) - 0.5).round().astype('int')
+            # Nearest neighbour decimation, the same as GDAL
+            xidx = np.floor((np.arange(out_shape[1]) + 0.5) * (data.shape[1] / out_shape[1])).astype('int')
+            yidx = np.floor((np.arange(out_shape[0]) + 0.5) * (data.shape[0] / out_shape[0])).astype('int')
             data = data[np.meshgrid(yidx, xidx, indexing='ij')]
         return data
 
+    def _read_averaged(self, data, out_shape):
+        # Average of the valid pixels in each block, blocks at the edges being clipped to `data`
+        yedges = (np.arange(out_shape[0]) * (data.shape[0] / out_shape[0])).astype('int')
+        xedges = (np.arange(out_shape[1]) * (data.shape[1] / out_shape[1])).astype('int')
+        valid = data != self.nodata
+        total = np.add.reduceat(np.add.reduceat(np.where(valid, data, 0).astype('float64'), yedges, axis=0),
+                                xedges, axis=1)
+        count = np.add.reduceat(np.add.reduceat(valid.astype('int'), yedges, axis=0), xedges, axis=1)
+        return np.where(count > 0, total / np.maximum(count, 1), self.nodata).astype(data.dtype)
+
     def reproject(self, dest, dst_transform, dst_crs, dst_nodata, resampling, **kwargs):
         return rasterio.warp.reproject(self.data,
                                        dest,
@@ -274,6 +363,29 @@ class FakeDataSource(object):
                                        **kwargs)
 
 
+def test_read_points_only_reads_the_pixels_containing_them():
+    data_source = FakeDataSource()
+
+    @contextmanager
+    def fake_open():
+        yield [data_source]
+
+    source = mock.Mock()
+    source.open = fake_open
+
+    crs = data_source.crs
+    points = [geometry.point(100.3, -30.6, crs),  # row 2, column 1
+              geometry.point(100.1, -158.1, crs),  # nodata
+              geometry.point(99, -30, crs)]  # outside
+
+    with mock.patch.object(data_source, 'read', wraps=data_source.read) as read:
+        [(values, valid)] = read_points(source, points)
+
+    assert values[0] == data_source.data[2, 1]
+    assert list(valid) == [True, False, False]
+    assert [call[1]['window'] for call in read.call_args_list] == [((2, 3), (1, 2)), ((512, 513), (0, 1))]
+
+
 def assert_same_read_results(source, dst_shape, dst_dtype, dst_transform, dst_nodata, dst_projection, resampling):
     expected = np.empty(dst_shape, dtype=dst_dtype)
     with source.open() as src:
@@ -397,6 +509,8 @@ def test_read_from_source():
         dst_projection=data_source.crs,
         resampling=Resampling.nearest)
 
+    # zoomed out reads with other resampling methods resample from a decimated read
+    data_source.average_overviews = True
     assert_same_read_results(
         source,
         dst_shape=(500, 250),
@@ -433,6 +547,61 @@ def test_read_from_source():
         dst_projection=data_source.crs,
         resampling=Resampling.cubic)
 
+    # zoomed out nearest neighbour reads only read the pixels they need
+    data_source.average_overviews = False
+    with mock.patch.object(data_source, 'read', wraps=data_source.read) as read:
+        result = assert_same_read_results(
+            source,
+            dst_shape=(62, 60),
+            dst_dtype='float32',
+            dst_transform=data_source.transform * Affine.scale(10, 10),
+            dst_nodata=float('nan'),
+            dst_projection=data_source.crs,
+            resampling=Resampling.nearest)
+    assert read.call_args[1]['out_shape'] == (61, 59)
+    assert result[0, 0] == data_source.data[5, 5]
+
+    # and only read the source pixels under the destination
+    data_source.average_overviews = True
+    with mock.patch.object(data_source, 'read', wraps=data_source.read) as read:
+        assert_same_read_results(
+            source,
+            dst_shape=(40, 40),
+            dst_dtype='float32',
+            dst_transform=data_source.transform * Affine.translation(50, 60) * Affine.scale(4, 4),
+            dst_nodata=float('nan'),
+            dst_projection=data_source.crs,
+            resampling=Resampling.bilinear)
+    (row_start, row_stop), (col_start, col_stop) = read.call_args[1]['window']
+    assert read.call_args[1]['out_shape'] == ((row_stop - row_start) // 4, (col_stop - col_start) // 4)
+    assert (row_stop - row_start) % 4 == 0 and (col_stop - col_start) % 4 == 0
+
+    # whole file thumbnails are decimated too, leaving out the partial blocks at the edges of the source
+    assert data_source.shape == (613, 597)
+    with mock.patch.object(data_source, 'read', wraps=data_source.read) as read:
+        assert_same_read_results(
+            source,
+            dst_shape=(153, 149),
+            dst_dtype='float32',
+            dst_transform=data_source.transform * Affine.translation(4, 4) * Affine.scale(4, 4),
+            dst_nodata=float('nan'),
+            dst_projection=data_source.crs,
+            resampling=Resampling.bilinear)
+    assert read.call_args[1]['window'] == ((0, 612), (0, 596))
+    assert read.call_args[1]['out_shape'] == (153, 149)
+
+    # reprojecting only reads the part of the source under the destination
+    with mock.patch.object(data_source, 'read', wraps=data_source.read) as read:
+        assert_same_read_results(
+            source,
+            dst_shape=(100, 100),
+            dst_dtype='float32',
+            dst_transform=data_source.transform * Affine.translation(100, 200) * Affine.scale(0.5, 0.5),
+            dst_nodata=float('nan'),
+            dst_projection=data_source.crs,
+            resampling=Resampling.bilinear)
+    assert read.call_args[1]['window'] == ((197, 253), (97, 153))
+
     # scale + flip
     assert_same_read_results(
         source,
@@ -455,6 +624,30 @@ def test_read_from_source():
     # TODO: crs change
 
 
+def test_read_from_source_with_int8_data_and_plain_nodata():
+    data_source = FakeDataSource()
+    data_source.data = np.where(data_source.data == data_source.nodata, -1, data_source.data % 100).astype('int8')
+    data_source.dtype = data_source.data.dtype
+    data_source.nodata = -1
+
+    @contextmanager
+    def fake_open():
+        yield data_source
+
+    source = mock.Mock()
+    source.open = fake_open
+
+    # zoomed in, so only the part of the source under the destination is read and reprojected
+    assert_same_read_results(
+        source,
+        dst_shape=(100, 100),
+        dst_dtype='int8',
+        dst_transform=data_source.transform * Affine.translation(450, 450) * Affine.scale(0.5, 0.5),
+        dst_nodata=np.int8(-1),
+        dst_projection=data_source.crs,
+        resampling=Resampling.nearest)
+
+
 def test_read_raster_with_custom_crs_and_transform(example_gdal_path):
     with rasterio.open(example_gdal_path) as src:
         band = rasterio.band(src, 1)
@@ -494,6 +687,134 @@ def test_read_from_file_with_missing_crs(no_crs_gdal_path):
         assert dest1.shape == (10, 10)
 
 
+def test_multiband_source_opens_shared_file_once(example_gdal_path, no_crs_gdal_path):
+    crs = geometry.CRS('EPSG:4326')
+    transform = Affine(0.01, 0.0, 111.975,
+                       0.0, 0.01, -9.975)
+    sources = [RasterFileDataSource(example_gdal_path, bandnumber=1, nodata=-999),
+               RasterFileDataSource(no_crs_gdal_path, bandnumber=1, nodata=-999, crs=crs, transform=transform),
+               RasterFileDataSource(example_gdal_path, bandnumber=1, nodata=-999)]
+    multi_source = MultiBandDataSource(sources)
+
+    assert [indices for indices, _ in multi_source.split_by_file()] == [[0, 2], [1]]
+
+    datacube.storage.storage.HANDLE_CACHE.clear()
+    with mock.patch('rasterio.open', wraps=rasterio.open) as rasterio_open:
+        with multi_source.open() as bands:
+            assert len(bands) == 3
+            assert (bands[0].read() == bands[2].read()).all()
+            assert bands[1].read().shape == (10, 10)
+
+    assert rasterio_open.call_count == 2
+
+
+class FakeHandle(object):
+    def __init__(self, filename):
+        self.filename = filename
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_handle_cache_reuses_idle_handles():
+    cache = HandleCache(max_size=1, idle_timeout=60, opener=FakeHandle)
+
+    with cache.open('a.tif') as first:
+        # A handle in use is never handed out twice
+        with cache.open('a.tif') as second:
+            assert first is not second
+    assert cache.stats() == {'hits': 0, 'misses': 2, 'evictions': 1, 'idle': 1}
+    assert second.closed and not first.closed
+
+    with cache.open('a.tif') as third:
+        assert third is first
+    assert cache.hits == 1
+
+    with cache.open('b.tif'):
+        pass
+    assert cache.misses == 3
+    assert cache.evictions == 2
+    assert first.closed
+
+    cache.clear()
+    assert cache.stats()['idle'] == 0
+
+
+def test_handle_cache_closes_handles_after_errors_and_timeout():
+    cache = HandleCache(max_size=4, idle_timeout=0.01, opener=FakeHandle)
+
+    with pytest.raises(OSError):
+        with cache.open('a.tif') as handle:
+            raise OSError('Read failed')
+    assert handle.closed
+    assert cache.stats()['idle'] == 0
+
+    with cache.open('a.tif') as handle:
+        pass
+    time.sleep(0.05)
+    with cache.open('a.tif') as other:
+        assert other is not handle
+    assert handle.closed
+    assert cache.evictions == 1
+
+
+def test_handle_cache_reopens_files_changed_on_disk(tmpdir):
+    cache = HandleCache(max_size=4, idle_timeout=60, opener=FakeHandle)
+    path = tmpdir.join('a.tif')
+    path.write('first')
+
+    with cache.open(str(path)) as handle:
+        pass
+    with cache.open('NETCDF:%s:red' % path) as netcdf_handle:
+        pass
+    with cache.open(str(path)) as same:
+        assert same is handle
+
+    path.write('rewritten')
+    with cache.open(str(path)) as other:
+        assert other is not handle
+    assert handle.closed
+    with cache.open('NETCDF:%s:red' % path) as other:
+        assert other is not netcdf_handle
+    assert netcdf_handle.closed
+
+
+def test_handle_cache_checks_files_for_changes_at_most_once_per_interval(tmpdir):
+    path = tmpdir.join('a.tif')
+    path.write('first')
+
+    for check_interval, expected_checks in [(0, 3), (60, 1)]:
+        cache = HandleCache(max_size=4, idle_timeout=60, opener=FakeHandle, check_interval=check_interval)
+        with mock.patch('datacube.storage._handles._file_signature', wraps=_file_signature) as file_signature:
+            for _ in range(3):
+                with cache.open(str(path)):
+                    pass
+        assert file_signature.call_count == expected_checks
+        assert cache.stats()['misses'] == 1
+
+
+def test_handle_cache_closes_timed_out_handles_on_any_access():
+    cache = HandleCache(max_size=4, idle_timeout=0.01, opener=FakeHandle)
+    with cache.open('a.tif') as handle:
+        pass
+    time.sleep(0.05)
+    assert cache.stats()['idle'] == 0
+    assert handle.closed
+
+    with cache.open('a.tif') as handle:
+        pass
+    time.sleep(0.05)
+    cache.expire()
+    assert handle.closed
+
+    with cache.open('a.tif') as handle:
+        pass
+    del cache
+    gc.collect()
+    assert handle.closed
+
+
 _EXAMPLE_METADATA_TYPE = MetadataType(
     {
         'name': 'eo',
@@ -12,6 +12,7 @@ def test_find_defaults():
     config = LocalConfig.find(paths=[])
     assert config.db_hostname == ''
     assert config.db_database == 'datacube'
+    assert config.db_fetch_size == 1000
 
 
 def test_find_config():
@@ -22,6 +23,7 @@ db_hostname: fakehost.test.lan
         'override.conf': """[datacube]
 db_hostname: overridden.test.lan
 db_database: overridden_db
+db_fetch_size: 0
         """
     })
 
@@ -36,3 +38,4 @@ db_database: overridden_db
                                      str(files.joinpath('override.conf'))])
     assert config.db_hostname == 'overridden.test.lan'
     assert config.db_database == 'overridden_db'
+    assert config.db_fetch_size == 0
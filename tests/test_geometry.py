@@ -1,8 +1,14 @@
 from __future__ import absolute_import
 
+import threading
+
+import cachetools
+import mock
 import numpy as np
 import osgeo
+import osgeo.osr
 import pytest
+from affine import Affine
 
 try:
     import cPickle as pickle
@@ -10,6 +16,7 @@ except ImportError:
     import pickle
 
 from datacube.utils import geometry
+from datacube.utils.footprints import bounding_boxes
 
 
 def test_pickleable():
@@ -229,6 +236,66 @@ class TestCRSEqualityComparisons(object):
 
         assert a != geometry.CRS('EPSG:4326')
 
+    def test_none_is_not_a_crs(self):
+        with pytest.raises(geometry.InvalidCRSError):
+            geometry.CRS(None)
+
+    def test_crs_are_interned(self):
+        a = geometry.CRS('EPSG:3577')
+        assert geometry.CRS('EPSG:3577') is a
+        assert geometry.CRS(' epsg:3577') is a
+        assert geometry.CRS(a) is a
+
+        unpickled = pickle.loads(pickle.dumps(a, pickle.HIGHEST_PROTOCOL))
+        assert unpickled is a
+
+        # Reprojecting reuses the same coordinate transformation
+        point = geometry.point(1500000, -4000000, a)
+        with mock.patch('datacube.utils.geometry._TRANSFORMS', threading.local()), \
+                mock.patch('datacube.utils.geometry.osr.CoordinateTransformation',
+                           wraps=osgeo.osr.CoordinateTransformation) as make_transform:
+            point.to_crs(geometry.CRS('EPSG:4326'))
+            point.to_crs(geometry.CRS('EPSG:4326'))
+        assert make_transform.call_count == 1
+
+    def test_crs_cache_is_bounded(self):
+        assert geometry.CRS._interned.maxsize
+
+        with mock.patch.object(geometry.CRS, '_interned', cachetools.LRUCache(maxsize=2)):
+            a = geometry.CRS('EPSG:3577')
+            geometry.CRS('EPSG:4326')
+            geometry.CRS('EPSG:32755')
+            assert len(geometry.CRS._interned) == 2
+
+            # A CRS that was dropped from the cache is made again, and is still equal to earlier instances
+            again = geometry.CRS('EPSG:3577')
+            assert again is not a
+            assert again == a
+
+
+def test_bounding_boxes_match_reprojected_geometries():
+    albers = geometry.CRS('EPSG:3577')
+    wgs84 = geometry.CRS('EPSG:4326')
+    geoms = [geometry.box(148, -36, 149, -35, wgs84),
+             geometry.box(1500000, -4000000, 1600000, -3900000, albers),
+             geometry.multipolygon([[[(1, 1), (1, 3), (3, 3), (1, 1)]], [[(140, -30), (140, -20), (150, -20),
+                                                                          (140, -30)]]], wgs84),
+             geometry.box(148, -36, 149, -35, wgs84)]
+
+    boxes = bounding_boxes(geoms, albers)
+
+    assert len(boxes) == len(geoms)
+    for index in (0, 1, 3):
+        # Rectangles, like dataset footprints
+        assert np.allclose(boxes[index], geoms[index].to_crs(albers).boundingbox)
+
+    # Other geometries get the box around their reprojected bounding box
+    expected = geometry.box(*geoms[2].boundingbox, crs=wgs84).to_crs(albers).boundingbox
+    assert np.allclose(boxes[2], expected)
+    contained = geoms[2].to_crs(albers).boundingbox
+    assert boxes[2].left <= contained.left and boxes[2].right >= contained.right
+    assert boxes[2].bottom <= contained.bottom and boxes[2].top >= contained.top
+
 
 def test_geobox():
     points_list = [
@@ -247,6 +314,23 @@ def test_geobox():
         assert abs(resolution[0]) > abs(geobox.extent.boundingbox.right - polygon.boundingbox.right)
         assert abs(resolution[1]) > abs(geobox.extent.boundingbox.top - polygon.boundingbox.top)
         assert abs(resolution[1]) > abs(geobox.extent.boundingbox.bottom - polygon.boundingbox.bottom)
+        assert geobox.boundingbox == geobox.extent.boundingbox
+
+
+def test_geobox_extent_is_built_when_used():
+    crs = geometry.CRS('EPSG:3577')
+    geobox = geometry.GeoBox(100, 100, Affine(25, 0, 1500000, 0, -25, -3900000), crs)
+
+    with mock.patch('datacube.utils.geometry.polygon_from_transform',
+                    wraps=geometry.polygon_from_transform) as make_extent:
+        tile = geobox[10:20, 30:50].buffered(25, 25)
+        assert tile.crs is crs
+        assert tile.boundingbox == (1500725, -3900525, 1501275, -3900225)
+        assert make_extent.call_count == 0
+
+        assert tile.extent.boundingbox == tile.boundingbox
+        assert tile.extent is tile.extent
+        assert make_extent.call_count == 1
 
 
 @pytest.mark.xfail(tuple(int(i) for i in osgeo.__version__.split('.')) < (2, 2),
@@ -1,7 +1,12 @@
 # coding=utf-8
 
+import pickle
+import weakref
+
 import numpy
-from datacube.model import GridSpec
+from uuid import UUID
+
+from datacube.model import GridSpec, Dataset, DatasetType, MetadataType
 from datacube.utils import geometry
 
 
@@ -32,3 +37,38 @@ def test_gridspec_upperleft():
     cells = {index: geobox for index, geobox in list(gs.tiles(bbox))}
     assert set(cells.keys()) == {(30, 15)}  # WELD grid spec has 21 vertical cells -- 21 - 6 = 15
     assert cells[(30, 15)].extent.boundingbox == tile_bbox
+
+
+def _make_dataset(doc):
+    metadata_type = MetadataType({'name': 'eo', 'dataset': dict(id=['id'], sources=['lineage', 'source_datasets'])},
+                                 dataset_search_fields={})
+    dataset_type = DatasetType(metadata_type, {'name': 'eo', 'description': '', 'metadata_type': 'eo',
+                                               'metadata': {}})
+    return Dataset(dataset_type, doc, uris=['file:///tmp/test.nc'])
+
+
+def test_dataset_caches_values_read_from_its_document():
+    doc = {'id': '4ec8fe97-e8b9-11e4-87ff-1040f381a756', 'lineage': {'source_datasets': {}}}
+    dataset = _make_dataset(doc)
+
+    assert not hasattr(dataset, '__dict__') or not dataset.__dict__
+    assert dataset.id == UUID(doc['id'])
+    assert dataset.id is dataset.id
+
+    # Replacing the document resets the cached values
+    dataset.metadata_doc = dict(doc, id='26931115-e8b9-11e4-87ff-1040f381a756')
+    assert dataset.id == UUID('26931115-e8b9-11e4-87ff-1040f381a756')
+
+
+def test_dataset_pickles_after_cached_values_are_read():
+    doc = {'id': '4ec8fe97-e8b9-11e4-87ff-1040f381a756', 'lineage': {'source_datasets': {}}}
+    dataset = _make_dataset(doc)
+    assert dataset.id == UUID(doc['id'])
+    dataset.extra = 'kept'
+
+    unpickled = pickle.loads(pickle.dumps(dataset, pickle.HIGHEST_PROTOCOL))
+    assert unpickled == dataset
+    assert unpickled.metadata_doc == doc
+    assert unpickled.uris == dataset.uris
+    assert unpickled.extra == 'kept'
+    assert weakref.ref(unpickled)() is unpickled
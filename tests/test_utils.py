@@ -5,6 +5,7 @@ Test date sequence generation functions as used by statistics apps
 """
 import os
 import string
+import time
 
 import pytest
 from dateutil.parser import parse
@@ -12,7 +13,9 @@ from pandas import to_datetime
 from hypothesis import given
 from hypothesis.strategies import integers, text
 
-from datacube.utils import uri_to_local_path, clamp, gen_password, write_user_secret_file, slurp
+import datacube.utils
+from datacube.config import set_options
+from datacube.utils import uri_to_local_path, clamp, gen_password, write_user_secret_file, slurp, read_documents
 from datacube.utils.changes import check_doc_unchanged, get_doc_changes, MISSING, DocumentMismatchError
 from datacube.utils.dates import date_sequence
 
@@ -157,3 +160,50 @@ def test_more_check_doc_unchanged():
 
     with pytest.raises(DocumentMismatchError, message='Letters differs from stored (a.b: 1!=2)'):
         check_doc_unchanged({'a': {'b': 1}}, {'a': {'b': 2}}, 'Letters')
+
+
+def test_read_documents_keeps_dates_as_strings(tmpdir):
+    path = tmpdir.join('doc.yaml')
+    path.write('creation_dt: 2014-07-26 23:49:00\n---\ncreation_dt: 2015-04-22\n')
+
+    assert [doc for _, doc in read_documents(str(path))] == [{'creation_dt': '2014-07-26 23:49:00'},
+                                                             {'creation_dt': '2015-04-22'}]
+
+
+def test_read_documents_from_cache(tmpdir, monkeypatch):
+    path = tmpdir.join('doc.yaml')
+    path.write('id: first\n')
+
+    with set_options(document_cache_dir=str(tmpdir.join('cache'))):
+        assert [doc for _, doc in read_documents(str(path))] == [{'id': 'first'}]
+
+        def fail_to_parse(path):
+            raise AssertionError('Parsed %s again' % path)
+
+        monkeypatch.setattr(datacube.utils, '_parse_documents', fail_to_parse)
+        assert [doc for _, doc in read_documents(str(path))] == [{'id': 'first'}]
+        monkeypatch.undo()
+
+        # A changed file is parsed again, and replaces its cache entry
+        path.write('id: second\nsize_bytes: 10\n')
+        assert [doc for _, doc in read_documents(str(path))] == [{'id': 'second', 'size_bytes': 10}]
+        assert len(tmpdir.join('cache').listdir()) == 1
+
+
+def test_document_cache_is_pruned_of_old_entries(tmpdir, monkeypatch):
+    cache = tmpdir.mkdir('cache')
+    old_entry, recent_entry, other_file = cache.join('old.pickle'), cache.join('recent.pickle'), cache.join('notes')
+    for entry in (old_entry, recent_entry, other_file):
+        entry.write('')
+    old_entry.setmtime(time.time() - 2 * 24 * 60 * 60)
+    other_file.setmtime(time.time() - 2 * 24 * 60 * 60)
+
+    path = tmpdir.join('doc.yaml')
+    path.write('id: first\n')
+    monkeypatch.setattr(datacube.utils, '_PRUNED_DOCUMENT_CACHES', set())
+    with set_options(document_cache_dir=str(cache), document_cache_max_age=24 * 60 * 60):
+        assert [doc for _, doc in read_documents(str(path))] == [{'id': 'first'}]
+
+    assert not old_entry.exists()
+    assert recent_entry.exists() and other_file.exists()
+    assert len(cache.listdir()) == 3